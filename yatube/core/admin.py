@@ -0,0 +1,31 @@
+from django.contrib import admin
+
+from .models import Task
+from .paginators import EstimatedCountPaginator
+
+
+class TaskAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk',
+        'name',
+        'status',
+        'attempts',
+        'progress_display',
+        'run_at',
+        'claimed',
+        'finished',
+    )
+    list_filter = ('status', 'name')
+    readonly_fields = ('last_error',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    empty_value_display = '-пусто-'
+
+    def progress_display(self, task):
+        if not task.total:
+            return self.empty_value_display
+        return f'{task.progress} / {task.total}'
+    progress_display.short_description = 'Прогресс'
+
+
+admin.site.register(Task, TaskAdmin)
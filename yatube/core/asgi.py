@@ -0,0 +1,184 @@
+"""Запуск WSGI-приложения Django под ASGI-сервером.
+
+Django 2.2 не умеет обрабатывать ASGI-запросы, поэтому адаптер
+выполняет WSGI-приложение в пуле потоков. Тело запроса дочитывается
+в цикле событий до вызова приложения — в память, а больше
+SPOOL_MAX_MEMORY во временный файл; тело больше MAX_BODY_SIZE
+отклоняется с 413. Ответ отдаётся частями не больше STREAM_CHUNK_SIZE
+по мере чтения итератора. Медленный клиент, загружающий или
+принимающий данные, ждёт в цикле событий и не занимает поток пула.
+"""
+import asyncio
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+STREAM_CHUNK_SIZE = 64 * 1024
+SPOOL_MAX_MEMORY = 1024 * 1024
+# С запасом больше MAX_UPLOAD_SIZE загрузки частями (posts.uploads).
+MAX_BODY_SIZE = 32 * 1024 * 1024
+
+
+class BodyTooLarge(Exception):
+    """Тело запроса больше MAX_BODY_SIZE."""
+
+
+def build_environ(scope, body, content_length):
+    server_name, server_port = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('127.0.0.1', 0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', ''),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': server_name,
+        'SERVER_PORT': str(server_port),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'REMOTE_ADDR': client[0],
+        'CONTENT_LENGTH': str(content_length),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': body,
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    for name, value in scope.get('headers', ()):
+        name = name.decode('latin-1').upper().replace('-', '_')
+        value = value.decode('latin-1')
+        if name == 'CONTENT_TYPE':
+            environ['CONTENT_TYPE'] = value
+        elif name != 'CONTENT_LENGTH':
+            key = f'HTTP_{name}'
+            if key in environ:
+                value = f'{environ[key]},{value}'
+            environ[key] = value
+    return environ
+
+
+def content_length(scope):
+    for name, value in scope.get('headers', ()):
+        if name.lower() == b'content-length' and value.isdigit():
+            return int(value)
+    return None
+
+
+async def read_body(receive, body=b'', more_body=True):
+    """Дочитывает тело запроса во временный файл.
+
+    Возвращает файл, перемотанный в начало, и размер тела или None,
+    если клиент закрыл соединение.
+    """
+    spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_MEMORY)
+    size = 0
+    while True:
+        size += len(body)
+        if size > MAX_BODY_SIZE:
+            spool.close()
+            raise BodyTooLarge(size)
+        spool.write(body)
+        if not more_body:
+            break
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            spool.close()
+            return None
+        body = message.get('body', b'')
+        more_body = message.get('more_body', False)
+    spool.seek(0)
+    return spool, size
+
+
+async def _too_large(send):
+    await send({
+        'type': 'http.response.start',
+        'status': 413,
+        'headers': [(b'content-type', b'text/plain; charset=utf-8')],
+    })
+    await send({'type': 'http.response.body',
+                'body': b'Request body too large'})
+
+
+class WsgiToAsgi:
+    def __init__(self, wsgi_application, max_workers=None):
+        self.wsgi_application = wsgi_application
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+
+    def start_wsgi(self, environ):
+        """Вызывает приложение; возвращает ответ, итератор и первую часть."""
+        response = {}
+
+        def start_response(status, headers, exc_info=None):
+            response['status'] = int(status.split(' ', 1)[0])
+            response['headers'] = [
+                (name.lower().encode('latin-1'), value.encode('latin-1'))
+                for name, value in headers
+            ]
+
+        result = self.wsgi_application(environ, start_response)
+        try:
+            chunks = iter(result)
+            # Генератор может вызвать start_response только при первой
+            # итерации, поэтому первая часть читается сразу.
+            first = self.next_chunk(chunks)
+        except BaseException:
+            self.close(result)
+            raise
+        return response, result, chunks, first
+
+    @staticmethod
+    def next_chunk(chunks):
+        """Следующие STREAM_CHUNK_SIZE байт ответа или None в конце."""
+        parts = []
+        size = 0
+        for part in chunks:
+            parts.append(part)
+            size += len(part)
+            if size >= STREAM_CHUNK_SIZE:
+                break
+        return b''.join(parts) if parts else None
+
+    @staticmethod
+    def close(result):
+        if hasattr(result, 'close'):
+            result.close()
+
+    async def __call__(self, scope, receive, send):
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            return
+        length = content_length(scope)
+        try:
+            if length is not None and length > MAX_BODY_SIZE:
+                raise BodyTooLarge(length)
+            request_body = await read_body(
+                receive, message.get('body', b''),
+                message.get('more_body', False))
+        except BodyTooLarge:
+            await _too_large(send)
+            return
+        if request_body is None:
+            return
+        body, size = request_body
+        with body:
+            await self.respond(send, build_environ(scope, body, size))
+
+    async def respond(self, send, environ):
+        loop = asyncio.get_running_loop()
+        response, result, chunks, chunk = await loop.run_in_executor(
+            self.executor, self.start_wsgi, environ)
+        try:
+            await send({
+                'type': 'http.response.start',
+                'status': response['status'],
+                'headers': response['headers'],
+            })
+            while chunk is not None:
+                await send({'type': 'http.response.body', 'body': chunk,
+                            'more_body': True})
+                chunk = await loop.run_in_executor(
+                    self.executor, self.next_chunk, chunks)
+            await send({'type': 'http.response.body', 'body': b''})
+        finally:
+            await loop.run_in_executor(self.executor, self.close, result)
@@ -0,0 +1,16 @@
+from functools import partial
+
+from posts.notifications import unread_count
+
+
+def notifications(request):
+    """Добавляет счётчик непрочитанных уведомлений.
+
+    Значение вычисляется лениво, только если шаблон его выводит.
+    """
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        return {}
+    return {
+        'unread_notifications': partial(unread_count, user.id),
+    }
@@ -1,8 +1,22 @@
+import time
 from datetime import datetime
 
+# Год вычисляется один раз и пересчитывается, когда наступит следующий.
+_year = None
+_next_year_at = 0
+
+
+def current_year():
+    global _year, _next_year_at
+    if time.time() >= _next_year_at:
+        now = datetime.now()
+        _year = now.year
+        _next_year_at = datetime(_year + 1, 1, 1).timestamp()
+    return _year
+
 
 def year(request):
     """Добавляет переменную с текущим годом."""
     return {
-        'year': datetime.now().year,
+        'year': current_year(),
     }
@@ -0,0 +1,30 @@
+from functools import wraps
+
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.views.decorators.http import condition
+
+
+def conditional_page(etag_func, last_modified_func=None):
+    """Условный GET с заголовками кэширования.
+
+    Валидаторы считаются до вызова представления; если клиент прислал
+    совпадающий If-None-Match или If-Modified-Since, сразу отдаётся
+    304 без пагинатора и шаблона. Страницы анонимов можно хранить в
+    общих кэшах, страницы вошедших пользователей — только в браузере;
+    и те и другие перепроверяются при каждом запросе.
+    """
+    def decorator(view):
+        conditional_view = condition(etag_func, last_modified_func)(view)
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            response = conditional_view(request, *args, **kwargs)
+            if request.user.is_authenticated:
+                patch_cache_control(response, private=True, no_cache=True)
+            else:
+                patch_cache_control(
+                    response, public=True, max_age=0, must_revalidate=True)
+            patch_vary_headers(response, ('Cookie',))
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,102 @@
+"""Публикация и подписка на события для живого обновления страниц.
+
+Каналы: «feed» — все новые посты, «group:<id>» — посты группы,
+«post:<id>» — комментарии к посту. Брокер выбирается настройкой
+EVENTS_BROKER: LocalBroker хранит события в памяти процесса и годится,
+только если сайт и поток /events/ работают в одном процессе;
+CacheBroker — в кэше Django, который при общем CACHES видят все
+процессы. События публикуются после фиксации транзакции.
+"""
+import itertools
+import threading
+from collections import deque
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+BACKLOG = 100
+EVENT_TIMEOUT = 60 * 10
+# На сколько номеров читатель CacheBroker заглядывает дальше подсказки.
+LOOKAHEAD = 10
+
+
+class LocalBroker:
+    """События в памяти текущего процесса."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._channels = {}
+
+    def publish(self, channel, event):
+        with self._lock:
+            event_id = next(self._ids)
+            queue = self._channels.setdefault(channel, deque(maxlen=BACKLOG))
+            queue.append((event_id, event))
+        return event_id
+
+    def last_id(self, channel):
+        queue = self._channels.get(channel)
+        return queue[-1][0] if queue else 0
+
+    def since(self, channel, last_id):
+        with self._lock:
+            queue = self._channels.get(channel, ())
+            return [item for item in queue if item[0] > last_id]
+
+
+class CacheBroker:
+    """События в кэше Django.
+
+    Номер события занимается через cache.add вместе с самим событием,
+    поэтому читатель не увидит номер раньше события и не пропустит его.
+    Ключ последнего номера — только подсказка: при одновременных
+    публикациях он может отставать, и читатель смотрит на LOOKAHEAD
+    номеров дальше него.
+    """
+
+    SEQUENCE_KEY = 'events:{}:last'
+    EVENT_KEY = 'events:{}:{}'
+
+    def publish(self, channel, event):
+        event_id = self.last_id(channel) + 1
+        while not cache.add(self.EVENT_KEY.format(channel, event_id), event,
+                            EVENT_TIMEOUT):
+            event_id += 1
+        cache.set(self.SEQUENCE_KEY.format(channel), event_id, None)
+        return event_id
+
+    def last_id(self, channel):
+        return cache.get(self.SEQUENCE_KEY.format(channel), 0)
+
+    def since(self, channel, last_id):
+        current = max(self.last_id(channel), last_id)
+        first = max(last_id + 1, current - BACKLOG + 1)
+        keys = {
+            self.EVENT_KEY.format(channel, event_id): event_id
+            for event_id in range(first, current + LOOKAHEAD + 1)
+        }
+        found = cache.get_many(keys)
+        return sorted((keys[key], event) for key, event in found.items())
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    with _broker_lock:
+        if _broker is None:
+            _broker = import_string(
+                getattr(settings, 'EVENTS_BROKER',
+                        'core.events.CacheBroker'))()
+    return _broker
+
+
+def publish(channel, event_type, **data):
+    """Публикует событие, когда изменение станет видно другим процессам."""
+    transaction.on_commit(
+        lambda: get_broker().publish(channel, dict(data, type=event_type)))
@@ -0,0 +1,104 @@
+"""Отправка почты через очередь.
+
+QueuedEmailBackend только сохраняет письма в QueuedEmail и ставит в
+очередь задачу flush_email_queue, поэтому запрос (например, сброс
+пароля) не ждёт SMTP или диска. Задача отправляет накопленные письма
+пачками через одно соединение EMAIL_DELIVERY_BACKEND. Перед отправкой
+письмо помечается взятым, поэтому задачи, запущенные параллельно, не
+отправляют его дважды.
+"""
+import pickle
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import QueuedEmail, Task
+from .tasks import enqueue, task
+
+
+class QueuedEmailBackend(BaseEmailBackend):
+    def send_messages(self, email_messages):
+        queued = []
+        for message in email_messages:
+            message.connection = None
+            queued.append(QueuedEmail(message=pickle.dumps(message)))
+        if not queued:
+            return 0
+        QueuedEmail.objects.bulk_create(queued)
+        # Готовая к запуску задача отправит и эти письма.
+        if not Task.objects.filter(
+                name=flush_email_queue.task_name, status=Task.PENDING,
+                run_at__lte=timezone.now()).exists():
+            enqueue(flush_email_queue)
+        return len(queued)
+
+
+def pending():
+    max_attempts = getattr(settings, 'TASK_MAX_ATTEMPTS', 3)
+    return QueuedEmail.objects.filter(
+        sent__isnull=True, attempts__lt=max_attempts)
+
+
+def queue_depth():
+    return pending().count()
+
+
+def claimable():
+    """Ожидающие письма, которые не взяла на отправку другая задача.
+
+    Метка старше TASK_VISIBILITY_TIMEOUT осталась от упавшего воркера.
+    """
+    timeout = getattr(settings, 'TASK_VISIBILITY_TIMEOUT', 60 * 30)
+    expired = timezone.now() - timedelta(seconds=timeout)
+    return pending().filter(
+        Q(claimed__isnull=True) | Q(claimed__lt=expired))
+
+
+def _claim(queued):
+    return QueuedEmail.objects.filter(
+        pk=queued.pk, sent__isnull=True, claimed=queued.claimed,
+    ).update(claimed=timezone.now()) == 1
+
+
+def _send_batch(connection, batch):
+    failed = 0
+    for queued in batch:
+        try:
+            connection.send_messages([pickle.loads(queued.message)])
+        except Exception as error:
+            failed += 1
+            QueuedEmail.objects.filter(pk=queued.pk).update(
+                attempts=queued.attempts + 1, last_error=repr(error),
+                claimed=None)
+        else:
+            QueuedEmail.objects.filter(pk=queued.pk).update(
+                sent=timezone.now())
+    return failed
+
+
+@task
+def flush_email_queue():
+    """Отправляет все ожидающие письма через одно соединение."""
+    batch_size = getattr(settings, 'EMAIL_BATCH_SIZE', 50)
+    connection = get_connection(settings.EMAIL_DELIVERY_BACKEND)
+    failed = 0
+    last_pk = 0
+    connection.open()
+    try:
+        while True:
+            batch = list(claimable().filter(pk__gt=last_pk).order_by('pk')[
+                :batch_size])
+            if not batch:
+                break
+            failed += _send_batch(
+                connection, [queued for queued in batch if _claim(queued)])
+            last_pk = batch[-1].pk
+    finally:
+        connection.close()
+    if failed:
+        # Исключение заставит очередь повторить задачу с задержкой.
+        raise RuntimeError(f'Не отправлено писем: {failed}')
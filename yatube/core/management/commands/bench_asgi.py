@@ -0,0 +1,118 @@
+import asyncio
+import io
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.core.wsgi import get_wsgi_application
+
+from core.asgi import WsgiToAsgi
+
+
+class SlowInput(io.BytesIO):
+    """Тело запроса, которое клиент передаёт с задержкой."""
+
+    def __init__(self, body, delay):
+        super().__init__(body)
+        self.delay = delay
+
+    def read(self, *args):
+        time.sleep(self.delay)
+        return super().read(*args)
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает WSGI с пулом потоков и ASGI-адаптер при одновременных '
+        'медленных клиентах.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default='/about/author/')
+        parser.add_argument('--requests', type=int, default=100)
+        parser.add_argument(
+            '--threads', type=int, default=4,
+            help='Потоков-обработчиков Django в обоих режимах.',
+        )
+        parser.add_argument(
+            '--delay', type=float, default=0.05,
+            help='Задержка клиента при отправке запроса и чтении ответа.',
+        )
+
+    def handle(self, *args, **options):
+        self.application = get_wsgi_application()
+        self.path = options['path']
+        self.delay = options['delay']
+        total = options['requests']
+        threads = options['threads']
+
+        # Прогрев: первый запрос строит URL-резолвер и шаблоны.
+        self.wsgi_request()
+
+        for name, bench in (('WSGI', self.bench_wsgi),
+                            ('ASGI', self.bench_asgi)):
+            started = time.perf_counter()
+            bench(total, threads)
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f'{name}: {total} запросов за {elapsed:.2f} с, '
+                f'{total / elapsed:.1f} запросов/с'
+            )
+
+    def environ(self, body_input):
+        return {
+            'REQUEST_METHOD': 'GET',
+            'PATH_INFO': self.path,
+            'QUERY_STRING': '',
+            'SERVER_NAME': 'localhost',
+            'SERVER_PORT': '80',
+            'SERVER_PROTOCOL': 'HTTP/1.1',
+            'REMOTE_ADDR': '127.0.0.1',
+            'wsgi.input': body_input,
+            'wsgi.url_scheme': 'http',
+            'wsgi.errors': io.StringIO(),
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': False,
+            'wsgi.run_once': False,
+        }
+
+    def wsgi_request(self):
+        # Поток воркера ждёт и медленное тело запроса, и медленное
+        # чтение ответа клиентом.
+        body_input = SlowInput(b'', self.delay)
+        body_input.read()
+        result = self.application(
+            self.environ(body_input), lambda status, headers: None)
+        for _ in result:
+            time.sleep(self.delay)
+        result.close()
+
+    def bench_wsgi(self, total, threads):
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            list(pool.map(lambda _: self.wsgi_request(), range(total)))
+
+    def bench_asgi(self, total, threads):
+        adapter = WsgiToAsgi(self.application, max_workers=threads)
+        scope = {
+            'type': 'http',
+            'method': 'GET',
+            'path': self.path,
+            'query_string': b'',
+            'headers': [],
+            'server': ('localhost', 80),
+        }
+
+        async def receive():
+            await asyncio.sleep(self.delay)
+            return {'type': 'http.request', 'body': b''}
+
+        async def send(message):
+            if message['type'] == 'http.response.body':
+                await asyncio.sleep(self.delay)
+
+        async def run():
+            await asyncio.gather(
+                *(adapter(scope, receive, send) for _ in range(total)))
+
+        asyncio.run(run())
+        adapter.executor.shutdown()
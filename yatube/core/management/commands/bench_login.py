@@ -0,0 +1,74 @@
+import statistics
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import get_hasher
+from django.core.management.base import BaseCommand
+from django.test import Client, override_settings
+from django.urls import reverse
+
+BENCH_USERNAME = 'bench_login'
+BENCH_PASSWORD = 'bench-login-password'
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает задержку и пропускную способность входа через '
+        'users:login при разных хешерах паролей.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=50)
+        parser.add_argument(
+            '--hasher', action='append',
+            choices=list(settings.PASSWORD_HASHER_POLICIES),
+            help='Хешер для сравнения; по умолчанию все.',
+        )
+
+    def handle(self, *args, **options):
+        user, created = get_user_model().objects.get_or_create(
+            username=BENCH_USERNAME)
+        password = user.password
+        try:
+            for name in (options['hasher']
+                         or settings.PASSWORD_HASHER_POLICIES):
+                self.bench(name, user, options['requests'])
+        finally:
+            if created:
+                user.delete()
+            else:
+                user.password = password
+                user.save(update_fields=['password'])
+
+    def bench(self, name, user, total):
+        path = settings.PASSWORD_HASHER_POLICIES[name]
+        # Хешер единственный в списке, поэтому вход не пересчитывает
+        # хеш и каждый запрос стоит одну проверку пароля.
+        with override_settings(PASSWORD_HASHERS=[path],
+                               ALLOWED_HOSTS=['testserver']):
+            hasher = get_hasher()
+            if hasher.library is not None:
+                try:
+                    hasher._load_library()
+                except ValueError as error:
+                    self.stdout.write(f'{name:<8} пропущен: {error}')
+                    return
+            user.set_password(BENCH_PASSWORD)
+            user.save(update_fields=['password'])
+            url = reverse('users:login')
+            data = {'username': user.username, 'password': BENCH_PASSWORD}
+            timings = []
+            for _ in range(total):
+                client = Client()
+                started = time.perf_counter()
+                response = client.post(url, data)
+                timings.append(time.perf_counter() - started)
+                assert response.status_code == 302, 'вход не удался'
+        timings.sort()
+        mean = statistics.mean(timings)
+        self.stdout.write(
+            f'{name:<8} среднее {mean * 1000:7.2f} мс, '
+            f'p95 {timings[int(total * 0.95) - 1] * 1000:7.2f} мс, '
+            f'{1 / mean:6.1f} входов/с на процесс'
+        )
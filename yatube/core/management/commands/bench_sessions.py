@@ -0,0 +1,63 @@
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+BACKENDS = ('db', 'cached_db', 'cache', 'signed_cookies')
+BENCH_USERNAME = 'bench_sessions'
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает задержку ленты подписок для вошедшего пользователя '
+        'при разных хранилищах сессий.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument(
+            '--backend', action='append', choices=BACKENDS,
+            help='Хранилище для сравнения; по умолчанию все.',
+        )
+
+    def handle(self, *args, **options):
+        user, created = get_user_model().objects.get_or_create(
+            username=BENCH_USERNAME)
+        try:
+            for backend in options['backend'] or BACKENDS:
+                self.bench(backend, user, options['requests'])
+        finally:
+            if created:
+                user.delete()
+
+    def bench(self, backend, user, total):
+        engine = f'django.contrib.sessions.backends.{backend}'
+        with override_settings(SESSION_ENGINE=engine,
+                               ALLOWED_HOSTS=['testserver']):
+            client = Client()
+            client.force_login(user)
+            url = reverse('posts:follow_index')
+            # Прогрев: первый запрос строит резолвер и шаблоны.
+            client.get(url)
+            timings = []
+            with CaptureQueriesContext(connection) as queries:
+                for _ in range(total):
+                    started = time.perf_counter()
+                    client.get(url)
+                    timings.append(time.perf_counter() - started)
+            session_queries = sum(
+                'django_session' in query['sql']
+                for query in queries.captured_queries)
+        timings.sort()
+        mean = statistics.mean(timings) * 1000
+        self.stdout.write(
+            f'{backend:<15} среднее {mean:6.2f} мс, '
+            f'p95 {timings[int(total * 0.95) - 1] * 1000:6.2f} мс, '
+            f'запросов к django_session: {session_queries / total:.2f} '
+            f'на страницу'
+        )
@@ -0,0 +1,51 @@
+import time
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from django.template import RequestContext
+from django.test import RequestFactory
+
+from core import template_cache
+
+
+class Command(BaseCommand):
+    help = (
+        'Компилирует все шаблоны проекта и показывает время компиляции '
+        'и рендера каждого.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--bench', type=int, default=0, metavar='N',
+            help='Отрендерить каждый шаблон N раз и вывести среднее время.',
+        )
+
+    def handle(self, *args, **options):
+        template_cache.reset()
+        cold = template_cache.warm_templates()
+        warm = template_cache.warm_templates()
+        self.stdout.write(
+            f'{"Шаблон":<40} {"разбор, мс":>10} {"из кэша, мс":>11}'
+            + (f' {"рендер, мс":>10}' if options['bench'] else ''))
+        for name, seconds in cold.items():
+            line = (f'{name:<40} {seconds * 1000:>10.2f} '
+                    f'{warm[name] * 1000:>11.3f}')
+            if options['bench']:
+                line += f' {self.render_time(name, options["bench"]):>10}'
+            self.stdout.write(line)
+        self.stdout.write(self.style.SUCCESS(
+            f'Скомпилировано шаблонов: {len(cold)} '
+            f'за {sum(cold.values()) * 1000:.1f} мс.'))
+
+    def render_time(self, name, repeat):
+        template = template_cache.get_engine().get_template(name)
+        request = RequestFactory().get('/')
+        request.user = AnonymousUser()
+        try:
+            started = time.perf_counter()
+            for _ in range(repeat):
+                template.render(RequestContext(request, {}))
+        except Exception:
+            # Шаблону нужен контекст, которого нет в пустом запросе.
+            return '—'
+        return f'{(time.perf_counter() - started) / repeat * 1000:.2f}'
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from core import mail
+
+
+class Command(BaseCommand):
+    help = 'Показывает размер очереди писем и при необходимости отправляет.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--flush', action='store_true',
+            help='Отправить письма из очереди сейчас.',
+        )
+
+    def handle(self, *args, **options):
+        if options['flush']:
+            mail.flush_email_queue()
+        self.stdout.write(f'Писем в очереди: {mail.queue_depth()}')
@@ -0,0 +1,91 @@
+import multiprocessing
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connections
+
+from core import tasks
+
+
+def work(threads, batch_size, sleep, once):
+    pool = ThreadPoolExecutor(max_workers=threads) if threads > 1 else None
+    while True:
+        batch = tasks.claim_batch(batch_size)
+        if pool is None:
+            for task_obj in batch:
+                tasks.execute(task_obj)
+        else:
+            list(pool.map(_execute, batch))
+        if not batch:
+            if once:
+                break
+            time.sleep(sleep)
+    if pool is not None:
+        pool.shutdown()
+
+
+def _execute(task_obj):
+    try:
+        return tasks.execute(task_obj)
+    finally:
+        close_old_connections()
+
+
+class Command(BaseCommand):
+    help = 'Запускает обработчик фоновых задач.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes', type=int, default=1,
+            help='Количество процессов-обработчиков.',
+        )
+        parser.add_argument(
+            '--threads', type=int, default=4,
+            help='Количество потоков в каждом процессе.',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=20,
+            help='Сколько задач забирать из очереди за раз.',
+        )
+        parser.add_argument(
+            '--sleep', type=float, default=1.0,
+            help='Пауза в секундах, когда очередь пуста.',
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Выполнить готовые задачи и завершиться.',
+        )
+        parser.add_argument(
+            '--stats', action='store_true',
+            help='Показать метрики очереди и завершиться.',
+        )
+
+    def handle(self, *args, **options):
+        if options['stats']:
+            metrics = tasks.stats()
+            for status, total in metrics['counts'].items():
+                self.stdout.write(f'{status}: {total}')
+            self.stdout.write(
+                f"oldest_pending_seconds: "
+                f"{metrics['oldest_pending_seconds']:.0f}"
+            )
+            return
+
+        worker_args = (
+            options['threads'], options['batch_size'],
+            options['sleep'], options['once'],
+        )
+        if options['processes'] == 1:
+            work(*worker_args)
+            return
+        # Соединения с базой нельзя разделять между процессами.
+        connections.close_all()
+        processes = [
+            multiprocessing.Process(target=work, args=worker_args)
+            for _ in range(options['processes'])
+        ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
@@ -0,0 +1,68 @@
+import os
+import subprocess
+import sys
+
+from django.core.management.base import BaseCommand
+
+from core import warmup
+
+# Импорты, которые выполняет воркер при старте.
+STARTUP_CODE = 'import yatube.wsgi'
+
+
+def parse_importtime(output):
+    """Разбирает вывод -X importtime: [(модуль, свои мкс, всего мкс)]."""
+    modules = []
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        own, cumulative, name = line[len('import time:'):].split('|')
+        modules.append((name.strip(), int(own), int(cumulative)))
+    return modules
+
+
+class Command(BaseCommand):
+    help = (
+        'Прогревает процесс: URL, шаблоны, соединения с базой, кэш и первые '
+        'страницы. С --profile-imports показывает стоимость импорта модулей.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--profile-imports', action='store_true',
+            help='Запустить импорт wsgi-приложения с -X importtime.',
+        )
+        parser.add_argument(
+            '--top', type=int, default=25,
+            help='Сколько самых дорогих модулей показать.',
+        )
+
+    def handle(self, *args, **options):
+        if options['profile_imports']:
+            self.profile_imports(options['top'])
+            return
+        total = 0
+        for name, result, elapsed in warmup.warmup():
+            total += elapsed
+            self.stdout.write(
+                f'{name:<12} {elapsed * 1000:>9.1f} мс  {result}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Прогрев завершён за {total:.2f} с.'))
+
+    def profile_imports(self, top):
+        environment = dict(os.environ)
+        environment.pop('WARMUP', None)
+        completed = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', STARTUP_CODE],
+            env=environment, stderr=subprocess.PIPE, text=True,
+            check=True,
+        )
+        modules = parse_importtime(completed.stderr)
+        self.stdout.write(f'{"Модуль":<50} {"свой, мс":>9} {"всего, мс":>10}')
+        for name, own, cumulative in sorted(
+                modules, key=lambda module: module[1], reverse=True)[:top]:
+            self.stdout.write(
+                f'{name:<50} {own / 1000:>9.2f} {cumulative / 1000:>10.2f}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Модулей: {len(modules)}, суммарно '
+            f'{sum(module[1] for module in modules) / 1000:.1f} мс.'))
@@ -0,0 +1,96 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Task(models.Model):
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = (
+        (PENDING, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Выполнена'),
+        (FAILED, 'Ошибка'),
+    )
+
+    name = models.CharField(max_length=200, verbose_name='Задача')
+    payload = models.TextField(default='{}', verbose_name='Аргументы')
+    status = models.CharField(
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default=PENDING,
+        verbose_name='Статус',
+    )
+    attempts = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name='Попытки',
+    )
+    run_at = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='Запустить после',
+    )
+    created = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Создана',
+    )
+    claimed = models.DateTimeField(
+        blank=True,
+        null=True,
+        verbose_name='Взята в работу',
+    )
+    finished = models.DateTimeField(
+        blank=True,
+        null=True,
+        verbose_name='Завершена',
+    )
+    last_error = models.TextField(blank=True, verbose_name='Ошибка')
+    progress = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Обработано',
+    )
+    total = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Всего',
+    )
+
+    class Meta:
+        ordering = ['run_at']
+        indexes = [
+            models.Index(fields=['status', 'run_at'], name='task_queue'),
+        ]
+
+    def __str__(self):
+        return f'{self.name} ({self.status})'
+
+
+class QueuedEmail(models.Model):
+    message = models.BinaryField(verbose_name='Письмо')
+    created = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Создано',
+    )
+    attempts = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name='Попытки',
+    )
+    claimed = models.DateTimeField(
+        blank=True,
+        null=True,
+        verbose_name='Взято на отправку',
+    )
+    sent = models.DateTimeField(
+        blank=True,
+        null=True,
+        verbose_name='Отправлено',
+    )
+    last_error = models.TextField(blank=True, verbose_name='Ошибка')
+
+    class Meta:
+        ordering = ['created']
+        indexes = [
+            models.Index(fields=['sent', 'created'], name='email_queue'),
+        ]
+
+    def __str__(self):
+        return f'Письмо {self.pk}'
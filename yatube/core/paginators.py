@@ -0,0 +1,67 @@
+"""Пагинатор админки с приблизительным числом строк.
+
+Точный COUNT(*) по большой таблице читает её целиком, и список объектов
+в админке открывается секундами. Для запроса без фильтров
+EstimatedCountPaginator берёт оценку из статистики базы: в PostgreSQL
+это pg_class.reltuples, в SQLite — число строк из sqlite_stat1 (её
+заполняет ANALYZE), а без неё MAX(rowid), который для таблиц с
+автоинкрементным ключом читается по индексу и после удалений
+завышает число строк. Если оценка меньше ESTIMATE_THRESHOLD, её нет
+или база другая, считается точно.
+"""
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+ESTIMATE_THRESHOLD = 10000
+
+
+def _postgresql_estimate(connection, cursor, table):
+    cursor.execute('SELECT reltuples FROM pg_class WHERE relname = %s',
+                   [table])
+    row = cursor.fetchone()
+    return int(row[0]) if row else None
+
+
+def _sqlite_estimate(connection, cursor, table):
+    cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' "
+        "AND name = 'sqlite_stat1'")
+    if cursor.fetchone():
+        # Первое число в stat — число строк таблицы или индекса.
+        cursor.execute('SELECT stat FROM sqlite_stat1 WHERE tbl = %s',
+                       [table])
+        row = cursor.fetchone()
+        if row:
+            return int(row[0].split()[0])
+    cursor.execute(
+        f'SELECT MAX(rowid) FROM {connection.ops.quote_name(table)}')
+    row = cursor.fetchone()
+    return row[0] or 0
+
+
+ESTIMATES = {
+    'postgresql': _postgresql_estimate,
+    'sqlite': _sqlite_estimate,
+}
+
+
+def estimated_count(queryset):
+    """Оценка числа строк таблицы или None, если её нет."""
+    if queryset.query.where or queryset.query.distinct:
+        return None
+    connection = connections[queryset.db]
+    estimate = ESTIMATES.get(connection.vendor)
+    if estimate is None:
+        return None
+    with connection.cursor() as cursor:
+        return estimate(connection, cursor, queryset.model._meta.db_table)
+
+
+class EstimatedCountPaginator(Paginator):
+    @cached_property
+    def count(self):
+        estimate = estimated_count(self.object_list)
+        if estimate is not None and estimate >= ESTIMATE_THRESHOLD:
+            return estimate
+        return super().count
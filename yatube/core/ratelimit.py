@@ -0,0 +1,156 @@
+"""Ограничение частоты запросов к изменяющим представлениям.
+
+Счётчики лежат в общем кэше (settings.CACHES) по ключу (представление,
+пользователь или IP, номер окна) и увеличиваются cache.incr — других
+записей на горячем пути нет. Атомарен incr только в memcached: в
+DatabaseCache это чтение и запись, и одновременные запросы могут
+потерять приращения, то есть лимит там приблизительный. Число
+запросов за последний период оценивается по текущему и предыдущему
+окну (скользящее окно), поэтому лимит не «обнуляется» на границе
+окна, как у простого счётчика, и ведёт себя как ведро токенов,
+пополняемое равномерно. Лимиты задаёт RATE_LIMITS:
+
+    RATE_LIMITS = {'post_create': {'user': '10/m', 'ip': '60/m'}}
+
+Ответ получает заголовки X-RateLimit-Limit и X-RateLimit-Remaining,
+отказ — статус 429 и Retry-After.
+
+IP клиента — это REMOTE_ADDR. За обратным прокси им будет адрес
+прокси, поэтому адреса и сети прокси перечисляются в
+RATELIMIT_TRUSTED_PROXIES: пока очередной адрес доверенный, клиентом
+считается предыдущий адрес из X-Forwarded-For. Заголовку от
+недоверенного адреса не верим — его может прислать сам клиент.
+"""
+import ipaddress
+import logging
+import math
+import time
+from collections import namedtuple
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .views import too_many_requests
+
+logger = logging.getLogger(__name__)
+
+PERIODS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 60 * 60 * 24}
+KEY = 'ratelimit:{}:{}:{}'
+
+Result = namedtuple('Result', 'allowed limit remaining retry_after')
+
+
+def parse_rate(rate):
+    """'10/m' → (10, 60)."""
+    count, period = rate.split('/')
+    return int(count), PERIODS[period]
+
+
+def _incr(key, timeout):
+    try:
+        count = cache.incr(key)
+    except ValueError:
+        if cache.add(key, 1, timeout):
+            return 1
+        count = cache.incr(key)
+    if timeout > cache.default_timeout:
+        # Кэши без собственного incr записывают значение заново с
+        # таймаутом по умолчанию, и счётчик длинного окна истёк бы
+        # раньше, чем его прочитают.
+        cache.touch(key, timeout)
+    return count
+
+
+def hit(scope, ident, rate, now=None):
+    """Учитывает запрос и решает, укладывается ли он в лимит."""
+    limit, period = parse_rate(rate)
+    now = time.time() if now is None else now
+    window, offset = divmod(now, period)
+    window = int(window)
+    count = _incr(KEY.format(scope, ident, window), period * 2)
+    previous = cache.get(KEY.format(scope, ident, window - 1), 0)
+    passed = offset / period
+    estimate = previous * (1 - passed) + count
+    if estimate <= limit:
+        return Result(True, limit, int(limit - estimate), 0)
+    if count > limit or not previous:
+        # Текущего окна не хватает целиком — ждём следующего.
+        wait = period - offset
+    else:
+        # Ждём, пока вклад предыдущего окна уменьшится до лимита.
+        wait = period * ((estimate - limit) / previous)
+    return Result(False, limit, 0, max(1, math.ceil(wait)))
+
+
+def _trusted_networks():
+    return [ipaddress.ip_network(proxy, strict=False)
+            for proxy in getattr(settings, 'RATELIMIT_TRUSTED_PROXIES', ())]
+
+
+def _is_trusted(address, networks):
+    try:
+        address = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(address in network for network in networks)
+
+
+def client_ip(request):
+    """Адрес клиента с учётом доверенных прокси."""
+    address = request.META.get('REMOTE_ADDR', '')
+    networks = _trusted_networks()
+    if not networks:
+        return address
+    forwarded = [
+        part.strip() for part in
+        request.META.get('HTTP_X_FORWARDED_FOR', '').split(',')
+        if part.strip()
+    ]
+    # Каждый прокси дописывает адрес, от которого получил запрос, в
+    # конец заголовка, поэтому идём справа налево.
+    while forwarded and _is_trusted(address, networks):
+        address = forwarded.pop()
+    return address
+
+
+def check(request, scope):
+    """Проверяет лимиты пользователя и IP, возвращает самый строгий."""
+    limits = settings.RATE_LIMITS.get(scope, {})
+    idents = []
+    if request.user.is_authenticated and 'user' in limits:
+        idents.append(('user', f'user:{request.user.pk}'))
+    if 'ip' in limits:
+        idents.append(('ip', f'ip:{client_ip(request)}'))
+    results = [hit(scope, ident, limits[kind]) for kind, ident in idents]
+    if not results:
+        return None
+    denied = [result for result in results if not result.allowed]
+    if denied:
+        return max(denied, key=lambda result: result.retry_after)
+    return min(results, key=lambda result: result.remaining)
+
+
+def ratelimit(scope, methods=('POST',)):
+    """Декоратор представления: лимиты RATE_LIMITS[scope] для methods."""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if (request.method not in methods
+                    or not getattr(settings, 'RATELIMIT_ENABLED', True)):
+                return view(request, *args, **kwargs)
+            result = check(request, scope)
+            if result is None:
+                return view(request, *args, **kwargs)
+            if result.allowed:
+                response = view(request, *args, **kwargs)
+            else:
+                logger.warning('Превышен лимит %s для %s', scope,
+                               client_ip(request))
+                response = too_many_requests(request)
+                response['Retry-After'] = str(result.retry_after)
+            response['X-RateLimit-Limit'] = str(result.limit)
+            response['X-RateLimit-Remaining'] = str(result.remaining)
+            return response
+        return wrapper
+    return decorator
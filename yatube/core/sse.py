@@ -0,0 +1,186 @@
+"""ASGI-приложение с потоком server-sent events.
+
+GET /events/feed/, /events/group/<id>/ и /events/post/<id>/ держит
+соединение открытым и отправляет клиенту сводку новых событий канала:
+«new_posts» с количеством новых постов и «new_comments» с количеством
+новых комментариев. Ожидание — это asyncio.sleep, поэтому тысячи
+открытых соединений не занимают потоки воркеров.
+
+Брокер опрашивает один цикл на канал в процессе (_poll), раз в
+POLL_INTERVAL, и раздаёт новые события очередям всех подключений
+канала: число запросов к брокеру не зависит от числа клиентов.
+Подключение с Last-Event-ID старше уже разосланных событий один раз
+дочитывает пропущенное из брокера само.
+"""
+import asyncio
+import json
+import re
+from collections import Counter
+
+from . import events
+
+POLL_INTERVAL = 1.0
+HEARTBEAT_INTERVAL = 15.0
+CHANNEL_PATTERN = re.compile(
+    r'^/events/(?:(feed)|(group|post)/(\d+))/$')
+EVENT_NAMES = {
+    'new_post': 'new_posts',
+    'new_comment': 'new_comments',
+}
+
+# Очереди подключений, задачи опроса и последний разосланный номер
+# по каналам; всё это живёт в цикле событий процесса.
+_subscribers = {}
+_pollers = {}
+_cursors = {}
+
+
+def channel_for_path(path):
+    match = CHANNEL_PATTERN.match(path)
+    if match is None:
+        return None
+    if match.group(1):
+        return 'feed'
+    return f'{match.group(2)}:{match.group(3)}'
+
+
+def _last_event_id(scope):
+    for name, value in scope.get('headers', ()):
+        if name == b'last-event-id' and value.isdigit():
+            return int(value)
+    return None
+
+
+def format_events(items):
+    """Сворачивает события в сообщения «сколько новых» по типам."""
+    last_id = items[-1][0]
+    counts = Counter(event['type'] for _, event in items)
+    chunks = []
+    for event_type, count in counts.items():
+        name = EVENT_NAMES.get(event_type, event_type)
+        chunks.append(
+            f'id: {last_id}\nevent: {name}\n'
+            f'data: {json.dumps({"count": count})}\n\n'
+        )
+    return ''.join(chunks).encode()
+
+
+async def _wait_disconnect(receive):
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            return
+
+
+async def _lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def _not_found(send):
+    await send({
+        'type': 'http.response.start',
+        'status': 404,
+        'headers': [(b'content-type', b'text/plain; charset=utf-8')],
+    })
+    await send({'type': 'http.response.body', 'body': b'Not found'})
+
+
+async def _poll(channel):
+    loop = asyncio.get_running_loop()
+    broker = events.get_broker()
+    try:
+        while _subscribers.get(channel):
+            items = await loop.run_in_executor(
+                None, broker.since, channel, _cursors[channel])
+            if items:
+                _cursors[channel] = items[-1][0]
+                for queue in _subscribers.get(channel, ()):
+                    queue.put_nowait(items)
+            await asyncio.sleep(POLL_INTERVAL)
+    finally:
+        if _pollers.get(channel) is asyncio.current_task():
+            del _pollers[channel]
+            _cursors.pop(channel, None)
+
+
+def _subscribe(channel, queue, last_id):
+    """Подписывает очередь на канал; True — надо дочитать пропущенное."""
+    _subscribers.setdefault(channel, set()).add(queue)
+    if channel not in _pollers:
+        _cursors[channel] = last_id
+        _pollers[channel] = asyncio.ensure_future(_poll(channel))
+        return False
+    return last_id < _cursors[channel]
+
+
+def _unsubscribe(channel, queue):
+    queues = _subscribers.get(channel, set())
+    queues.discard(queue)
+    if not queues:
+        _subscribers.pop(channel, None)
+
+
+async def _send_events(send, items, last_id):
+    """Отправляет события новее last_id, возвращает новый last_id."""
+    items = [item for item in items if item[0] > last_id]
+    if not items:
+        return last_id
+    await send({'type': 'http.response.body', 'body': format_events(items),
+                'more_body': True})
+    return items[-1][0]
+
+
+async def stream(channel, last_id, receive, send):
+    loop = asyncio.get_running_loop()
+    broker = events.get_broker()
+    if last_id is None:
+        last_id = await loop.run_in_executor(None, broker.last_id, channel)
+    queue = asyncio.Queue()
+    catch_up = _subscribe(channel, queue, last_id)
+    disconnected = asyncio.ensure_future(_wait_disconnect(receive))
+    try:
+        await send({
+            'type': 'http.response.start',
+            'status': 200,
+            'headers': [
+                (b'content-type', b'text/event-stream'),
+                (b'cache-control', b'no-cache'),
+                (b'x-accel-buffering', b'no'),
+            ],
+        })
+        if catch_up:
+            items = await loop.run_in_executor(
+                None, broker.since, channel, last_id)
+            last_id = await _send_events(send, items, last_id)
+        while not disconnected.done():
+            getter = asyncio.ensure_future(queue.get())
+            await asyncio.wait([disconnected, getter],
+                               timeout=HEARTBEAT_INTERVAL,
+                               return_when=asyncio.FIRST_COMPLETED)
+            if getter.done():
+                last_id = await _send_events(send, getter.result(), last_id)
+                continue
+            getter.cancel()
+            if not disconnected.done():
+                await send({'type': 'http.response.body',
+                            'body': b': ping\n\n', 'more_body': True})
+    finally:
+        disconnected.cancel()
+        _unsubscribe(channel, queue)
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        await _lifespan(receive, send)
+        return
+    channel = channel_for_path(scope['path'])
+    if scope['type'] != 'http' or channel is None:
+        await _not_found(send)
+        return
+    await stream(channel, _last_event_id(scope), receive, send)
@@ -0,0 +1,122 @@
+"""Раздача статики и медиа прямо из WSGI, в обход Django.
+
+Для установки на одном сервере без nginx: запросы к STATIC_URL и
+MEDIA_URL обслуживает обёртка StaticFiles, остальные уходят в Django.
+Если клиент принимает br или gzip и рядом с файлом лежит сжатая копия
+(её делает core.staticfiles при collectstatic), отдаётся она. Файлы с
+хешем в имени — статика из манифеста и картинки постов из
+core.storage — кэшируются браузером на год, остальные на час.
+Включается переменной окружения SERVE_STATIC (yatube/wsgi.py).
+"""
+import json
+import mimetypes
+import os
+from wsgiref.util import FileWrapper
+
+from django.conf import settings
+from django.utils.http import http_date, parse_http_date_safe
+
+from .storage import is_content_addressed
+
+CACHE_FOREVER = 'public, max-age=31536000, immutable'
+CACHE_SHORT = 'public, max-age=3600'
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+BLOCK_SIZE = 64 * 1024
+
+
+def load_manifest(root):
+    """Имена с хешем из staticfiles.json или пустое множество."""
+    try:
+        with open(os.path.join(root, 'staticfiles.json')) as manifest:
+            return set(json.load(manifest).get('paths', {}).values())
+    except (OSError, ValueError):
+        return set()
+
+
+class StaticFiles:
+    def __init__(self, application, routes):
+        """routes — тройки (префикс URL, каталог, immutable).
+
+        immutable(name) говорит, можно ли кэшировать файл навсегда.
+        """
+        self.application = application
+        self.routes = [
+            (prefix, os.path.realpath(root), immutable)
+            for prefix, root, immutable in routes
+        ]
+
+    @classmethod
+    def from_settings(cls, application):
+        hashed = load_manifest(settings.STATIC_ROOT)
+        return cls(application, [
+            (settings.STATIC_URL, settings.STATIC_ROOT, hashed.__contains__),
+            (settings.MEDIA_URL, settings.MEDIA_ROOT, is_content_addressed),
+        ])
+
+    def __call__(self, environ, start_response):
+        if environ['REQUEST_METHOD'] in ('GET', 'HEAD'):
+            found = self.find(environ['PATH_INFO'])
+            if found is not None:
+                return self.serve(environ, start_response, *found)
+        return self.application(environ, start_response)
+
+    def find(self, path):
+        for prefix, root, immutable in self.routes:
+            if not path.startswith(prefix):
+                continue
+            name = path[len(prefix):]
+            full_path = os.path.realpath(os.path.join(root, name))
+            if (full_path.startswith(root + os.sep)
+                    and os.path.isfile(full_path)):
+                return full_path, immutable(name)
+        return None
+
+    @staticmethod
+    def choose_encoding(environ, path):
+        accepted = environ.get('HTTP_ACCEPT_ENCODING', '')
+        variants = [(encoding, path + extension)
+                    for encoding, extension in ENCODINGS
+                    if os.path.isfile(path + extension)]
+        for encoding, variant in variants:
+            if encoding in accepted:
+                return encoding, variant, True
+        return None, path, bool(variants)
+
+    def serve(self, environ, start_response, path, immutable):
+        encoding, file_path, has_variants = self.choose_encoding(
+            environ, path)
+        stat = os.stat(file_path)
+        etag = f'"{int(stat.st_mtime):x}-{stat.st_size:x}"'
+        if encoding:
+            etag = f'{etag[:-1]}-{encoding}"'
+        headers = [
+            ('Cache-Control', CACHE_FOREVER if immutable else CACHE_SHORT),
+            ('ETag', etag),
+            ('Last-Modified', http_date(stat.st_mtime)),
+        ]
+        if has_variants:
+            headers.append(('Vary', 'Accept-Encoding'))
+        if self.not_modified(environ, etag, stat.st_mtime):
+            start_response('304 Not Modified', headers)
+            return []
+        content_type = mimetypes.guess_type(path)[0]
+        headers += [
+            ('Content-Type', content_type or 'application/octet-stream'),
+            ('Content-Length', str(stat.st_size)),
+        ]
+        if encoding:
+            headers.append(('Content-Encoding', encoding))
+        start_response('200 OK', headers)
+        if environ['REQUEST_METHOD'] == 'HEAD':
+            return []
+        wrapper = environ.get('wsgi.file_wrapper', FileWrapper)
+        return wrapper(open(file_path, 'rb'), BLOCK_SIZE)
+
+    @staticmethod
+    def not_modified(environ, etag, mtime):
+        if_none_match = environ.get('HTTP_IF_NONE_MATCH')
+        if if_none_match is not None:
+            return etag in if_none_match or if_none_match.strip() == '*'
+        since = parse_http_date_safe(
+            environ.get('HTTP_IF_MODIFIED_SINCE', ''))
+        return since is not None and int(mtime) <= since
@@ -0,0 +1,68 @@
+"""Хранилище статики с хешами в именах и сжатыми копиями.
+
+collectstatic кладёт каждый файл в STATIC_ROOT под именем с хешем
+содержимого (css/custom.3f2a….css) и записывает соответствие в
+staticfiles.json. Для текстовых файлов рядом сохраняются .gz и, если
+установлен пакет brotli, .br — их отдаёт core.static без сжатия на
+лету. Пока collectstatic не запускался (разработка, тесты), {% static %}
+возвращает обычные имена.
+"""
+import gzip
+
+from django.contrib.staticfiles.storage import (
+    ManifestStaticFilesStorage, StaticFilesStorage,
+)
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = (
+    '.css', '.js', '.svg', '.txt', '.html', '.json', '.xml', '.map',
+    '.webmanifest', '.ico',
+)
+MIN_COMPRESS_SIZE = 256
+
+
+def _compressors():
+    yield '.gz', lambda data: gzip.compress(data, compresslevel=9, mtime=0)
+    if brotli is not None:
+        yield '.br', brotli.compress
+
+
+def compress_file(path):
+    """Пишет сжатые копии файла; возвращает список созданных путей."""
+    if not path.endswith(COMPRESSIBLE_EXTENSIONS):
+        return []
+    with open(path, 'rb') as source:
+        data = source.read()
+    if len(data) < MIN_COMPRESS_SIZE:
+        return []
+    written = []
+    for extension, compress in _compressors():
+        compressed = compress(data)
+        if len(compressed) >= len(data):
+            continue
+        with open(path + extension, 'wb') as target:
+            target.write(compressed)
+        written.append(path + extension)
+    return written
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    manifest_strict = False
+
+    def url(self, name, force=False):
+        if not force and not self.hashed_files:
+            return StaticFilesStorage.url(self, name)
+        return super().url(name, force)
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        for name, hashed_name in self.hashed_files.items():
+            for stored in {name, hashed_name}:
+                if self.exists(stored):
+                    compress_file(self.path(stored))
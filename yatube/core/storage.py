@@ -0,0 +1,109 @@
+"""Хранилище файлов с именами по содержимому.
+
+Файл сохраняется под именем SHA-256 своего содержимого и раскладывается
+по вложенным каталогам из первых символов хэша:
+``posts/ab/cd/abcd…ef.jpg``. Одинаковые файлы получают одно имя и
+записываются один раз, а в одном каталоге не скапливаются миллионы
+файлов. Удалять файл можно только когда на него не ссылается ни одна
+запись — это решает вызывающий код через discard.
+
+Между тем, как save нашёл готовый файл, и тем, как вызывающий код
+записал на него ссылку, другой процесс может решить, что файл никому
+не нужен. Поэтому save помечает повторно используемое имя в общем
+кэше на REUSE_TIMEOUT и обновляет время изменения файла, а discard
+сначала убирает файл в сторону, затем проверяет метку и ссылки и
+только после этого удаляет его или возвращает на место.
+"""
+import hashlib
+import os
+import re
+import uuid
+
+from django.core.cache import cache
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+SHARD_DEPTH = 2
+SHARD_WIDTH = 2
+NAME_PATTERN = re.compile(
+    r'^(?:.*/)?(?:[0-9a-f]{%d}/){%d}[0-9a-f]{64}(?:\.\w+)?$'
+    % (SHARD_WIDTH, SHARD_DEPTH)
+)
+REUSE_KEY = 'storage:reused:{}'
+# С запасом больше времени между save и записью ссылки на файл.
+REUSE_TIMEOUT = 60 * 10
+
+
+def content_name(directory, digest, extension):
+    shards = [
+        digest[index * SHARD_WIDTH:(index + 1) * SHARD_WIDTH]
+        for index in range(SHARD_DEPTH)
+    ]
+    return '/'.join(
+        part for part in (directory, *shards, digest + extension) if part)
+
+
+def is_content_addressed(name):
+    return bool(name) and bool(NAME_PATTERN.match(name))
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    def hash_content(self, content):
+        digest = hashlib.sha256()
+        if hasattr(content, 'seek'):
+            content.seek(0)
+        for chunk in content.chunks():
+            digest.update(chunk)
+        if hasattr(content, 'seek'):
+            content.seek(0)
+        return digest.hexdigest()
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        directory = os.path.dirname(name).replace('\\', '/')
+        extension = os.path.splitext(name)[1].lower()
+        name = content_name(
+            directory, self.hash_content(content), extension)
+        if self.exists(name):
+            # Метка ставится до повторной проверки: discard, убравший
+            # файл раньше, чем её увидел, заставит нас записать копию.
+            cache.set(REUSE_KEY.format(name), True, REUSE_TIMEOUT)
+            if self._touch(name):
+                # Такой файл уже есть — повторно не записываем.
+                return name
+        return super().save(name, content, max_length)
+
+    def _touch(self, name):
+        try:
+            os.utime(self.path(name))
+        except FileNotFoundError:
+            return False
+        return True
+
+    def discard(self, name, is_referenced):
+        """Удаляет файл name, если он больше не нужен.
+
+        is_referenced — функция без аргументов, которая проверяет
+        ссылки на файл в базе. Возвращает True, если файл удалён.
+        """
+        if is_referenced():
+            return False
+        path = self.path(name)
+        aside = f'{path}.{uuid.uuid4().hex}.discard'
+        try:
+            os.rename(path, aside)
+        except FileNotFoundError:
+            return False
+        if cache.get(REUSE_KEY.format(name)) or is_referenced():
+            os.replace(aside, path)
+            return False
+        os.remove(aside)
+        return True
+
+
+post_image_storage = ContentAddressedStorage()
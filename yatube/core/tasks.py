@@ -0,0 +1,194 @@
+"""Очередь фоновых задач в базе данных.
+
+Функция регистрируется декоратором @task, представление ставит её в
+очередь через enqueue() и сразу отвечает пользователю. Задачи
+выполняет команда run_worker. Ошибки повторяются с экспоненциальной
+задержкой, после TASK_MAX_ATTEMPTS попыток задача помечается FAILED.
+Задача, которая дольше TASK_VISIBILITY_TIMEOUT остаётся RUNNING без
+отметок прогресса, считается брошенной упавшим воркером и снова
+попадает в очередь. Периодическую задачу (@periodic) следующий раз
+планирует сам воркер — и после успеха, и после окончательной ошибки,
+поэтому упавший запуск не останавливает цепочку.
+"""
+import json
+import logging
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Count, F, Min
+from django.utils import timezone
+
+from .models import Task
+
+logger = logging.getLogger(__name__)
+
+_registry = {}
+_periodic = {}
+_current = threading.local()
+
+
+def task(func):
+    """Регистрирует функцию как фоновую задачу."""
+    _registry[f'{func.__module__}.{func.__name__}'] = func
+    func.task_name = f'{func.__module__}.{func.__name__}'
+    return func
+
+
+def periodic(interval_setting):
+    """Регистрирует периодическую задачу с интервалом из настроек.
+
+    interval_setting — имя настройки с интервалом в секундах. Первый
+    запуск планирует schedule(), следующие — воркер после завершения.
+    """
+    def decorator(func):
+        task(func)
+        _periodic[func.task_name] = interval_setting
+        return func
+    return decorator
+
+
+def enqueue(func, **kwargs):
+    """Ставит задачу в очередь; в режиме TASKS_EAGER выполняет сразу."""
+    if getattr(settings, 'TASKS_EAGER', False):
+        func(**kwargs)
+        return None
+    return Task.objects.create(
+        name=func.task_name,
+        payload=json.dumps(kwargs),
+    )
+
+
+def schedule(func, delay, **kwargs):
+    """Ставит периодическую задачу на запуск через delay секунд.
+
+    Если такая задача уже ждёт своей очереди, новая не создаётся.
+    """
+    name = func.task_name
+    if Task.objects.filter(name=name, status=Task.PENDING).exists():
+        return None
+    return Task.objects.create(
+        name=name,
+        payload=json.dumps(kwargs),
+        run_at=timezone.now() + timedelta(seconds=delay),
+    )
+
+
+def _reschedule(name):
+    interval_setting = _periodic.get(name)
+    if interval_setting is not None:
+        schedule(_registry[name], getattr(settings, interval_setting))
+
+
+def report_progress(done, total):
+    """Сохраняет прогресс текущей задачи; вне воркера ничего не делает.
+
+    Заодно продлевает время, которое задача может оставаться RUNNING.
+    """
+    task_id = getattr(_current, 'task_id', None)
+    if task_id is not None:
+        Task.objects.filter(pk=task_id).update(
+            progress=done, total=total, claimed=timezone.now())
+
+
+def _retry_delay(attempts):
+    base = getattr(settings, 'TASK_RETRY_DELAY', 10)
+    return timedelta(seconds=base * 2 ** (attempts - 1))
+
+
+def _claim(task_id):
+    return Task.objects.filter(pk=task_id, status=Task.PENDING).update(
+        status=Task.RUNNING, claimed=timezone.now()) == 1
+
+
+def requeue_stale():
+    """Возвращает в очередь задачи упавших воркеров, возвращает их число.
+
+    Брошенная задача засчитывается как попытка, чтобы задача, которая
+    каждый раз роняет воркер, в итоге стала FAILED.
+    """
+    now = timezone.now()
+    timeout = getattr(settings, 'TASK_VISIBILITY_TIMEOUT', 60 * 30)
+    max_attempts = getattr(settings, 'TASK_MAX_ATTEMPTS', 3)
+    stale = Task.objects.filter(
+        status=Task.RUNNING, claimed__lt=now - timedelta(seconds=timeout))
+    error = 'Воркер не завершил задачу за TASK_VISIBILITY_TIMEOUT'
+    exhausted = stale.filter(attempts__gte=max_attempts - 1)
+    names = set(exhausted.filter(name__in=_periodic).values_list(
+        'name', flat=True))
+    failed = exhausted.update(
+        status=Task.FAILED, attempts=F('attempts') + 1, finished=now,
+        last_error=error)
+    requeued = stale.update(
+        status=Task.PENDING, attempts=F('attempts') + 1, run_at=now,
+        last_error=error)
+    for name in names:
+        _reschedule(name)
+    return failed + requeued
+
+
+def execute(task_obj):
+    """Выполняет одну задачу, записывает результат или планирует повтор."""
+    attempts = task_obj.attempts + 1
+    started = time.monotonic()
+    _current.task_id = task_obj.pk
+    try:
+        _registry[task_obj.name](**json.loads(task_obj.payload))
+    except Exception as error:
+        max_attempts = getattr(settings, 'TASK_MAX_ATTEMPTS', 3)
+        logger.exception('Задача %s завершилась ошибкой', task_obj.name)
+        if attempts < max_attempts:
+            fields = {
+                'status': Task.PENDING,
+                'run_at': timezone.now() + _retry_delay(attempts),
+            }
+        else:
+            fields = {'status': Task.FAILED, 'finished': timezone.now()}
+        Task.objects.filter(pk=task_obj.pk).update(
+            attempts=attempts, last_error=repr(error), **fields)
+        if fields['status'] == Task.FAILED:
+            _reschedule(task_obj.name)
+        return False
+    finally:
+        _current.task_id = None
+    Task.objects.filter(pk=task_obj.pk).update(
+        attempts=attempts, status=Task.DONE, finished=timezone.now())
+    _reschedule(task_obj.name)
+    logger.info('Задача %s выполнена за %.3f с',
+                task_obj.name, time.monotonic() - started)
+    return True
+
+
+def claim_batch(limit):
+    """Забирает до limit готовых задач; задачу получает один воркер."""
+    requeue_stale()
+    candidates = Task.objects.filter(
+        status=Task.PENDING, run_at__lte=timezone.now(),
+    ).values_list('pk', flat=True)[:limit]
+    return list(Task.objects.filter(
+        pk__in=[pk for pk in candidates if _claim(pk)]))
+
+
+def run_pending(limit=100):
+    """Выполняет готовые задачи в текущем потоке, возвращает их число."""
+    batch = claim_batch(limit)
+    for task_obj in batch:
+        execute(task_obj)
+    return len(batch)
+
+
+def stats():
+    """Метрики очереди: число задач по статусам и возраст старейшей."""
+    counts = dict(
+        Task.objects.values_list('status').annotate(total=Count('pk'))
+    )
+    oldest = Task.objects.filter(status=Task.PENDING).aggregate(
+        oldest=Min('created'))['oldest']
+    return {
+        'counts': {status: counts.get(status, 0)
+                   for status, _ in Task.STATUS_CHOICES},
+        'oldest_pending_seconds': (
+            (timezone.now() - oldest).total_seconds() if oldest else 0
+        ),
+    }
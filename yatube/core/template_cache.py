@@ -0,0 +1,48 @@
+"""Предварительная компиляция шаблонов.
+
+Шаблоны загружает cached.Loader (см. TEMPLATE_LOADERS в настройках):
+скомпилированный шаблон хранится в памяти процесса. warm_templates()
+компилирует все шаблоны проекта заранее, чтобы первый запрос после
+перезапуска воркера не разбирал цепочку наследования base.html. Если
+вызвать его до fork (gunicorn --preload, см. core.warmup), все
+воркеры получают уже скомпилированные шаблоны из общей памяти.
+"""
+import os
+import time
+
+from django.template import engines
+
+
+def get_engine():
+    return engines['django'].engine
+
+
+def template_names(dirs=None):
+    """Имена всех .html-шаблонов в каталогах DIRS, по алфавиту."""
+    names = []
+    for directory in dirs or get_engine().dirs:
+        for root, _, files in os.walk(directory):
+            for filename in files:
+                if filename.endswith('.html'):
+                    path = os.path.join(root, filename)
+                    names.append(os.path.relpath(path, directory).replace(
+                        os.sep, '/'))
+    return sorted(set(names))
+
+
+def reset():
+    """Очищает кэш скомпилированных шаблонов."""
+    for loader in get_engine().template_loaders:
+        if hasattr(loader, 'reset'):
+            loader.reset()
+
+
+def warm_templates(names=None):
+    """Компилирует шаблоны, возвращает {имя: секунды компиляции}."""
+    engine = get_engine()
+    timings = {}
+    for name in names or template_names():
+        started = time.perf_counter()
+        engine.get_template(name)
+        timings[name] = time.perf_counter() - started
+    return timings
@@ -1,4 +1,55 @@
-from django.test import TestCase
+import asyncio
+import os
+import shutil
+import socketserver
+import tempfile
+import threading
+from datetime import datetime, timedelta
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.models import Session
+from django.core import mail as django_mail
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.cache.utils import make_template_fragment_key
+from django.core.management import call_command
+from django.db import connection
+from django.test import (RequestFactory, TestCase, TransactionTestCase,
+                         override_settings)
+from django.utils import timezone
+
+from django.core.wsgi import get_wsgi_application
+
+from . import (events, mail, ratelimit, sse, tasks, template_cache,
+               warmup)
+from .asgi import WsgiToAsgi
+from .context_processors import year
+from .management.commands.warmup import parse_importtime
+from .static import CACHE_FOREVER, CACHE_SHORT, StaticFiles
+from .staticfiles import compress_file
+from .storage import (REUSE_KEY, ContentAddressedStorage,
+                      is_content_addressed)
+from .models import QueuedEmail, Task
+
+calls = []
+
+
+@tasks.task
+def remember(value):
+    calls.append(value)
+
+
+@tasks.task
+def always_fails():
+    raise ValueError('Ошибка')
+
+
+@tasks.periodic('TEST_TASK_INTERVAL')
+def periodic_fails():
+    raise ValueError('Ошибка')
 
 
 class ViewTestClass(TestCase):
@@ -6,3 +57,629 @@ class ViewTestClass(TestCase):
         response = self.client.get('/nonexist-page/')
         self.assertEqual(response.status_code, 404)
         self.assertTemplateUsed(response, 'core/404.html')
+
+
+class TaskQueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_enqueue_and_run(self):
+        """Задача из очереди выполняется воркером один раз."""
+        tasks.enqueue(remember, value=1)
+        self.assertEqual(calls, [])
+        call_command('run_worker', '--once', '--threads', '1',
+                     stdout=StringIO())
+        self.assertEqual(calls, [1])
+        self.assertEqual(Task.objects.get().status, Task.DONE)
+        self.assertEqual(tasks.run_pending(), 0)
+
+    @override_settings(TASKS_EAGER=True)
+    def test_eager_mode(self):
+        self.assertIsNone(tasks.enqueue(remember, value=2))
+        self.assertEqual(calls, [2])
+
+    @override_settings(TASK_MAX_ATTEMPTS=2, TASK_RETRY_DELAY=60)
+    def test_retry_with_backoff(self):
+        """Упавшая задача повторяется позже, затем помечается FAILED."""
+        task_obj = tasks.enqueue(always_fails)
+        tasks.run_pending()
+        task_obj.refresh_from_db()
+        self.assertEqual(task_obj.status, Task.PENDING)
+        self.assertEqual(task_obj.attempts, 1)
+        self.assertGreater(task_obj.run_at, timezone.now())
+        self.assertEqual(tasks.run_pending(), 0)
+
+        Task.objects.update(run_at=timezone.now())
+        tasks.run_pending()
+        task_obj.refresh_from_db()
+        self.assertEqual(task_obj.status, Task.FAILED)
+        self.assertIn('Ошибка', task_obj.last_error)
+        self.assertEqual(tasks.stats()['counts'][Task.FAILED], 1)
+
+    @override_settings(TASK_MAX_ATTEMPTS=1, TEST_TASK_INTERVAL=60,
+                       TASK_VISIBILITY_TIMEOUT=60)
+    def test_failed_periodic_task_rescheduled(self):
+        """Окончательно упавшая периодическая задача не рвёт цепочку."""
+        tasks.schedule(periodic_fails, 0)
+        tasks.run_pending()
+        failed, following = Task.objects.order_by('pk')
+        self.assertEqual(failed.status, Task.FAILED)
+        self.assertEqual(following.status, Task.PENDING)
+        self.assertGreater(following.run_at, timezone.now())
+
+        Task.objects.filter(pk=following.pk).update(
+            status=Task.RUNNING,
+            claimed=timezone.now() - timedelta(minutes=2))
+        tasks.requeue_stale()
+        self.assertEqual(Task.objects.filter(
+            name=periodic_fails.task_name, status=Task.PENDING).count(), 1)
+
+    @override_settings(TASK_VISIBILITY_TIMEOUT=60, TASK_MAX_ATTEMPTS=2)
+    def test_stale_running_task_requeued(self):
+        """Задача упавшего воркера возвращается в очередь, затем FAILED."""
+        task_obj = tasks.enqueue(remember, value=3)
+        self.assertEqual(len(tasks.claim_batch(10)), 1)
+        self.assertEqual(tasks.claim_batch(10), [])
+        Task.objects.update(claimed=timezone.now() - timedelta(minutes=2))
+        self.assertEqual(len(tasks.claim_batch(10)), 1)
+        task_obj.refresh_from_db()
+        self.assertEqual(task_obj.status, Task.RUNNING)
+        self.assertEqual(task_obj.attempts, 1)
+
+        Task.objects.update(claimed=timezone.now() - timedelta(minutes=2))
+        self.assertEqual(tasks.requeue_stale(), 1)
+        task_obj.refresh_from_db()
+        self.assertEqual(task_obj.status, Task.FAILED)
+
+
+class SMTPStubHandler(socketserver.StreamRequestHandler):
+    """Минимальный SMTP-сервер: принимает письма и запоминает их."""
+
+    def reply(self, line):
+        self.wfile.write(f'{line}\r\n'.encode())
+
+    def handle(self):
+        self.server.connections += 1
+        self.reply('220 localhost')
+        for raw in self.rfile:
+            command = raw.decode().strip().upper()
+            if command.startswith('DATA'):
+                self.reply('354 End data with <CR><LF>.<CR><LF>')
+                lines = []
+                for data in self.rfile:
+                    if data == b'.\r\n':
+                        break
+                    lines.append(data)
+                self.server.messages.append(b''.join(lines))
+                self.reply('250 OK')
+            elif command.startswith('QUIT'):
+                self.reply('221 Bye')
+                return
+            else:
+                self.reply('250 OK')
+
+
+class SMTPStub(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), SMTPStubHandler)
+        self.connections = 0
+        self.messages = []
+
+
+class QueuedEmailTests(TestCase):
+    def setUp(self):
+        self.smtp = SMTPStub()
+        threading.Thread(target=self.smtp.serve_forever, daemon=True).start()
+        self.addCleanup(self.smtp.server_close)
+        self.addCleanup(self.smtp.shutdown)
+        self.settings = override_settings(
+            EMAIL_BACKEND='core.mail.QueuedEmailBackend',
+            EMAIL_DELIVERY_BACKEND=(
+                'django.core.mail.backends.smtp.EmailBackend'),
+            EMAIL_HOST='127.0.0.1',
+            EMAIL_PORT=self.smtp.server_address[1],
+            EMAIL_BATCH_SIZE=2,
+        )
+        self.settings.enable()
+        self.addCleanup(self.settings.disable)
+
+    def test_messages_are_queued_not_sent(self):
+        """Письмо ставится в очередь, SMTP в запросе не вызывается."""
+        django_mail.send_mail('Тема', 'Текст', 'from@yatube.ru',
+                              ['to@yatube.ru'])
+        self.assertEqual(mail.queue_depth(), 1)
+        self.assertEqual(self.smtp.connections, 0)
+        self.assertTrue(
+            Task.objects.filter(name='core.mail.flush_email_queue').exists()
+        )
+        django_mail.send_mail('Тема', 'Текст', 'from@yatube.ru',
+                              ['to@yatube.ru'])
+        self.assertEqual(
+            Task.objects.filter(name='core.mail.flush_email_queue').count(),
+            1)
+
+    def test_flush_uses_single_connection(self):
+        """Все письма отправляются пачками через одно соединение."""
+        for number in range(5):
+            django_mail.send_mail(f'Тема {number}', 'Текст',
+                                  'from@yatube.ru', ['to@yatube.ru'])
+        mail.flush_email_queue()
+        self.assertEqual(len(self.smtp.messages), 5)
+        self.assertEqual(self.smtp.connections, 1)
+        self.assertEqual(mail.queue_depth(), 0)
+
+    def test_claimed_messages_sent_once(self):
+        """Письмо, взятое другой задачей, не отправляется повторно."""
+        for number in range(3):
+            django_mail.send_mail(f'Тема {number}', 'Текст',
+                                  'from@yatube.ru', ['to@yatube.ru'])
+        first, second, third = QueuedEmail.objects.order_by('pk')
+        QueuedEmail.objects.filter(pk=first.pk).update(
+            claimed=timezone.now())
+        QueuedEmail.objects.filter(pk=second.pk).update(
+            claimed=timezone.now() - timedelta(days=1))
+        mail.flush_email_queue()
+        self.assertEqual(len(self.smtp.messages), 2)
+        mail.flush_email_queue()
+        self.assertEqual(len(self.smtp.messages), 2)
+        self.assertEqual(mail.queue_depth(), 1)
+
+    def test_password_reset_is_queued(self):
+        get_user_model().objects.create_user(
+            username='system', email='system@yatube.ru', password='pass')
+        self.client.post('/auth/password_reset/',
+                         {'email': 'system@yatube.ru'})
+        self.assertEqual(QueuedEmail.objects.count(), 1)
+        mail.flush_email_queue()
+        self.assertEqual(len(self.smtp.messages), 1)
+
+
+class EventsTests(TransactionTestCase):
+    # Поток читает брокер из пула потоков, а SQLite не даёт другому
+    # соединению читать таблицу кэша, пока открыта транзакция теста.
+    def setUp(self):
+        cache.clear()
+
+    def test_brokers_return_events_since_id(self):
+        for broker in (events.LocalBroker(), events.CacheBroker()):
+            with self.subTest(broker=type(broker).__name__):
+                first = broker.publish('feed', {'type': 'new_post'})
+                second = broker.publish('feed', {'type': 'new_post'})
+                self.assertEqual(broker.last_id('feed'), second)
+                self.assertEqual(
+                    broker.since('feed', first),
+                    [(second, {'type': 'new_post'})],
+                )
+                self.assertEqual(broker.since('post:1', 0), [])
+
+    def test_cache_broker_with_lagging_sequence(self):
+        """Отставшая подсказка номера не теряет и не затирает события."""
+        broker = events.CacheBroker()
+        sequence_key = broker.SEQUENCE_KEY.format('feed')
+        first = broker.publish('feed', {'type': 'new_post'})
+        cache.set(sequence_key, 0)
+        second = broker.publish('feed', {'type': 'new_comment'})
+        self.assertEqual(second, first + 1)
+        cache.set(sequence_key, first)
+        self.assertEqual(broker.since('feed', first),
+                         [(second, {'type': 'new_comment'})])
+
+    def test_stream_sends_new_posts_count(self):
+        """Поток отправляет количество новых постов с Last-Event-ID."""
+        events.publish('feed', 'new_post')
+        events.publish('feed', 'new_post')
+        sent = []
+
+        async def receive():
+            await asyncio.sleep(0.1)
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            sent.append(message)
+
+        scope = {
+            'type': 'http',
+            'path': '/events/feed/',
+            'headers': [(b'last-event-id', b'0')],
+        }
+        asyncio.run(sse.application(scope, receive, send))
+        self.assertEqual(sent[0]['status'], 200)
+        self.assertIn(b'event: new_posts', sent[1]['body'])
+        self.assertIn(b'"count": 2', sent[1]['body'])
+
+    def test_one_poll_for_all_connections(self):
+        """Подключения канала делят один опрос брокера."""
+        broker = events.LocalBroker()
+        broker.publish('feed', {'type': 'new_post'})
+        sent = []
+
+        async def receive():
+            await asyncio.sleep(0.1)
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            sent.append(message)
+
+        scope = {
+            'type': 'http',
+            'path': '/events/feed/',
+            'headers': [(b'last-event-id', b'0')],
+        }
+
+        async def connect(count):
+            await asyncio.gather(*(
+                sse.application(scope, receive, send)
+                for _ in range(count)))
+
+        with mock.patch.object(events, 'get_broker', return_value=broker), \
+                mock.patch.object(broker, 'since',
+                                  wraps=broker.since) as since:
+            asyncio.run(connect(3))
+        self.assertEqual(since.call_count, 1)
+        bodies = [message['body'] for message in sent
+                  if message.get('body', b'').startswith(b'id:')]
+        self.assertEqual(len(bodies), 3)
+
+    def test_unknown_channel(self):
+        self.assertIsNone(sse.channel_for_path('/events/user/1/'))
+        self.assertEqual(sse.channel_for_path('/events/group/3/'), 'group:3')
+
+
+class WsgiToAsgiTests(TestCase):
+    def test_django_page_served_through_asgi(self):
+        """ASGI-адаптер отдаёт страницу Django целиком."""
+        adapter = WsgiToAsgi(get_wsgi_application(), max_workers=1)
+        self.addCleanup(adapter.executor.shutdown)
+        sent = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': b''}
+
+        async def send(message):
+            sent.append(message)
+
+        scope = {
+            'type': 'http',
+            'method': 'GET',
+            'path': '/about/author/',
+            'query_string': b'',
+            'headers': [(b'host', b'localhost')],
+        }
+        asyncio.run(adapter(scope, receive, send))
+        self.assertEqual(sent[0]['status'], 200)
+        self.assertIn('Об авторе'.encode(), sent[1]['body'])
+
+    def test_request_and_response_streamed(self):
+        """Тело запроса дочитывается до вызова приложения, ответ уходит
+           частями."""
+        payload = os.urandom(200 * 1024)
+        messages = [
+            {'type': 'http.request', 'body': payload[start:start + 50000],
+             'more_body': start + 50000 < len(payload)}
+            for start in range(0, len(payload), 50000)
+        ]
+
+        def echo(environ, start_response):
+            body = environ['wsgi.input'].read(
+                int(environ['CONTENT_LENGTH']))
+            start_response('200 OK', [('Content-Type', 'text/plain')])
+            return (body[start:start + 1000]
+                    for start in range(0, len(body), 1000))
+
+        adapter = WsgiToAsgi(echo, max_workers=1)
+        self.addCleanup(adapter.executor.shutdown)
+        sent = []
+
+        async def receive():
+            return messages.pop(0)
+
+        async def send(message):
+            sent.append(message)
+
+        scope = {
+            'type': 'http',
+            'method': 'POST',
+            'path': '/echo/',
+            'headers': [(b'content-length', str(len(payload)).encode())],
+        }
+        asyncio.run(adapter(scope, receive, send))
+        chunks = [message['body'] for message in sent[1:]]
+        self.assertEqual(b''.join(chunks), payload)
+        self.assertGreater(len(chunks), 3)
+        self.assertTrue(all(len(chunk) <= 65 * 1024 for chunk in chunks))
+        self.assertFalse(sent[-1].get('more_body', False))
+
+    def test_large_body_rejected_without_thread(self):
+        """Слишком большое тело отклоняется до вызова приложения."""
+        application = mock.Mock()
+        adapter = WsgiToAsgi(application, max_workers=1)
+        self.addCleanup(adapter.executor.shutdown)
+        messages = [{'type': 'http.request', 'body': b'x' * 600,
+                     'more_body': True}] * 2
+        sent = []
+
+        async def receive():
+            return messages.pop(0)
+
+        async def send(message):
+            sent.append(message)
+
+        scope = {'type': 'http', 'method': 'POST', 'path': '/', 'headers': []}
+        with mock.patch('core.asgi.MAX_BODY_SIZE', 1000):
+            asyncio.run(adapter(scope, receive, send))
+        self.assertEqual(sent[0]['status'], 413)
+        application.assert_not_called()
+
+
+class ContentAddressedStorageTests(TestCase):
+    def setUp(self):
+        location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, location, ignore_errors=True)
+        self.storage = ContentAddressedStorage(location=location)
+
+    def test_same_content_stored_once(self):
+        """Одинаковое содержимое получает одно имя в шард-каталогах."""
+        first = self.storage.save('posts/a.JPG', ContentFile(b'data'))
+        second = self.storage.save('posts/b.jpg', ContentFile(b'data'))
+        self.assertEqual(first, second)
+        self.assertTrue(is_content_addressed(first))
+        directory, _, filename = first.rpartition('/')
+        self.assertEqual(directory, f'posts/{filename[:2]}/{filename[2:4]}')
+        self.assertTrue(filename.endswith('.jpg'))
+        self.assertNotEqual(
+            self.storage.save('posts/a.jpg', ContentFile(b'other')), first)
+
+    def test_discard_keeps_reused_file(self):
+        """discard не удаляет файл, который только что взяли повторно."""
+        name = self.storage.save('posts/a.jpg', ContentFile(b'data'))
+        self.addCleanup(cache.delete, REUSE_KEY.format(name))
+        self.assertFalse(self.storage.discard(name, lambda: True))
+        self.assertEqual(
+            self.storage.save('posts/b.jpg', ContentFile(b'data')), name)
+        self.assertFalse(self.storage.discard(name, lambda: False))
+        self.assertTrue(self.storage.exists(name))
+        cache.delete(REUSE_KEY.format(name))
+        self.assertTrue(self.storage.discard(name, lambda: False))
+        self.assertEqual(os.listdir(os.path.dirname(
+            self.storage.path(name))), [])
+
+
+class StaticFilesTests(TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        os.makedirs(os.path.join(self.root, 'css'))
+        for name in ('css/site.css', 'css/site.0123abcd.css'):
+            with open(os.path.join(self.root, name), 'w') as css:
+                css.write('body { margin: 0; }\n' * 50)
+            compress_file(os.path.join(self.root, name))
+        self.app = StaticFiles(self.fallback, [
+            ('/static/', self.root, lambda name: '.0123abcd.' in name),
+        ])
+
+    @staticmethod
+    def fallback(environ, start_response):
+        start_response('404 Not Found', [])
+        return [b'django']
+
+    def request(self, path, **headers):
+        response = {}
+
+        def start_response(status, response_headers, exc_info=None):
+            response['status'] = int(status.split()[0])
+            response['headers'] = dict(response_headers)
+
+        environ = {'REQUEST_METHOD': 'GET', 'PATH_INFO': path, **headers}
+        body = b''.join(self.app(environ, start_response))
+        return response['status'], response['headers'], body
+
+    def test_compressed_variant_with_far_future_cache(self):
+        """Сжатая копия отдаётся клиенту, принимающему gzip."""
+        status, headers, body = self.request(
+            '/static/css/site.0123abcd.css',
+            HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(status, 200)
+        self.assertEqual(headers['Content-Encoding'], 'gzip')
+        self.assertEqual(headers['Cache-Control'], CACHE_FOREVER)
+        self.assertEqual(headers['Vary'], 'Accept-Encoding')
+        self.assertEqual(int(headers['Content-Length']), len(body))
+
+    def test_plain_file_and_not_modified(self):
+        """Без хеша в имени кэш короткий; повтор по ETag даёт 304."""
+        status, headers, _ = self.request('/static/css/site.css')
+        self.assertEqual(status, 200)
+        self.assertNotIn('Content-Encoding', headers)
+        self.assertEqual(headers['Cache-Control'], CACHE_SHORT)
+        status, _, body = self.request(
+            '/static/css/site.css', HTTP_IF_NONE_MATCH=headers['ETag'])
+        self.assertEqual(status, 304)
+        self.assertEqual(body, b'')
+
+    def test_unknown_paths_go_to_django(self):
+        """Чужие и выходящие за каталог пути обрабатывает Django."""
+        for path in ('/static/../etc/passwd', '/static/missing.css',
+                     '/about/author/'):
+            with self.subTest(path=path):
+                self.assertEqual(self.request(path)[2], b'django')
+
+
+class TemplateCacheTests(TestCase):
+    def test_all_project_templates_compiled_once(self):
+        """Все шаблоны проекта компилируются и берутся из кэша."""
+        template_cache.reset()
+        timings = template_cache.warm_templates()
+        self.assertIn('base.html', timings)
+        self.assertIn('posts/includes/paginator.html', timings)
+        engine = template_cache.get_engine()
+        self.assertIs(engine.get_template('base.html'),
+                      engine.get_template('base.html'))
+
+    def test_compile_command(self):
+        out = StringIO()
+        call_command('compile_templates', bench=1, stdout=out)
+        self.assertIn('posts/index.html', out.getvalue())
+
+
+class WarmupTests(TestCase):
+    def test_warmup_requests_pages(self):
+        """Прогрев проходит все шаги и открывает главные страницы."""
+        report = {name: result for name, result, _ in warmup.warmup()}
+        self.assertEqual(
+            list(report),
+            ['urls', 'templates', 'database', 'thumbnails', 'caches',
+             'pages'])
+        self.assertEqual(set(report['pages'].values()), {200})
+
+    def test_parse_importtime(self):
+        output = (
+            'import time: self [us] | cumulative | imported package\n'
+            'import time:       120 |        450 |   django.urls\n'
+        )
+        self.assertEqual(parse_importtime(output),
+                         [('django.urls', 120, 450)])
+
+
+class HeaderTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            username='header_user')
+        self.client.force_login(self.user)
+
+    def test_navigation_cached_per_page_and_auth_state(self):
+        """Навигация кэшируется, а имя пользователя выводится вне кэша."""
+        response = self.client.get('/about/author/')
+        self.assertContains(response, 'Пользователь: header_user')
+        self.assertNotContains(response, 'Регистрация')
+        key = make_template_fragment_key(
+            'header_nav', ['about:author', True])
+        self.assertIn('Новая запись', cache.get(key))
+        self.assertNotIn('header_user', cache.get(key))
+        self.client.logout()
+        response = self.client.get('/about/author/')
+        self.assertContains(response, 'Регистрация')
+        self.assertNotContains(response, 'header_user')
+
+    def test_year_computed_once(self):
+        """Год не пересчитывается до наступления следующего года."""
+        self.addCleanup(setattr, year, '_next_year_at', 0)
+        self.assertEqual(year.current_year(), datetime.now().year)
+        year._year = 1999
+        self.assertEqual(year.year(None), {'year': 1999})
+
+
+class RateLimitTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_sliding_window(self):
+        """Запросы прошлого окна учитываются пропорционально времени."""
+        for _ in range(4):
+            self.assertTrue(ratelimit.hit('test', 'a', '4/m', now=30).allowed)
+        denied = ratelimit.hit('test', 'a', '4/m', now=59)
+        self.assertFalse(denied.allowed)
+        self.assertEqual(denied.retry_after, 1)
+        # В начале следующего окна прошлые 5 запросов ещё почти целиком
+        # занимают лимит.
+        self.assertFalse(ratelimit.hit('test', 'a', '4/m', now=61).allowed)
+        result = ratelimit.hit('test', 'a', '4/m', now=110)
+        self.assertTrue(result.allowed)
+        self.assertEqual(result.remaining, 1)
+
+    @override_settings(RATE_LIMITS={
+        'post_create': {'user': '2/m', 'ip': '100/m'},
+        'signup': {'ip': '1/h'},
+    })
+    def test_views_limited_per_user_and_ip(self):
+        user = get_user_model().objects.create_user(username='spammer')
+        self.client.force_login(user)
+        url = '/create/'
+        for remaining in (1, 0):
+            response = self.client.post(url, {'text': 'Спам'})
+            self.assertEqual(response['X-RateLimit-Remaining'],
+                             str(remaining))
+        response = self.client.post(url, {'text': 'Спам'})
+        self.assertEqual(response.status_code, 429)
+        self.assertGreater(int(response['Retry-After']), 0)
+        self.assertEqual(self.client.get(url).status_code, 200)
+        self.client.logout()
+        self.client.post('/auth/signup/', {})
+        self.assertEqual(
+            self.client.post('/auth/signup/', {}).status_code, 429)
+
+    def test_client_ip_behind_trusted_proxy(self):
+        """X-Forwarded-For читается только от доверенных прокси."""
+        request = RequestFactory().post(
+            '/', REMOTE_ADDR='10.0.0.2',
+            HTTP_X_FORWARDED_FOR='6.6.6.6, 203.0.113.7, 10.0.0.1')
+        self.assertEqual(ratelimit.client_ip(request), '10.0.0.2')
+        with override_settings(RATELIMIT_TRUSTED_PROXIES=['10.0.0.0/8']):
+            self.assertEqual(ratelimit.client_ip(request), '203.0.113.7')
+            request.META['REMOTE_ADDR'] = '198.51.100.1'
+            self.assertEqual(ratelimit.client_ip(request), '198.51.100.1')
+
+    @override_settings(CACHES={'default': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'ratelimit_test_cache',
+    }})
+    def test_long_window_outlives_default_timeout(self):
+        """Счётчик суточного окна не истекает по таймауту кэша."""
+        call_command('createcachetable', stdout=StringIO())
+        for _ in range(3):
+            ratelimit.hit('test', 'b', '1/d', now=10)
+        key = cache.make_key(ratelimit.KEY.format('test', 'b', 0))
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT expires FROM {settings.CACHES["default"]["LOCATION"]}'
+                ' WHERE cache_key = %s', [key])
+            expires = cursor.fetchone()[0]
+        if isinstance(expires, str):
+            expires = datetime.fromisoformat(expires)
+        self.assertGreater(
+            expires, datetime.utcnow() + timedelta(days=1, hours=23))
+
+
+class SessionCommandsTests(TestCase):
+    def test_purge_expired_sessions_in_batches(self):
+        now = timezone.now()
+        for number in range(5):
+            Session.objects.create(
+                session_key=f'expired{number}', session_data='',
+                expire_date=now - timedelta(days=1))
+        Session.objects.create(session_key='alive', session_data='',
+                               expire_date=now + timedelta(days=1))
+        out = StringIO()
+        with override_settings(
+                SESSION_ENGINE='django.contrib.sessions.backends.db'):
+            call_command('purge_sessions', batch_size=2, stdout=out)
+        self.assertIn('5', out.getvalue())
+        self.assertEqual(
+            list(Session.objects.values_list('session_key', flat=True)),
+            ['alive'])
+
+    def test_bench_sessions(self):
+        """Сессии в подписанных cookie не обращаются к django_session."""
+        out = StringIO()
+        call_command('bench_sessions', requests=3,
+                     backend=['db', 'signed_cookies'], stdout=out)
+        lines = out.getvalue().splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertTrue(lines[1].startswith('signed_cookies'))
+        self.assertIn('django_session: 0.00', lines[1])
+        self.assertNotIn('django_session: 0.00', lines[0])
+
+
+class LoginBenchTests(TestCase):
+    def test_bench_login(self):
+        out = StringIO()
+        call_command('bench_login', requests=2, hasher=['scrypt', 'pbkdf2'],
+                     stdout=out)
+        lines = out.getvalue().splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertTrue(lines[0].startswith('scrypt'))
+        self.assertIn('входов/с', lines[1])
+        self.assertFalse(
+            get_user_model().objects.filter(username='bench_login').exists())
@@ -13,5 +13,9 @@ def permission_denied(request, exception):
     return render(request, 'core/403.html', status=403)
 
 
+def too_many_requests(request):
+    return render(request, 'core/429.html', status=429)
+
+
 def csrf_failure(request, reason=''):
     return render(request, 'core/403csrf.html')
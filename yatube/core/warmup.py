@@ -0,0 +1,116 @@
+"""Прогрев воркера до приёма запросов.
+
+После перезапуска первый запрос к каждой странице строит резолвер URL,
+импортирует представления, разбирает шаблоны, создаёт хранилище
+ключей sorl-thumbnail и открывает соединение с базой. warmup()
+делает всё это заранее и прогоняет через приложение запросы к
+WARMUP_URLS, чтобы заполнить горячие ключи кэша. Вызывается командой
+warmup и из yatube/wsgi.py при переменной окружения WARMUP.
+"""
+import logging
+import time
+from io import BytesIO
+
+from django.conf import settings
+from django.core.wsgi import get_wsgi_application
+from django.db import connections
+from django.urls import get_resolver, reverse
+from sorl.thumbnail import default as thumbnail_default
+
+from posts import group_stats
+
+from .template_cache import warm_templates
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_URLS = ('posts:index', 'posts:group_index', 'posts:trending')
+
+
+def load_urls():
+    # reverse_dict строится при первом обращении и импортирует все
+    # представления из URLconf.
+    resolver = get_resolver()
+    return len(resolver.reverse_dict)
+
+
+def open_connections():
+    for connection in connections.all():
+        connection.ensure_connection()
+    return len(connections.all())
+
+
+def load_thumbnail_backend():
+    # Объекты sorl-thumbnail создаются лениво при первом обращении.
+    thumbnail_default.backend, thumbnail_default.engine
+    return type(thumbnail_default.kvstore).__name__
+
+
+def prime_caches():
+    return len(group_stats.group_directory())
+
+
+def _host():
+    for host in settings.ALLOWED_HOSTS:
+        if host and host != '*' and not host.startswith('.'):
+            return host
+    return 'localhost'
+
+
+def request(application, path):
+    """Выполняет GET-запрос к WSGI-приложению, возвращает статус."""
+    statuses = []
+
+    def start_response(status, headers, exc_info=None):
+        statuses.append(int(status.split(' ', 1)[0]))
+
+    environ = {
+        'REQUEST_METHOD': 'GET',
+        'PATH_INFO': path,
+        'QUERY_STRING': '',
+        'SERVER_NAME': _host(),
+        'SERVER_PORT': '80',
+        'HTTP_HOST': _host(),
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'REMOTE_ADDR': '127.0.0.1',
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': 'http',
+        'wsgi.input': BytesIO(),
+        'wsgi.errors': BytesIO(),
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    result = application(environ, start_response)
+    try:
+        for _ in result:
+            pass
+    finally:
+        if hasattr(result, 'close'):
+            result.close()
+    return statuses[0]
+
+
+def request_pages(application=None):
+    application = application or get_wsgi_application()
+    urls = getattr(settings, 'WARMUP_URLS', DEFAULT_URLS)
+    return {url: request(application, reverse(url)) for url in urls}
+
+
+def warmup(application=None):
+    """Выполняет все шаги прогрева, возвращает [(шаг, результат, секунды)]."""
+    steps = (
+        ('urls', load_urls),
+        ('templates', lambda: len(warm_templates())),
+        ('database', open_connections),
+        ('thumbnails', load_thumbnail_backend),
+        ('caches', prime_caches),
+        ('pages', lambda: request_pages(application)),
+    )
+    report = []
+    for name, step in steps:
+        started = time.perf_counter()
+        result = step()
+        elapsed = time.perf_counter() - started
+        logger.info('Прогрев %s: %s за %.3f с', name, result, elapsed)
+        report.append((name, result, elapsed))
+    return report
@@ -1,9 +1,108 @@
-from django.contrib import admin
+from django import forms
+from django.contrib import admin, messages
+from django.contrib.admin import helpers
+from django.contrib.admin.helpers import ActionForm
+from django.core.exceptions import ValidationError
+from django.db.models import Count, Q
+from django.template.response import TemplateResponse
 
+from core.paginators import EstimatedCountPaginator
+from core.tasks import enqueue
+
+from . import tasks
 from .models import Post, Group, Comment, Follow
 
 
-class PostAdmin(admin.ModelAdmin):
+class OptimizedAdmin(admin.ModelAdmin):
+    """Общие настройки списков для больших таблиц.
+
+    Число строк без фильтров берётся из статистики базы, а число строк
+    до фильтрации не считается вовсе. Поиск по полям без индекса
+    (unindexed_search_fields) идёт только среди последних SEARCH_WINDOW
+    записей, остальные поля и номер записи ищутся по всей таблице.
+    """
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    empty_value_display = '-пусто-'
+    unindexed_search_fields = ()
+    SEARCH_WINDOW = 10000
+
+    def get_search_fields(self, request):
+        return [field for field in super().get_search_fields(request)
+                if field not in self.unindexed_search_fields]
+
+    def get_search_results(self, request, queryset, search_term):
+        results, use_distinct = super().get_search_results(
+            request, queryset, search_term)
+        search_term = search_term.strip()
+        if not search_term:
+            return results, use_distinct
+        if search_term.isdigit():
+            results |= queryset.filter(pk=int(search_term))
+        if self.unindexed_search_fields:
+            # Окно по первичному ключу читается по индексу, поэтому
+            # icontains просматривает не больше SEARCH_WINDOW строк.
+            last_pk = queryset.model._default_manager.order_by(
+                '-pk').values_list('pk', flat=True).first() or 0
+            condition = Q()
+            for field in self.unindexed_search_fields:
+                condition |= Q(**{f'{field}__icontains': search_term})
+            results |= queryset.filter(
+                condition, pk__gt=last_pk - self.SEARCH_WINDOW)
+        return results, use_distinct
+
+    def enqueue_action(self, request, func, **kwargs):
+        """Ставит действие в очередь, а не выполняет его в запросе."""
+        task = enqueue(func, **kwargs)
+        if task is None:
+            self.message_user(request, 'Готово.')
+        else:
+            self.message_user(
+                request,
+                f'Задача №{task.pk} поставлена в очередь, прогресс виден '
+                f'в разделе «Задачи».',
+            )
+
+    def confirm_author_delete(self, request, queryset, action, model):
+        """Страница подтверждения удаления всех записей авторов.
+
+        Как и у встроенного delete_selected: пока в запросе нет
+        post=yes, показывает авторов и число их записей model, после
+        подтверждения возвращает None.
+        """
+        if request.POST.get('post'):
+            return None
+        authors = (
+            model.objects
+            .filter(author_id__in=queryset.values('author_id'))
+            .values('author__username')
+            .annotate(count=Count('pk'))
+            .order_by('author__username')
+        )
+        context = {
+            **self.admin_site.each_context(request),
+            'title': getattr(self, action).short_description,
+            'opts': self.model._meta,
+            'authors': authors,
+            'queryset': queryset,
+            'action': action,
+            'action_checkbox_name': helpers.ACTION_CHECKBOX_NAME,
+        }
+        request.current_app = self.admin_site.name
+        return TemplateResponse(
+            request, 'admin/posts/confirm_author_delete.html', context)
+
+
+class PostActionForm(ActionForm):
+    group = forms.ModelChoiceField(
+        Group.objects.all(),
+        required=False,
+        label='Группа',
+        empty_label='без группы',
+    )
+
+
+class PostAdmin(OptimizedAdmin):
     list_display = (
         'pk',
         'text',
@@ -12,14 +111,74 @@ class PostAdmin(admin.ModelAdmin):
         'group',
         'image',
     )
-    search_fields = ('text',)
+    list_select_related = ('author', 'group')
+    autocomplete_fields = ('author', 'group')
+    search_fields = ('text', '^author__username')
+    # Без полнотекстового индекса поиск по тексту читал бы всю таблицу.
+    unindexed_search_fields = ('text',)
     list_filter = ('pub_date',)
-    empty_value_display = '-пусто-'
 
-    list_editable = ('group', 'image',)
+    list_editable = ('group', 'image')
+    action_form = PostActionForm
+    actions = (
+        'move_to_group',
+        'delete_author_posts',
+        'regenerate_thumbnails',
+    )
+
+    def get_changelist_form(self, request, **kwargs):
+        """Список групп для строк списка читается один раз на страницу.
+
+        Поле с автодополнением и обычный ModelChoiceField делают по
+        запросу на каждую строку, поэтому в списке — простой select.
+        """
+        form = super().get_changelist_form(request, **kwargs)
+        choices = [('', '-пусто-'),
+                   *Group.objects.values_list('pk', 'title')]
+
+        class ChangeListForm(form):
+            def __init__(self, *args, **kwargs):
+                super().__init__(*args, **kwargs)
+                self.fields['group'].widget = forms.Select(choices=choices)
+
+        return ChangeListForm
+
+    def move_to_group(self, request, queryset):
+        try:
+            group = PostActionForm.base_fields['group'].clean(
+                request.POST.get('group'))
+        except ValidationError:
+            self.message_user(request, 'Нет такой группы.', messages.ERROR)
+            return
+        self.enqueue_action(
+            request, tasks.move_posts,
+            post_ids=list(queryset.values_list('pk', flat=True)),
+            group_id=group.pk if group else None,
+        )
+    move_to_group.short_description = 'Перенести в выбранную группу'
 
+    def delete_author_posts(self, request, queryset):
+        confirmation = self.confirm_author_delete(
+            request, queryset, 'delete_author_posts', Post)
+        if confirmation is not None:
+            return confirmation
+        self.enqueue_action(
+            request, tasks.delete_author_posts,
+            author_ids=sorted(set(
+                queryset.values_list('author_id', flat=True))),
+        )
+    delete_author_posts.short_description = 'Удалить все посты их авторов'
 
-class PostGroup(admin.ModelAdmin):
+    def regenerate_thumbnails(self, request, queryset):
+        self.enqueue_action(
+            request, tasks.regenerate_thumbnails,
+            post_ids=list(queryset.exclude(image='').values_list(
+                'pk', flat=True)),
+        )
+    regenerate_thumbnails.short_description = 'Пересоздать миниатюры'
+
+
+class PostGroup(OptimizedAdmin):
     list_display = (
         'pk',
         'title',
@@ -27,10 +186,9 @@ class PostGroup(admin.ModelAdmin):
         'description',
     )
     search_fields = ('title',)
-    empty_value_display = '-пусто-'
 
 
-class PostComment(admin.ModelAdmin):
+class PostComment(OptimizedAdmin):
     list_display = (
         'pk',
         'text',
@@ -38,19 +196,37 @@ class PostComment(admin.ModelAdmin):
         'author',
         'created',
     )
-    search_fields = ('text',)
+    list_select_related = ('post', 'author')
+    autocomplete_fields = ('post', 'author')
+    search_fields = ('text', '^author__username')
+    unindexed_search_fields = ('text',)
     list_filter = ('created',)
-    empty_value_display = '-пусто-'
+    actions = ('purge_author_comments',)
+
+    def purge_author_comments(self, request, queryset):
+        confirmation = self.confirm_author_delete(
+            request, queryset, 'purge_author_comments', Comment)
+        if confirmation is not None:
+            return confirmation
+        self.enqueue_action(
+            request, tasks.purge_author_comments,
+            author_ids=sorted(set(
+                queryset.values_list('author_id', flat=True))),
+        )
+    purge_author_comments.short_description = (
+        'Удалить все комментарии их авторов')
 
 
-class PostFollow(admin.ModelAdmin):
+class PostFollow(OptimizedAdmin):
     list_display = (
         'pk',
         'user',
         'author',
     )
-    search_fields = ('user',)
-    empty_value_display = '-пусто-'
+    list_select_related = ('user', 'author')
+    autocomplete_fields = ('user', 'author')
+    # Поиск по началу имени может использовать индекс username.
+    search_fields = ('^user__username', '^author__username')
 
 
 admin.site.register(Post, PostAdmin)
@@ -0,0 +1,71 @@
+"""Массовые операции над постами и комментариями для админки.
+
+Каждая операция идёт пачками по BATCH_SIZE: пачка меняется одним
+запросом update() или delete() в своей транзакции, кэши сбрасываются
+один раз на пачку (posts.invalidation.batch) уже после фиксации, а
+прогресс записывается в задачу очереди (core.tasks.report_progress).
+В проекте нет поискового индекса, поэтому сбрасываются только кэши.
+"""
+from django.db import transaction
+
+from core.tasks import report_progress
+
+from . import images, invalidation
+from .models import Comment, Post
+
+BATCH_SIZE = 500
+
+
+def _chunks(ids):
+    ids = list(ids)
+    for start in range(0, len(ids), BATCH_SIZE):
+        yield ids[start:start + BATCH_SIZE]
+
+
+def move_posts(post_ids, group_id):
+    """Переносит посты в группу group_id (None — убрать из группы)."""
+    done = 0
+    for chunk in _chunks(post_ids):
+        with invalidation.batch() as changes, transaction.atomic():
+            rows = Post.objects.filter(id__in=chunk).values_list(
+                'id', 'author_id', 'group_id')
+            for post_id, author_id, old_group_id in rows:
+                changes.post(post_id, author_id, {old_group_id, group_id})
+            Post.objects.filter(id__in=chunk).update(group_id=group_id)
+        done += len(chunk)
+        report_progress(done, len(post_ids))
+    return done
+
+
+def _delete_in_batches(queryset):
+    total = queryset.count()
+    done = 0
+    while True:
+        chunk = list(queryset.values_list('id', flat=True)[:BATCH_SIZE])
+        if not chunk:
+            return done
+        with invalidation.batch(), transaction.atomic():
+            # Сигналы удаления записывают изменения в общую пачку.
+            queryset.model.objects.filter(id__in=chunk).delete()
+        done += len(chunk)
+        report_progress(done, max(total, done))
+
+
+def delete_author_posts(author_ids):
+    return _delete_in_batches(
+        Post.objects.filter(author_id__in=author_ids).order_by())
+
+
+def purge_author_comments(author_ids):
+    return _delete_in_batches(
+        Comment.objects.filter(author_id__in=author_ids).order_by())
+
+
+def regenerate_thumbnails(post_ids):
+    done = 0
+    for chunk in _chunks(post_ids):
+        for post in Post.objects.filter(id__in=chunk).exclude(image=''):
+            images.make_thumbnails(post.image, regenerate=True)
+        done += len(chunk)
+        report_progress(done, len(post_ids))
+    return done
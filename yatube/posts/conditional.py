@@ -0,0 +1,103 @@
+"""Валидаторы ETag и Last-Modified для страниц постов.
+
+Каждый валидатор — это версии объектов из posts.fragments, которые
+сигналы увеличивают при изменении, и персональная часть: пользователь,
+число его непрочитанных уведомлений, версия рекомендаций (они видны
+в шапке и на странице) и отпечаток CSRF-токена. Считаются они по кэшу
+и одному короткому запросу, без пагинатора и шаблона. Кэш общий для
+всех процессов (settings.CACHES), поэтому любой из них выдаёт для
+страницы один ETag; после истечения ключа версии ETag просто
+меняется, и браузер один раз получает страницу целиком.
+"""
+import hashlib
+
+from django.conf import settings
+from django.db.models import Max
+
+from . import fragments, follow_graph, notifications
+from .models import Group, Post, User
+
+
+def _csrf_digest(request):
+    # Формы страницы содержат CSRF-токен, который меняется при входе:
+    # страница из кэша браузера со старым токеном не отправится.
+    token = request.COOKIES.get(settings.CSRF_COOKIE_NAME, '')
+    return hashlib.sha1(token.encode()).hexdigest()[:8]
+
+
+def _personal(request):
+    user = request.user
+    if not user.is_authenticated:
+        return 'anonymous'
+    return '-'.join((
+        str(user.id),
+        str(notifications.unread_count(user.id)),
+        fragments.versions((fragments.RECOMMENDATIONS, user.id)),
+        _csrf_digest(request),
+    ))
+
+
+def _etag(request, *objects, extra=''):
+    return '-'.join(filter(None, (
+        fragments.versions(*objects), extra, _personal(request))))
+
+
+def feed_etag(request):
+    return _etag(request, (fragments.FEED, 0), (fragments.GROUPS, 0))
+
+
+def feed_last_modified(request):
+    # Для вошедших страница зависит и от пользователя, поэтому
+    # сравнение по одной дате для них не подходит.
+    if request.user.is_authenticated:
+        return None
+    return Post.objects.aggregate(last=Max('pub_date'))['last']
+
+
+def group_index_etag(request):
+    return feed_etag(request)
+
+
+def group_etag(request, slug):
+    group_id = Group.objects.filter(slug=slug).values_list(
+        'id', flat=True).first()
+    if group_id is None:
+        return None
+    return _etag(request, (fragments.GROUP, group_id), (fragments.GROUPS, 0))
+
+
+def group_last_modified(request, slug):
+    if request.user.is_authenticated:
+        return None
+    return Post.objects.filter(group__slug=slug).aggregate(
+        last=Max('pub_date'))['last']
+
+
+def profile_etag(request, username):
+    author_id = User.objects.filter(username=username).values_list(
+        'id', flat=True).first()
+    if author_id is None:
+        return None
+    following = request.user.is_authenticated and follow_graph.is_following(
+        request.user.id, author_id)
+    return _etag(request, (fragments.AUTHOR, author_id),
+                 (fragments.GROUPS, 0), extra=f'f{int(following)}')
+
+
+def post_detail_etag(request, post_id):
+    post = Post.objects.filter(pk=post_id).order_by().values(
+        'author_id').annotate(last_comment=Max('comments__created')).first()
+    if post is None:
+        return None
+    last_comment = post['last_comment']
+    return _etag(
+        request, (fragments.POST, post_id),
+        (fragments.AUTHOR, post['author_id']), (fragments.GROUPS, 0),
+        extra=f'{post_id}.{last_comment.timestamp() if last_comment else 0}',
+    )
+
+
+def follow_etag(request):
+    following = sorted(follow_graph.following_ids(request.user.id))
+    return _etag(request, (fragments.FEED, 0), (fragments.GROUPS, 0),
+                 extra=str(hash(tuple(following))))
@@ -0,0 +1,122 @@
+"""Граф подписок, хранящийся в кэше.
+
+Для каждого пользователя в кэше лежат два множества id: на кого он
+подписан и кто подписан на него. Проверки «подписан ли», «подписчики»,
+«взаимные подписки» и количество подписок читаются из кэша без
+запросов к Follow. Сигналы модели Follow сбрасывают множества
+изменившихся пользователей, и следующее чтение собирает их заново.
+"""
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Follow
+
+FOLLOWING_KEY = 'follow_graph:following:{}:{}'
+FOLLOWERS_KEY = 'follow_graph:followers:{}:{}'
+GENERATION_KEY = 'follow_graph:generation:{}'
+CACHE_TIMEOUT = 60 * 60 * 24
+REBUILD_BATCH_SIZE = 500
+
+
+def _generations(user_ids):
+    keys = {user_id: GENERATION_KEY.format(user_id) for user_id in user_ids}
+    found = cache.get_many(keys.values())
+    missing = {key: time.time_ns() for key in keys.values()
+               if key not in found}
+    if missing:
+        # Начинаем со времени: поколение, заведённое заново после
+        # вытеснения ключа, не совпадёт ни с одним прежним.
+        cache.set_many(missing, CACHE_TIMEOUT)
+        found.update(missing)
+    return {user_id: found[key] for user_id, key in keys.items()}
+
+
+def _get_ids(key_template, user_id, lookup, field):
+    key = key_template.format(user_id, _generations([user_id])[user_id])
+    ids = cache.get(key)
+    if ids is None:
+        ids = frozenset(
+            Follow.objects.filter(**{lookup: user_id}).values_list(
+                field, flat=True)
+        )
+        cache.set(key, ids, CACHE_TIMEOUT)
+    return ids
+
+
+def following_ids(user_id):
+    """Множество id авторов, на которых подписан пользователь."""
+    return _get_ids(FOLLOWING_KEY, user_id, 'user_id', 'author_id')
+
+
+def follower_ids(user_id):
+    """Множество id подписчиков пользователя."""
+    return _get_ids(FOLLOWERS_KEY, user_id, 'author_id', 'user_id')
+
+
+def is_following(user_id, author_id):
+    return author_id in following_ids(user_id)
+
+
+def mutual_ids(user_id):
+    """Пользователи, подписанные друг на друга с user_id."""
+    return following_ids(user_id) & follower_ids(user_id)
+
+
+def following_count(user_id):
+    return len(following_ids(user_id))
+
+
+def followers_count(user_id):
+    return len(follower_ids(user_id))
+
+
+def _bump(user_ids):
+    for user_id in user_ids:
+        try:
+            cache.incr(GENERATION_KEY.format(user_id))
+        except ValueError:
+            pass
+
+
+def forget(*user_ids):
+    """Сбрасывает множества пользователей после изменения подписок.
+
+    Множества не правятся на месте: при одновременных подписках
+    чтение-изменение-запись теряло бы обновления. Вместо этого
+    увеличивается поколение пользователя, и следующее чтение соберёт
+    множество из Follow заново. Второй раз поколение увеличивается
+    после фиксации транзакции: чтение, успевшее собрать множество до
+    неё, положило его под уже устаревшее поколение.
+    """
+    _bump(user_ids)
+    transaction.on_commit(lambda: _bump(user_ids))
+
+
+def rebuild(user_ids):
+    """Пересобирает множества для переданных пользователей.
+
+    Возвращает количество обработанных пользователей.
+    """
+    count = 0
+    user_ids = list(user_ids)
+    for start in range(0, len(user_ids), REBUILD_BATCH_SIZE):
+        batch = user_ids[start:start + REBUILD_BATCH_SIZE]
+        following = {user_id: set() for user_id in batch}
+        followers = {user_id: set() for user_id in batch}
+        for user_id, author_id in Follow.objects.filter(
+                user_id__in=batch).values_list('user_id', 'author_id'):
+            following[user_id].add(author_id)
+        for user_id, author_id in Follow.objects.filter(
+                author_id__in=batch).values_list('user_id', 'author_id'):
+            followers[author_id].add(user_id)
+        values = {}
+        for user_id, generation in _generations(batch).items():
+            values[FOLLOWING_KEY.format(user_id, generation)] = frozenset(
+                following[user_id])
+            values[FOLLOWERS_KEY.format(user_id, generation)] = frozenset(
+                followers[user_id])
+        cache.set_many(values, CACHE_TIMEOUT)
+        count += len(batch)
+    return count
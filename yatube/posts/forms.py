@@ -1,9 +1,12 @@
 from django import forms
 
+from . import images
 from .models import Post, Comment
 
 
 class PostForm(forms.ModelForm):
+    image_hash = None
+
     class Meta:
         model = Post
         fields = ('text', 'group', 'image')
@@ -16,6 +19,23 @@ class PostForm(forms.ModelForm):
             'group': 'Группа, к которой будет относиться пост'
         }
 
+    def clean_image(self):
+        # Уменьшение и пережатие — в фоновой задаче process_image.
+        image = self.cleaned_data.get('image')
+        if image and 'image' in self.changed_data:
+            self.image_hash = images.content_hash(image)
+        return image
+
+    def save(self, commit=True):
+        post = super().save(commit=False)
+        if self.image_hash:
+            post.image_hash = self.image_hash
+        elif 'image' in self.changed_data and not post.image:
+            post.image_hash = ''
+        if commit:
+            post.save()
+        return post
+
 
 class CommentForm(forms.ModelForm):
     class Meta:
@@ -0,0 +1,67 @@
+"""Версии кэшированных фрагментов и страниц.
+
+Общая для всех часть страницы (список постов автора, текст поста с
+комментариями) кэшируется тегом {% cache %} с версией объекта в ключе,
+а персональные кусочки — кнопка подписки, форма комментария, кнопка
+редактирования — рендерятся при каждом запросе. Сигналы увеличивают
+версию при изменении объекта, старые фрагменты просто перестают
+читаться и вытесняются по таймауту. Те же версии входят в ETag
+страниц (posts.conditional).
+
+Версии лежат в общем кэше (settings.CACHES), поэтому сигнал в одном
+процессе, в том числе в обработчике задач, виден всем остальным.
+Ключ версии живёт FRAGMENT_VERSION_TIMEOUT — дольше любого
+фрагмента; после истечения версия заводится заново текущим временем
+и не совпадает ни с одной прежней.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+AUTHOR = 'author'
+POST = 'post'
+GROUP = 'group'
+GROUPS = 'groups'
+FEED = 'feed'
+RECOMMENDATIONS = 'recommendations'
+
+VERSION_KEY = 'posts:fragment_version:{}:{}'
+
+
+def _key(kind, object_id):
+    return VERSION_KEY.format(kind, object_id)
+
+
+def versions(*objects):
+    """Версии для пар (вид, id) одной строкой для ключа фрагмента."""
+    keys = [_key(kind, object_id) for kind, object_id in objects]
+    found = cache.get_many(keys)
+    missing = {key: time.time_ns() for key in keys if key not in found}
+    if missing:
+        # Начинаем со времени, а не с единицы: если ключ версии
+        # вытеснен, новая версия не совпадёт со старыми фрагментами.
+        cache.set_many(missing, settings.FRAGMENT_VERSION_TIMEOUT)
+        found.update(missing)
+    return '.'.join(str(found[key]) for key in keys)
+
+
+def bump(kind, object_id):
+    # Новая версия — текущее время, а не incr: запись не зависит от
+    # прежнего значения, и таймаут ключа продлевается на любом бэкенде.
+    cache.set(_key(kind, object_id), time.time_ns(),
+              settings.FRAGMENT_VERSION_TIMEOUT)
+
+
+def bump_many(kind, object_ids):
+    # Удалённая версия при следующем чтении станет текущим временем,
+    # то есть больше любой прежней.
+    cache.delete_many([_key(kind, object_id) for object_id in object_ids])
+
+
+def context(*objects):
+    """Переменные шаблона для {% cache fragment_timeout ... %}."""
+    return {
+        'fragment_timeout': settings.FRAGMENT_CACHE_TIMEOUT,
+        'fragment_version': versions(*objects),
+    }
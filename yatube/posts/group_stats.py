@@ -0,0 +1,43 @@
+"""Статистика групп для страницы со списком групп.
+
+Количество постов и последний пост хранятся в самой модели Group и
+пересчитываются только для затронутых групп при изменении постов.
+Список групп целиком лежит в кэше и сбрасывается при пересчёте.
+"""
+from django.core.cache import cache
+
+from .models import Group, Post
+
+GROUPS_CACHE_KEY = 'posts:group_directory'
+GROUPS_CACHE_TIMEOUT = 60 * 60
+
+
+def refresh(group_ids):
+    """Пересчитывает счётчики переданных групп."""
+    for group_id in set(group_ids) - {None}:
+        posts = Post.objects.filter(group_id=group_id)
+        Group.objects.filter(pk=group_id).update(
+            posts_count=posts.count(),
+            last_post=posts.values_list('pk', flat=True).first(),
+        )
+    invalidate()
+
+
+def refresh_all():
+    group_ids = list(Group.objects.values_list('pk', flat=True))
+    refresh(group_ids)
+    return len(group_ids)
+
+
+def invalidate():
+    cache.delete(GROUPS_CACHE_KEY)
+
+
+def group_directory():
+    groups = cache.get(GROUPS_CACHE_KEY)
+    if groups is None:
+        groups = list(
+            Group.objects.select_related('last_post').order_by('title')
+        )
+        cache.set(GROUPS_CACHE_KEY, groups, GROUPS_CACHE_TIMEOUT)
+    return groups
@@ -0,0 +1,139 @@
+"""Обработка загружаемых картинок постов.
+
+Запрос сохраняет загруженный файл как есть, а фоновая задача
+posts.tasks.process_image уменьшает картинку до MAX_IMAGE_SIZE,
+удаляет EXIF-данные, пережимает JPEG и WebP с качеством IMAGE_QUALITY
+и подменяет ею исходный файл поста. GIF остаётся как есть, чтобы не
+терять анимацию.
+Картинки лежат в хранилище с именами по содержимому
+(core.storage), поэтому одинаковые картинки разных постов — это один
+файл. Ссылаются на файл посты с таким Post.image и незавершённые
+загрузки; когда последняя ссылка пропадает, файл и его миниатюры
+удаляются, если его только что не взяли повторно (см. core.storage).
+"""
+import hashlib
+import os
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.db import transaction
+from PIL import Image, ImageOps
+from sorl.thumbnail import delete as delete_thumbnails
+from sorl.thumbnail import get_thumbnail
+from sorl.thumbnail.images import ImageFile
+
+from core.storage import is_content_addressed, post_image_storage
+
+from .models import Post, UploadSession
+
+MAX_IMAGE_SIZE = (1920, 1920)
+IMAGE_QUALITY = 85
+REENCODED_FORMATS = ('JPEG', 'PNG', 'WEBP')
+# Размеры миниатюр, которые используют шаблоны постов.
+THUMBNAIL_OPTIONS = (
+    ('960x339', {'crop': 'center', 'upscale': True}),
+)
+
+
+def content_hash(file):
+    digest = hashlib.sha256()
+    file.seek(0)
+    for chunk in file.chunks():
+        digest.update(chunk)
+    file.seek(0)
+    return digest.hexdigest()
+
+
+def verify(file):
+    """Проверяет, что файл — картинка, не декодируя пиксели.
+
+    На испорченные данные Pillow отвечает исключениями разных типов,
+    поэтому любое из них превращается в ValueError.
+    """
+    file.seek(0)
+    try:
+        Image.open(file).verify()
+    except Exception as error:
+        raise ValueError('Файл не является картинкой.') from error
+    file.seek(0)
+
+
+def process(file):
+    """Возвращает обработанную копию картинки или исходный файл."""
+    file.seek(0)
+    image = Image.open(file)
+    image_format = image.format
+    if image_format not in REENCODED_FORMATS:
+        file.seek(0)
+        return file
+    # Поворот из EXIF применяется к пикселям до удаления метаданных.
+    image = ImageOps.exif_transpose(image)
+    image.thumbnail(MAX_IMAGE_SIZE, Image.LANCZOS)
+    options = {'optimize': True}
+    if image_format in ('JPEG', 'WEBP'):
+        options['quality'] = IMAGE_QUALITY
+    if image_format == 'JPEG':
+        options['progressive'] = True
+        if image.mode not in ('RGB', 'L'):
+            image = image.convert('RGB')
+    output = BytesIO()
+    image.save(output, image_format, **options)
+    return ContentFile(output.getvalue(), name=file.name)
+
+
+def process_post_image(post_id, name):
+    """Заменяет картинку name у поста её обработанной копией.
+
+    Возвращает картинку поста после замены или None, если пост удалён
+    или его картинка уже другая — например, задачу повторили после
+    успешной обработки.
+    """
+    if not Post.objects.filter(pk=post_id, image=name).exists():
+        return None
+    with post_image_storage.open(name) as file:
+        content = process(file)
+        new_name = name
+        if content is not file:
+            digest = content_hash(content)
+            upload_to = Post._meta.get_field('image').upload_to
+            new_name = post_image_storage.save(
+                upload_to + os.path.basename(name), content)
+    with transaction.atomic():
+        post = Post.objects.select_for_update().filter(
+            pk=post_id, image=name).first()
+        if post is not None and new_name != name:
+            # Исходный файл освободят сигналы сохранения поста.
+            post.image = new_name
+            post.image_hash = digest
+            post.save(update_fields=['image', 'image_hash'])
+    if post is None:
+        release(new_name)
+        return None
+    return post.image
+
+
+def is_referenced(name):
+    return (Post.objects.filter(image=name).exists()
+            or UploadSession.objects.filter(stored_name=name).exists())
+
+
+def discard(name):
+    """Удаляет файл без ссылок вместе с миниатюрами."""
+    if not post_image_storage.discard(name, lambda: is_referenced(name)):
+        return False
+    delete_thumbnails(ImageFile(name, post_image_storage),
+                      delete_file=False)
+    return True
+
+
+def release(name):
+    """Удаляет файл, если на него больше ничто не ссылается."""
+    return is_content_addressed(name) and discard(name)
+
+
+def make_thumbnails(image, regenerate=False):
+    """Создаёт миниатюры картинки; regenerate сначала удаляет старые."""
+    if regenerate:
+        delete_thumbnails(image, delete_file=False)
+    for geometry, options in THUMBNAIL_OPTIONS:
+        get_thumbnail(image, geometry, **options)
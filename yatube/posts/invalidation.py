@@ -0,0 +1,81 @@
+"""Сброс кэшей после изменения постов и комментариев.
+
+Сигналы моделей записывают, что изменилось, в объект Changes, а он
+одним вызовом пересчитывает статистику групп, увеличивает версии
+фрагментов (posts.fragments) и освобождает старые картинки. Обычно
+это происходит сразу после сохранения, а внутри блока batch() — один
+раз на выходе из блока, сколько бы объектов в нём ни изменилось. Так
+работают массовые операции из админки (posts.bulk). Кэши сбрасываются
+ещё раз после фиксации транзакции, а картинки освобождаются только
+после неё. Массовые операции выполняются в обработчике задач, поэтому
+их сброс виден веб-процессам только с общим кэшем (settings.CACHES).
+"""
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+
+from django.db import transaction
+
+from . import fragments, group_stats, images
+
+_local = threading.local()
+
+
+class Changes:
+    def __init__(self):
+        self.versions = defaultdict(set)
+        self.groups = set()
+        self.released_images = set()
+
+    def post(self, post_id, author_id, group_ids=()):
+        # Профиль показывает посты автора, а страница поста — их число,
+        # поэтому сбрасываются версии поста, автора, ленты и групп.
+        group_ids = set(group_ids) - {None}
+        self.versions[fragments.POST].add(post_id)
+        self.versions[fragments.AUTHOR].add(author_id)
+        self.versions[fragments.FEED].add(0)
+        self.versions[fragments.GROUP].update(group_ids)
+        self.groups.update(group_ids)
+
+    def comment(self, post_id):
+        self.versions[fragments.POST].add(post_id)
+
+    def release_image(self, name):
+        if name:
+            self.released_images.add(name)
+
+    def invalidate(self):
+        if self.groups:
+            group_stats.invalidate()
+        for kind, object_ids in self.versions.items():
+            fragments.bump_many(kind, object_ids)
+
+    def apply(self):
+        if self.groups:
+            group_stats.refresh(self.groups)
+        self.invalidate()
+        # Второй раз — после фиксации: читатель, успевший между сбросом
+        # и фиксацией закэшировать старые данные под новой версией,
+        # иначе отдавал бы их до истечения таймаута.
+        transaction.on_commit(self.invalidate)
+        for name in self.released_images:
+            # Файл удаляем только после фиксации транзакции.
+            transaction.on_commit(lambda name=name: images.release(name))
+
+
+@contextmanager
+def batch():
+    """Собирает изменения блока и сбрасывает кэши один раз в конце.
+
+    Вложенный batch() добавляет изменения во внешний.
+    """
+    changes = getattr(_local, 'changes', None)
+    if changes is not None:
+        yield changes
+        return
+    changes = _local.changes = Changes()
+    try:
+        yield changes
+    finally:
+        _local.changes = None
+        changes.apply()
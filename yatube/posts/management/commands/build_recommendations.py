@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from core.tasks import schedule
+from posts import recommendations
+from posts.tasks import build_recommendations
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает рекомендации авторов для всех пользователей.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--schedule', action='store_true',
+            help='Поставить периодическую задачу в очередь и выйти.',
+        )
+
+    def handle(self, *args, **options):
+        if options['schedule']:
+            schedule(build_recommendations, 0)
+            self.stdout.write(self.style.SUCCESS('Задача поставлена.'))
+            return
+        count = recommendations.build_all()
+        self.stdout.write(
+            self.style.SUCCESS(f'Рекомендации пересчитаны: {count} польз.')
+        )
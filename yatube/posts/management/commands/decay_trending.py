@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from core.tasks import schedule
+from posts import trending
+from posts.tasks import decay_trending
+
+
+class Command(BaseCommand):
+    help = 'Уменьшает оценки популярности постов, запускается по расписанию.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--factor', type=float, default=trending.DECAY_FACTOR,
+            help='Множитель, на который умножаются оценки.',
+        )
+        parser.add_argument(
+            '--schedule', action='store_true',
+            help='Поставить периодическую задачу в очередь и выйти.',
+        )
+
+    def handle(self, *args, **options):
+        if options['schedule']:
+            schedule(decay_trending, 0)
+            self.stdout.write(self.style.SUCCESS('Задача поставлена.'))
+            return
+        count = trending.decay(options['factor'])
+        self.stdout.write(
+            self.style.SUCCESS(f'Оценки уменьшены у {count} постов.')
+        )
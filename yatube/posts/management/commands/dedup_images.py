@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from core.storage import is_content_addressed, post_image_storage
+from posts import fragments, images
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = (
+        'Переносит картинки старых постов в хранилище с именами по '
+        'содержимому; одинаковые картинки становятся одним файлом.'
+    )
+
+    def handle(self, *args, **options):
+        moved = 0
+        for post in Post.objects.exclude(image='').iterator():
+            name = post.image.name
+            if is_content_addressed(name) or not (
+                    post_image_storage.exists(name)):
+                continue
+            with post_image_storage.open(name, 'rb') as image:
+                image_hash = images.content_hash(image)
+                new_name = post_image_storage.save(name, image)
+            Post.objects.filter(pk=post.pk).update(
+                image=new_name, image_hash=image_hash)
+            fragments.bump(fragments.POST, post.pk)
+            fragments.bump(fragments.AUTHOR, post.author_id)
+            moved += 1
+        self.stdout.write(self.style.SUCCESS(
+            f'Картинок перенесено: {moved}. Старые файлы удалит gc_media.'))
@@ -0,0 +1,60 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.tasks import schedule
+from posts import media_gc
+from posts.tasks import collect_media
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет картинки постов и миниатюры, на которые нет ссылок, '
+        'и брошенные загрузки.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только показать файлы, ничего не удаляя.',
+        )
+        parser.add_argument(
+            '--rate', type=float, default=settings.GC_MEDIA_RATE,
+            help='Не больше стольких удалений в секунду; 0 — без ограничения.',
+        )
+        parser.add_argument(
+            '--min-age', type=int, default=media_gc.MIN_AGE,
+            help='Не трогать файлы моложе стольких секунд.',
+        )
+        parser.add_argument(
+            '--schedule', action='store_true',
+            help='Поставить периодическую задачу в очередь и выйти.',
+        )
+
+    def handle(self, *args, **options):
+        if options['schedule']:
+            schedule(collect_media, 0)
+            self.stdout.write(self.style.SUCCESS('Задача поставлена.'))
+            return
+        params = {
+            'dry_run': options['dry_run'],
+            'rate': options['rate'],
+            'min_age': options['min_age'],
+        }
+        verbose = options['dry_run'] or options['verbosity'] > 1
+        uploads = self._report(media_gc.collect_uploads(
+            dry_run=options['dry_run'], rate=options['rate']), verbose)
+        images = self._report(media_gc.collect_images(**params), verbose)
+        thumbnails = self._report(
+            media_gc.collect_thumbnails(**params), verbose)
+        verb = 'Найдено' if options['dry_run'] else 'Удалено'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} картинок: {images}, миниатюр: {thumbnails}, '
+            f'загрузок: {uploads}.'))
+
+    def _report(self, names, verbose):
+        count = 0
+        for name in names:
+            count += 1
+            if verbose:
+                self.stdout.write(name)
+        return count
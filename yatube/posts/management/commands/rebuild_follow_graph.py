@@ -0,0 +1,17 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from posts import follow_graph
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает граф подписок в кэше по таблице Follow.'
+
+    def handle(self, *args, **options):
+        user_ids = User.objects.order_by('id').values_list('id', flat=True)
+        count = follow_graph.rebuild(user_ids.iterator())
+        self.stdout.write(
+            self.style.SUCCESS(f'Граф подписок пересобран: {count} польз.')
+        )
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from posts import group_stats
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает количество постов и последний пост групп.'
+
+    def handle(self, *args, **options):
+        count = group_stats.refresh_all()
+        self.stdout.write(
+            self.style.SUCCESS(f'Статистика пересчитана для {count} групп.')
+        )
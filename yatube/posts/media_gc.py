@@ -0,0 +1,182 @@
+"""Удаление картинок постов, на которые никто не ссылается.
+
+Имена, на которые ссылаются Post.image и незавершённые загрузки,
+читаются из базы потоком, отсортированными. Каталог posts/ в
+MEDIA_ROOT обходится через os.scandir в том же порядке, поэтому оба
+списка сливаются за один проход и в памяти не держится ни один из них
+целиком. Файлы моложе min_age не трогаем: их могли только что
+сохранить, а пост ещё не записан; повторно взятый файл save тоже
+делает «молодым». Перед удалением ссылки проверяются ещё раз. Вместе
+с файлом удаляются его миниатюры; миниатюры в cache/, о которых не знает
+хранилище ключей sorl, тоже считаются осиротевшими. Загрузки частями,
+к которым за UPLOAD_MAX_AGE так и не прикрепили пост, удаляются вместе
+с файлами uploads/*.part.
+"""
+import heapq
+import itertools
+import os
+import time
+from datetime import timedelta
+
+from sorl.thumbnail import default
+from sorl.thumbnail.conf import settings as thumbnail_settings
+from django.utils import timezone
+from sorl.thumbnail.images import ImageFile
+
+from core.storage import post_image_storage
+from core.tasks import report_progress
+
+from . import images, uploads
+from .models import Post, UploadSession
+from .uploads import UPLOAD_TO
+
+MIN_AGE = 60 * 60
+UPLOAD_MAX_AGE = 60 * 60 * 24
+BATCH_SIZE = 2000
+
+
+class OrderError(Exception):
+    """База вернула имена не в порядке обхода каталога."""
+
+
+def _names(queryset, field):
+    return queryset.exclude(**{field: ''}).order_by(field).values_list(
+        field, flat=True).iterator(chunk_size=BATCH_SIZE)
+
+
+def referenced_names():
+    """Отсортированный поток имён файлов, на которые есть ссылки."""
+    previous = ''
+    for name in heapq.merge(_names(Post.objects, 'image'),
+                            _names(UploadSession.objects, 'stored_name')):
+        if name < previous:
+            # Сопоставление строк базы отличается от побайтового:
+            # продолжать слияние значит удалить нужные файлы.
+            raise OrderError(name)
+        previous = name
+        yield name
+
+
+def _sort_key(entry):
+    # Каталог 'a' обходится как 'a/', иначе 'a/b' оказался бы
+    # раньше 'a-b', хотя при сравнении строк он идёт после.
+    return entry.name + '/' if entry.is_dir() else entry.name
+
+
+def walk(root, prefix=''):
+    """Файлы каталога с именами относительно root, по возрастанию."""
+    path = os.path.join(root, prefix)
+    try:
+        with os.scandir(path) as iterator:
+            entries = sorted(iterator, key=_sort_key)
+    except FileNotFoundError:
+        return
+    for entry in entries:
+        name = prefix + entry.name
+        if entry.is_dir(follow_symlinks=False):
+            yield from walk(root, name + '/')
+        elif entry.is_file(follow_symlinks=False):
+            yield name, entry
+
+
+def _heartbeat(count):
+    # Отметка прогресса продлевает задаче сборки время в статусе
+    # RUNNING, иначе долгий обход отдали бы второму воркеру.
+    if count % BATCH_SIZE == 0:
+        report_progress(count, 0)
+
+
+def orphans(root, directory, referenced, min_age=MIN_AGE):
+    """Сливает обход каталога с потоком referenced и отдаёт сирот."""
+    referenced = iter(referenced)
+    current = next(referenced, None)
+    deadline = time.time() - min_age
+    for scanned, (name, entry) in enumerate(walk(root, directory), 1):
+        _heartbeat(scanned)
+        while current is not None and current < name:
+            current = next(referenced, None)
+        if name == current:
+            continue
+        if entry.stat(follow_symlinks=False).st_mtime <= deadline:
+            yield name
+
+
+def _throttle(rate):
+    interval = 1 / rate if rate else 0
+
+    def wait():
+        if interval:
+            time.sleep(interval)
+    return wait
+
+
+def collect_images(dry_run=False, rate=0, min_age=MIN_AGE):
+    """Удаляет картинки без ссылок вместе с миниатюрами.
+
+    Генератор: отдаёт имена удалённых (или, при dry_run, найденных)
+    файлов по одному.
+    """
+    wait = _throttle(rate)
+    for name in orphans(post_image_storage.path(''), UPLOAD_TO,
+                        referenced_names(), min_age):
+        if dry_run:
+            yield name
+        elif images.discard(name):
+            # Пока шёл обход, на файл могли сослаться заново.
+            wait()
+            yield name
+
+
+def _unknown_thumbnails(names):
+    return [
+        name for name in names
+        if not default.kvstore.get(ImageFile(name, default.storage))
+    ]
+
+
+def collect_thumbnails(dry_run=False, rate=0, min_age=MIN_AGE):
+    """Удаляет файлы в каталоге миниатюр, неизвестные sorl-thumbnail."""
+    wait = _throttle(rate)
+    found = orphans(default.storage.path(''),
+                    thumbnail_settings.THUMBNAIL_PREFIX, (), min_age)
+    batch = list(itertools.islice(found, BATCH_SIZE))
+    while batch:
+        for name in _unknown_thumbnails(batch):
+            if not dry_run:
+                default.storage.delete(name)
+                wait()
+            yield name
+        batch = list(itertools.islice(found, BATCH_SIZE))
+
+
+def collect_uploads(dry_run=False, rate=0, max_age=UPLOAD_MAX_AGE):
+    """Удаляет брошенные загрузки частями и файлы .part без сессий.
+
+    Генератор: отдаёт имена удалённых (или найденных) файлов .part.
+    Файл завершённой, но не прикреплённой загрузки после удаления
+    сессии остаётся без ссылок, и его удалит collect_images.
+    """
+    wait = _throttle(rate)
+    expired = UploadSession.objects.filter(
+        created__lt=timezone.now() - timedelta(seconds=max_age))
+    sessions = expired.iterator(chunk_size=BATCH_SIZE)
+    for scanned, session in enumerate(sessions, 1):
+        _heartbeat(scanned)
+        name = f'{uploads.UPLOAD_DIR}/{session.id}.part'
+        if not dry_run:
+            uploads.reset(session)
+            session.delete()
+            wait()
+        yield name
+    # Части, сессии которых удалены вместе с пользователем.
+    live = {str(pk) for pk in UploadSession.objects.values_list(
+        'pk', flat=True)}
+    found = orphans(post_image_storage.path(''), uploads.UPLOAD_DIR + '/',
+                    (), max_age)
+    for name in found:
+        if os.path.splitext(os.path.basename(name))[0] in live:
+            continue
+        if not dry_run:
+            post_image_storage.delete(name)
+            wait()
+        yield name
@@ -1,7 +1,11 @@
+import uuid
+
 from django.db import models
 
 from django.contrib.auth import get_user_model
 
+from core.storage import post_image_storage
+
 User = get_user_model()
 
 
@@ -32,11 +36,26 @@ class Post(models.Model):
     image = models.ImageField(
         'Картинка',
         upload_to='posts/',
+        storage=post_image_storage,
         blank=True
     )
+    image_hash = models.CharField(
+        max_length=64,
+        blank=True,
+        db_index=True,
+        editable=False,
+        verbose_name='SHA-256 картинки',
+    )
+    score = models.FloatField(
+        default=0,
+        verbose_name='Популярность',
+    )
 
     class Meta:
         ordering = ['-pub_date']
+        indexes = [
+            models.Index(fields=['-score', '-pub_date'], name='post_trending'),
+        ]
 
     def __str__(self):
         return self.text[:15]
@@ -47,6 +66,20 @@ class Group(models.Model):
     title = models.CharField(max_length=200, verbose_name='Группа')
     slug = models.SlugField(unique=True, verbose_name='Код группы')
     description = models.TextField(verbose_name='Описание')
+    posts_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество постов',
+    )
+    last_post = models.ForeignKey(
+        'Post',
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        editable=False,
+        related_name='+',
+        verbose_name='Последний пост',
+    )
 
     def __str__(self):
         return f'{self.title}'
@@ -98,3 +131,92 @@ class Follow(models.Model):
 
     def __str__(self):
         return f'Подписчик: {self.user}, автор: {self.author}'
+
+
+class Recommendation(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='recommendations',
+        verbose_name='Пользователь',
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Рекомендованный автор',
+    )
+    score = models.FloatField(verbose_name='Оценка')
+
+    class Meta:
+        ordering = ['-score']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'author'], name='unique_recommendation'),
+        ]
+
+    def __str__(self):
+        return f'{self.user} → {self.author}'
+
+
+class Notification(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='notifications',
+        verbose_name='Получатель',
+    )
+    post = models.ForeignKey(
+        'Post',
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Пост',
+    )
+    created = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Дата',
+    )
+    is_read = models.BooleanField(default=False, verbose_name='Прочитано')
+
+    class Meta:
+        ordering = ['-created']
+        indexes = [
+            models.Index(fields=['user', 'is_read'], name='unread_notes'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'post'],
+                                    name='unique_notification'),
+        ]
+
+    def __str__(self):
+        return f'{self.user}: {self.post}'
+
+
+class UploadSession(models.Model):
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4,
+                          editable=False)
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='uploads',
+        verbose_name='Пользователь',
+    )
+    filename = models.CharField(max_length=255, verbose_name='Имя файла')
+    size = models.PositiveIntegerField(verbose_name='Размер')
+    received = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Получено байт',
+    )
+    sha256 = models.CharField(max_length=64, verbose_name='SHA-256')
+    stored_name = models.CharField(
+        max_length=255,
+        blank=True,
+        verbose_name='Файл в хранилище',
+    )
+    created = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Создана',
+    )
+
+    def __str__(self):
+        return f'{self.filename} ({self.received}/{self.size})'
@@ -0,0 +1,51 @@
+"""Уведомления о новых постах авторов, на которых подписан пользователь.
+
+Уведомления создаются фоновой задачей пачками. Пара (получатель, пост)
+уникальна, так что повтор задачи не создаёт дублей. Количество
+непрочитанных считается по базе и кэшируется; задача и отметка о
+прочтении не правят счётчик, а удаляют его из кэша, и следующее чтение
+считает заново.
+"""
+from django.core.cache import cache
+
+from . import follow_graph
+from .models import Notification
+
+UNREAD_KEY = 'notifications:unread:{}'
+UNREAD_TIMEOUT = 60 * 5
+BATCH_SIZE = 500
+
+
+def unread_count(user_id):
+    key = UNREAD_KEY.format(user_id)
+    count = cache.get(key)
+    if count is None:
+        count = Notification.objects.filter(
+            user_id=user_id, is_read=False).count()
+        cache.set(key, count, UNREAD_TIMEOUT)
+    return count
+
+
+def _invalidate(user_ids):
+    # Чтение, посчитавшее записи до вставки, могло положить в кэш старое
+    # значение уже после удаления; короткий UNREAD_TIMEOUT это ограничивает.
+    cache.delete_many([UNREAD_KEY.format(user_id) for user_id in user_ids])
+
+
+def notify_followers(post):
+    """Создаёт уведомления для подписчиков автора, возвращает их число."""
+    follower_ids = sorted(follow_graph.follower_ids(post.author_id))
+    for start in range(0, len(follower_ids), BATCH_SIZE):
+        batch = follower_ids[start:start + BATCH_SIZE]
+        Notification.objects.bulk_create(
+            (Notification(user_id=user_id, post=post) for user_id in batch),
+            ignore_conflicts=True,
+        )
+        _invalidate(batch)
+    return len(follower_ids)
+
+
+def mark_all_read(user_id):
+    Notification.objects.filter(user_id=user_id, is_read=False).update(
+        is_read=True)
+    _invalidate([user_id])
@@ -0,0 +1,148 @@
+"""Рекомендации авторов «На кого подписаться».
+
+Считаются пакетно по всему графу подписок и группам постов —
+периодической задачей posts.tasks.build_recommendations или командой
+build_recommendations, результат хранится в Recommendation. Авторы,
+на которых пользователь подписался после пересчёта, отсеиваются при
+выводе, поэтому сохраняется RECOMMENDATION_CANDIDATES кандидатов —
+с запасом, чтобы после нескольких подписок до пересчёта список не
+пустел. Кандидаты пользователя кэшируются под версией его
+рекомендаций (posts.fragments).
+"""
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+
+from core.tasks import report_progress
+
+from . import follow_graph, fragments
+from .models import Follow, Post, Recommendation
+
+RECOMMENDATIONS_LIMIT = 5
+RECOMMENDATION_CANDIDATES = RECOMMENDATIONS_LIMIT * 3
+CANDIDATES_KEY = 'posts:recommendations:{}:{}'
+# Веса сигналов: подписки друзей, похожие подписчики, общие группы.
+FRIENDS_OF_FRIENDS_WEIGHT = 1.0
+CO_FOLLOW_WEIGHT = 2.0
+GROUP_WEIGHT = 0.5
+SAVE_BATCH_SIZE = 500
+
+
+def load_graph():
+    """Загружает подписки и группы авторов одним проходом по таблицам."""
+    following = defaultdict(set)
+    followers = defaultdict(set)
+    for user_id, author_id in Follow.objects.values_list(
+            'user_id', 'author_id').iterator():
+        following[user_id].add(author_id)
+        followers[author_id].add(user_id)
+
+    author_groups = defaultdict(set)
+    group_authors = defaultdict(set)
+    for author_id, group_id in Post.objects.filter(
+            group__isnull=False).values_list(
+                'author_id', 'group_id').distinct().iterator():
+        author_groups[author_id].add(group_id)
+        group_authors[group_id].add(author_id)
+    return following, followers, author_groups, group_authors
+
+
+def _co_follow_scores(user_id, followed, following, followers, scores):
+    overlap = Counter()
+    for author_id in followed:
+        for other in followers.get(author_id, ()):
+            overlap[other] += 1
+    overlap.pop(user_id, None)
+    for other, common in overlap.items():
+        other_following = following[other]
+        similarity = common / len(followed | other_following)
+        for candidate in other_following:
+            scores[candidate] += CO_FOLLOW_WEIGHT * similarity
+
+
+def _group_scores(user_id, followed, author_groups, group_authors, scores):
+    groups = set(author_groups.get(user_id, ()))
+    for author_id in followed:
+        groups |= author_groups.get(author_id, set())
+    for group_id in groups:
+        for candidate in group_authors[group_id]:
+            scores[candidate] += GROUP_WEIGHT
+
+
+def score_user(user_id, following, followers, author_groups, group_authors):
+    """Возвращает список (author_id, score) лучших кандидатов."""
+    followed = following.get(user_id, set())
+    scores = Counter()
+    for author_id in followed:
+        for candidate in following.get(author_id, ()):
+            scores[candidate] += FRIENDS_OF_FRIENDS_WEIGHT
+    _co_follow_scores(user_id, followed, following, followers, scores)
+    _group_scores(user_id, followed, author_groups, group_authors, scores)
+
+    for excluded in followed | {user_id}:
+        scores.pop(excluded, None)
+    return scores.most_common(RECOMMENDATION_CANDIDATES)
+
+
+def build(user_ids, total=0):
+    """Пересчитывает рекомендации пользователей, возвращает их число.
+
+    После каждой пачки отмечает прогресс задачи, чтобы долгий пересчёт
+    не посчитали брошенным.
+    """
+    graph = load_graph()
+    count = 0
+    batch_ids = []
+    batch = []
+    for user_id in user_ids:
+        batch_ids.append(user_id)
+        batch.extend(
+            Recommendation(user_id=user_id, author_id=author_id, score=score)
+            for author_id, score in score_user(user_id, *graph)
+        )
+        if len(batch_ids) >= SAVE_BATCH_SIZE:
+            _save(batch_ids, batch)
+            count += len(batch_ids)
+            report_progress(count, max(total, count))
+            batch_ids, batch = [], []
+    if batch_ids:
+        _save(batch_ids, batch)
+        count += len(batch_ids)
+    return count
+
+
+def build_all():
+    user_ids = get_user_model().objects.order_by('id').values_list(
+        'id', flat=True)
+    return build(user_ids.iterator(), user_ids.count())
+
+
+def _save(user_ids, recommendations):
+    with transaction.atomic():
+        Recommendation.objects.filter(user_id__in=user_ids).delete()
+        Recommendation.objects.bulk_create(recommendations)
+    fragments.bump_many(fragments.RECOMMENDATIONS, user_ids)
+
+
+def _candidates(user_id):
+    key = CANDIDATES_KEY.format(user_id, fragments.versions(
+        (fragments.RECOMMENDATIONS, user_id)))
+    candidates = cache.get(key)
+    if candidates is None:
+        candidates = list(Recommendation.objects.filter(
+            user_id=user_id).select_related('author'))
+        cache.set(key, candidates, settings.FRAGMENT_CACHE_TIMEOUT)
+    return candidates
+
+
+def for_user(user):
+    if not user.is_authenticated:
+        return []
+    following = follow_graph.following_ids(user.id)
+    return [
+        recommendation for recommendation in _candidates(user.id)
+        if recommendation.author_id not in following
+    ][:RECOMMENDATIONS_LIMIT]
@@ -0,0 +1,114 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from core import events
+
+from . import follow_graph, fragments, group_stats, invalidation, trending
+from .models import Comment, Follow, Group, Post
+
+
+@receiver(post_save, sender=Follow)
+def follow_created(sender, instance, created, **kwargs):
+    if created:
+        follow_changed(instance)
+        trending.bump_latest_post(instance.author_id, trending.FOLLOW_WEIGHT)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    follow_changed(instance)
+
+
+def follow_changed(follow):
+    follow_graph.forget(follow.user_id, follow.author_id)
+    # Рекомендации отсеивают тех, на кого пользователь подписан.
+    fragments.bump(fragments.RECOMMENDATIONS, follow.user_id)
+
+
+@receiver(post_save, sender=Comment)
+def comment_created(sender, instance, created, **kwargs):
+    if not created:
+        return
+    weight = trending.COMMENT_WEIGHT
+    post_author_id = instance.post.author_id
+    if follow_graph.is_following(instance.author_id, post_author_id):
+        weight = trending.FOLLOWER_COMMENT_WEIGHT
+    trending.bump(instance.post_id, weight)
+    events.publish(f'post:{instance.post_id}', 'new_comment')
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def comment_changed(sender, instance, **kwargs):
+    with invalidation.batch() as changes:
+        changes.comment(instance.post_id)
+
+
+def _image_name(post):
+    image = post.__dict__.get('image')
+    return getattr(image, 'name', image) or ''
+
+
+@receiver(post_init, sender=Post)
+def post_loaded(sender, instance, **kwargs):
+    # Запоминаем исходные группу и картинку, чтобы при изменении
+    # пересчитать обе группы и освободить старый файл.
+    instance._initial_group_id = instance.group_id
+    instance._initial_image = _image_name(instance)
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, **kwargs):
+    with invalidation.batch() as changes:
+        changes.post(instance.id, instance.author_id,
+                     {instance._initial_group_id, instance.group_id})
+        if instance._initial_image != _image_name(instance):
+            changes.release_image(instance._initial_image)
+    instance._initial_group_id = instance.group_id
+    instance._initial_image = _image_name(instance)
+    if created:
+        events.publish('feed', 'new_post')
+        if instance.group_id:
+            events.publish(f'group:{instance.group_id}', 'new_post')
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    with invalidation.batch() as changes:
+        changes.post(instance.id, instance.author_id,
+                     {instance._initial_group_id, instance.group_id})
+        changes.release_image(_image_name(instance))
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def group_changed(sender, **kwargs):
+    group_stats.invalidate()
+    fragments.bump(fragments.GROUPS, 0)
+
+
+def _user_names(user):
+    return tuple(user.__dict__.get(field)
+                 for field in ('username', 'first_name', 'last_name'))
+
+
+@receiver(post_init, sender=get_user_model())
+def user_loaded(sender, instance, **kwargs):
+    instance._initial_names = _user_names(instance)
+
+
+@receiver(post_save, sender=get_user_model())
+def user_saved(sender, instance, update_fields=None, **kwargs):
+    # Имя автора выводится во фрагментах его профиля и постов; вход
+    # в систему меняет только last_login и, при пересчёте хеша, password
+    # и фрагменты не трогает.
+    if not update_fields or not update_fields <= {'last_login', 'password'}:
+        fragments.bump(fragments.AUTHOR, instance.id)
+    names = _user_names(instance)
+    if names != instance._initial_names:
+        # Имя видно и в карточках постов ленты и групп, а их ETag не
+        # зависит от версий авторов.
+        fragments.bump(fragments.FEED, 0)
+        fragments.bump(fragments.GROUPS, 0)
+        instance._initial_names = names
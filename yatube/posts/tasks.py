@@ -0,0 +1,88 @@
+import logging
+
+from django.conf import settings
+
+from core.tasks import periodic, task
+
+from . import (bulk, images, media_gc, notifications, recommendations,
+               trending)
+from .models import Post
+
+logger = logging.getLogger(__name__)
+
+
+@task
+def make_thumbnails(post_id):
+    """Заранее создаёт миниатюры картинки поста."""
+    post = Post.objects.filter(pk=post_id).first()
+    if post is None or not post.image:
+        return
+    images.make_thumbnails(post.image)
+
+
+@task
+def process_image(post_id, name):
+    """Обрабатывает загруженную картинку поста и создаёт миниатюры."""
+    image = images.process_post_image(post_id, name)
+    if image:
+        images.make_thumbnails(image)
+
+
+@task
+def notify_followers(post_id):
+    """Рассылает подписчикам автора уведомления о новом посте."""
+    post = Post.objects.filter(pk=post_id).first()
+    if post is not None:
+        notifications.notify_followers(post)
+
+
+@periodic('GC_MEDIA_INTERVAL')
+def collect_media():
+    """Удаляет осиротевшие картинки, миниатюры и брошенные загрузки.
+
+    Интервал и скорость удаления задают GC_MEDIA_INTERVAL и GC_MEDIA_RATE.
+    """
+    rate = settings.GC_MEDIA_RATE
+    uploads = sum(1 for _ in media_gc.collect_uploads(rate=rate))
+    removed = sum(1 for _ in media_gc.collect_images(rate=rate))
+    thumbnails = sum(1 for _ in media_gc.collect_thumbnails(rate=rate))
+    logger.info('Удалено картинок: %s, миниатюр: %s, загрузок: %s',
+                removed, thumbnails, uploads)
+
+
+@periodic('TRENDING_DECAY_INTERVAL')
+def decay_trending():
+    """Уменьшает оценки популярности постов."""
+    count = trending.decay()
+    logger.info('Оценки популярности уменьшены у %s постов', count)
+
+
+@periodic('RECOMMENDATIONS_INTERVAL')
+def build_recommendations():
+    """Пересчитывает рекомендации всех пользователей."""
+    count = recommendations.build_all()
+    logger.info('Рекомендации пересчитаны: %s польз.', count)
+
+
+@task
+def move_posts(post_ids, group_id):
+    """Переносит посты в группу пачками (действие админки)."""
+    bulk.move_posts(post_ids, group_id)
+
+
+@task
+def delete_author_posts(author_ids):
+    """Удаляет все посты авторов пачками (действие админки)."""
+    bulk.delete_author_posts(author_ids)
+
+
+@task
+def purge_author_comments(author_ids):
+    """Удаляет все комментарии авторов пачками (действие админки)."""
+    bulk.purge_author_comments(author_ids)
+
+
+@task
+def regenerate_thumbnails(post_ids):
+    """Пересоздаёт миниатюры картинок постов (действие админки)."""
+    bulk.regenerate_thumbnails(post_ids)
@@ -0,0 +1,117 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.paginators import EstimatedCountPaginator, estimated_count
+from ..admin import PostAdmin
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class AdminPerformanceTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(
+            'admin', 'admin@example.com', 'pass')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание')
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def add_rows(self, count):
+        start = User.objects.count()
+        for number in range(start, start + count):
+            author = User.objects.create_user(username=f'user{number}')
+            post = Post.objects.create(
+                author=author, group=self.group, text=f'Пост {number}')
+            Comment.objects.create(post=post, author=author, text='Текст')
+            Follow.objects.create(user=author, author=self.admin)
+
+    def changelist_queries(self, model):
+        url = reverse(f'admin:posts_{model}_changelist')
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        return len(queries)
+
+    def test_changelists_do_not_query_per_row(self):
+        """Число запросов списка не зависит от числа строк."""
+        self.add_rows(2)
+        before = {model: self.changelist_queries(model)
+                  for model in ('post', 'comment', 'follow')}
+        self.add_rows(8)
+        for model, queries in before.items():
+            with self.subTest(model=model):
+                self.assertEqual(self.changelist_queries(model), queries)
+
+    def test_group_editable_in_changelist(self):
+        """Группу поста можно сменить прямо в списке."""
+        self.add_rows(1)
+        post = Post.objects.get()
+        other = Group.objects.create(
+            title='Другая', slug='other', description='Описание')
+        url = reverse('admin:posts_post_changelist')
+        self.assertContains(self.client.get(url), 'name="form-0-group"')
+        response = self.client.post(url, {
+            'form-TOTAL_FORMS': 1, 'form-INITIAL_FORMS': 1,
+            'form-0-id': post.pk, 'form-0-group': other.pk,
+            '_save': 'Сохранить',
+        })
+        self.assertEqual(response.status_code, 302)
+        post.refresh_from_db()
+        self.assertEqual(post.group, other)
+
+    def test_text_search_limited_to_recent_rows(self):
+        """Текст ищется только среди последних записей, имя автора и
+           номер — по всей таблице."""
+        self.add_rows(3)
+        first, *_, last = Post.objects.order_by('pk')
+        url = reverse('admin:posts_post_changelist')
+        cases = (
+            (first.text, []),
+            (last.text, [last]),
+            (first.author.username, [first]),
+            (str(first.pk), [first]),
+        )
+        with mock.patch.object(PostAdmin, 'SEARCH_WINDOW', 1):
+            for term, expected in cases:
+                with self.subTest(term=term):
+                    response = self.client.get(url, {'q': term})
+                    self.assertEqual(
+                        list(response.context['cl'].result_list), expected)
+
+    def test_foreign_keys_use_autocomplete(self):
+        response = self.client.get(reverse('admin:posts_post_add'))
+        for url in ('auth/user', 'posts/group'):
+            self.assertContains(
+                response, f'data-ajax--url="/admin/{url}/autocomplete/"')
+
+    def test_exact_count_below_threshold(self):
+        """Небольшую таблицу или запрос с фильтром считаем точно."""
+        self.add_rows(3)
+        queryset = Post.objects.all()
+        self.assertEqual(estimated_count(queryset),
+                         queryset.order_by('-pk').first().pk)
+        self.assertIsNone(estimated_count(queryset.filter(text='Пост 0')))
+        self.assertEqual(EstimatedCountPaginator(queryset, 2).count, 3)
+
+    @mock.patch('core.paginators.ESTIMATE_THRESHOLD', 1)
+    def test_sqlite_estimate_without_count(self):
+        """SQLite оценивает таблицу по MAX(rowid) или sqlite_stat1."""
+        self.add_rows(3)
+        last = Post.objects.order_by('-pk').first()
+        Post.objects.exclude(pk=last.pk).delete()
+        queryset = Post.objects.all()
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(
+                EstimatedCountPaginator(queryset, 2).count, last.pk)
+        self.assertFalse(any('COUNT' in query['sql']
+                             for query in queries.captured_queries))
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        self.assertEqual(estimated_count(queryset), 1)
@@ -0,0 +1,121 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from core import tasks
+from core.models import Task
+from .. import bulk
+from ..models import Comment, Group, Post
+
+User = get_user_model()
+
+
+class BulkAdminActionsTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser(
+            'admin', 'admin@example.com', 'pass')
+        self.client.force_login(self.admin)
+        self.author = User.objects.create_user(username='author')
+        self.old_group = Group.objects.create(
+            title='Старая', slug='old', description='Описание')
+        self.new_group = Group.objects.create(
+            title='Новая', slug='new', description='Описание')
+        self.posts = [
+            Post.objects.create(author=self.author, group=self.old_group,
+                                text=f'Пост {number}')
+            for number in range(5)
+        ]
+
+    def post_action(self, model, action, objects, **data):
+        return self.client.post(
+            reverse(f'admin:posts_{model}_changelist'),
+            {'action': action,
+             '_selected_action': [obj.pk for obj in objects], **data},
+        )
+
+    def run_action(self, model, action, objects, **data):
+        response = self.post_action(model, action, objects, **data)
+        self.assertEqual(response.status_code, 302)
+        task = Task.objects.get()
+        tasks.run_pending()
+        task.refresh_from_db()
+        self.assertEqual(task.status, Task.DONE)
+        return task
+
+    def test_move_posts_in_batches(self):
+        """Перенос идёт пачками, кэши сбрасываются раз на пачку."""
+        with mock.patch.object(bulk, 'BATCH_SIZE', 2), mock.patch(
+                'posts.invalidation.group_stats.refresh') as refresh:
+            task = self.run_action('post', 'move_to_group', self.posts,
+                                   group=self.new_group.pk)
+        self.assertEqual(refresh.call_count, 3)
+        self.assertEqual((task.progress, task.total), (5, 5))
+        self.assertEqual(
+            Post.objects.filter(group=self.new_group).count(), 5)
+
+    def test_group_counters_after_move(self):
+        self.run_action('post', 'move_to_group', self.posts[:2],
+                        group=self.new_group.pk)
+        self.old_group.refresh_from_db()
+        self.new_group.refresh_from_db()
+        self.assertEqual(self.old_group.posts_count, 3)
+        self.assertEqual(self.new_group.posts_count, 2)
+
+    def test_group_pages_after_move_in_worker(self):
+        """Перенос в обработчике задач виден на страницах групп."""
+        urls = {group.slug: reverse('posts:group_list',
+                                    kwargs={'slug': group.slug})
+                for group in (self.old_group, self.new_group)}
+        etags = {slug: self.client.get(url)['ETag']
+                 for slug, url in urls.items()}
+        self.assertNotContains(self.client.get(urls['new']), 'Пост 0')
+        self.run_action('post', 'move_to_group', self.posts[:1],
+                        group=self.new_group.pk)
+        for slug, url in urls.items():
+            with self.subTest(group=slug):
+                response = self.client.get(
+                    url, HTTP_IF_NONE_MATCH=etags[slug])
+                self.assertEqual(response.status_code, 200)
+        self.assertContains(self.client.get(urls['new']), 'Пост 0')
+        self.assertNotContains(self.client.get(urls['old']), 'Пост 0')
+
+    def test_author_delete_needs_confirmation(self):
+        """Удаление всех записей авторов сначала просит подтверждения."""
+        comment = Comment.objects.create(post=self.posts[0],
+                                         author=self.author, text='Спам')
+        cases = (
+            ('post', 'delete_author_posts', self.posts[0], 5),
+            ('comment', 'purge_author_comments', comment, 1),
+        )
+        for model, action, obj, count in cases:
+            with self.subTest(action=action):
+                response = self.post_action(model, action, [obj])
+                self.assertTemplateUsed(
+                    response, 'admin/posts/confirm_author_delete.html')
+                self.assertContains(response, f'author: {count}')
+                self.assertContains(
+                    response, 'name="post" value="yes"')
+                self.assertFalse(Task.objects.exists())
+
+    def test_delete_all_posts_of_author(self):
+        """Удаляются и посты автора, которые не были выбраны."""
+        self.run_action('post', 'delete_author_posts', self.posts[:1],
+                        post='yes')
+        self.assertFalse(Post.objects.filter(author=self.author).exists())
+        self.old_group.refresh_from_db()
+        self.assertEqual(self.old_group.posts_count, 0)
+
+    def test_purge_comments_of_author(self):
+        comments = [
+            Comment.objects.create(post=post, author=self.author,
+                                   text='Спам')
+            for post in self.posts
+        ]
+        Comment.objects.create(post=self.posts[0], author=self.admin,
+                               text='Ответ')
+        self.run_action('comment', 'purge_author_comments', comments[:1],
+                        post='yes')
+        self.assertEqual(
+            list(Comment.objects.values_list('text', flat=True)), ['Ответ'])
@@ -0,0 +1,105 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from .. import fragments
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author')
+        self.reader = User.objects.create_user(username='reader')
+        self.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание')
+        self.post = Post.objects.create(
+            author=self.author, group=self.group, text='Пост')
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+        self.urls = {
+            'index': reverse('posts:index'),
+            'group': reverse('posts:group_list', kwargs={'slug': 'group'}),
+            'profile': reverse('posts:profile',
+                               kwargs={'username': 'author'}),
+            'detail': reverse('posts:post_detail',
+                              kwargs={'post_id': self.post.id}),
+        }
+
+    def etag(self, client, url):
+        return client.get(url)['ETag']
+
+    def test_not_modified_skips_render(self):
+        """Повтор с тем же ETag получает 304 без рендера шаблона."""
+        for name, url in self.urls.items():
+            with self.subTest(page=name):
+                response = self.client.get(url)
+                self.assertIn('public', response['Cache-Control'])
+                self.assertIn('Cookie', response['Vary'])
+                repeated = self.client.get(
+                    url, HTTP_IF_NONE_MATCH=response['ETag'])
+                self.assertEqual(repeated.status_code, 304)
+                self.assertEqual(repeated.templates, [])
+
+    def test_expired_version_changes_etag(self):
+        """Истёкший ключ версии даёт новый ETag, а не ложный 304."""
+        url = self.urls['profile']
+        etag = self.etag(self.client, url)
+        self.assertEqual(self.etag(self.client, url), etag)
+        cache.delete(fragments.VERSION_KEY.format(
+            fragments.AUTHOR, self.author.id))
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_author_rename_changes_feed_etags(self):
+        """Новое имя автора не прячется за 304 в ленте и группе."""
+        for name in ('index', 'group', 'profile'):
+            with self.subTest(page=name):
+                url = self.urls[name]
+                etag = self.etag(self.reader_client, url)
+                self.author.first_name = f'Новое имя {name}'
+                self.author.save()
+                response = self.reader_client.get(
+                    url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 200)
+                self.assertContains(response, f'Новое имя {name}')
+
+    def test_last_modified_for_anonymous_feed(self):
+        response = self.client.get(self.urls['index'])
+        repeated = self.client.get(
+            self.urls['index'],
+            HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(repeated.status_code, 304)
+
+    def test_private_and_personal_for_authenticated(self):
+        """Вошедшие получают private-ответ и свой ETag."""
+        response = self.reader_client.get(self.urls['index'])
+        self.assertIn('private', response['Cache-Control'])
+        self.assertNotIn('Last-Modified', response)
+        self.assertNotEqual(response['ETag'],
+                            self.etag(self.client, self.urls['index']))
+
+    def test_etag_changes_with_content(self):
+        """ETag меняется при новых постах, комментариях и подписке."""
+        before = {name: self.etag(self.reader_client, url)
+                  for name, url in self.urls.items()}
+        Post.objects.create(author=self.author, group=self.group,
+                            text='Новый')
+        for name in ('index', 'group', 'profile', 'detail'):
+            with self.subTest(page=name):
+                self.assertNotEqual(
+                    before[name],
+                    self.etag(self.reader_client, self.urls[name]))
+        detail = self.etag(self.reader_client, self.urls['detail'])
+        Comment.objects.create(post=self.post, author=self.reader,
+                               text='Комментарий')
+        self.assertNotEqual(
+            detail, self.etag(self.reader_client, self.urls['detail']))
+        profile = self.etag(self.reader_client, self.urls['profile'])
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.assertNotEqual(
+            profile, self.etag(self.reader_client, self.urls['profile']))
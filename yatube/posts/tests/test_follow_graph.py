@@ -0,0 +1,82 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .. import follow_graph
+from ..models import Follow
+
+User = get_user_model()
+
+
+class FollowGraphTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.follower = User.objects.create_user(username='follower')
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.follower)
+
+    def test_follow_views_update_graph(self):
+        """Подписка и отписка сразу отражаются в графе в кэше."""
+        self.assertFalse(
+            follow_graph.is_following(self.follower.id, self.author.id))
+        self.authorized_client.get(reverse(
+            'posts:profile_follow', kwargs={'username': self.author}))
+        self.assertTrue(
+            follow_graph.is_following(self.follower.id, self.author.id))
+        self.assertEqual(
+            follow_graph.follower_ids(self.author.id), {self.follower.id})
+        self.authorized_client.get(reverse(
+            'posts:profile_unfollow', kwargs={'username': self.author}))
+        self.assertEqual(follow_graph.following_count(self.follower.id), 0)
+        self.assertEqual(follow_graph.followers_count(self.author.id), 0)
+
+    def test_profile_uses_cached_graph(self):
+        """Страница профиля не обращается к Follow при заполненном кэше."""
+        follow_graph.following_ids(self.follower.id)
+        with CaptureQueriesContext(connection) as queries:
+            self.authorized_client.get(reverse(
+                'posts:profile', kwargs={'username': self.author}))
+        self.assertFalse(
+            any('posts_follow' in query['sql'] for query in queries))
+
+    def test_mutual_ids(self):
+        Follow.objects.create(user=self.follower, author=self.author)
+        Follow.objects.create(user=self.author, author=self.follower)
+        self.assertEqual(
+            follow_graph.mutual_ids(self.author.id), {self.follower.id})
+
+    def test_rebuild_command(self):
+        """Команда rebuild_follow_graph восстанавливает устаревший кэш."""
+        follow_graph.following_ids(self.follower.id)
+        Follow.objects.bulk_create(
+            [Follow(user=self.follower, author=self.author)])
+        self.assertFalse(
+            follow_graph.is_following(self.follower.id, self.author.id))
+        call_command('rebuild_follow_graph', stdout=StringIO())
+        self.assertTrue(
+            follow_graph.is_following(self.follower.id, self.author.id))
+
+    def test_concurrent_follows_are_not_lost(self):
+        """Подписки не теряются, даже если множество собрано до них."""
+        other = User.objects.create_user(username='other_follower')
+        follower_ids = follow_graph.follower_ids(self.author.id)
+        generation = cache.get(
+            follow_graph.GENERATION_KEY.format(self.author.id))
+        Follow.objects.create(user=self.follower, author=self.author)
+        Follow.objects.create(user=other, author=self.author)
+        # Запоздавшая запись старого множества из другого процесса.
+        cache.set(follow_graph.FOLLOWERS_KEY.format(
+            self.author.id, generation), follower_ids)
+        self.assertEqual(follow_graph.follower_ids(self.author.id),
+                         {self.follower.id, other.id})
@@ -1,12 +1,21 @@
+import hashlib
 import shutil
 import tempfile
 import random
+from io import BytesIO
+
+from PIL import Image
 from django.contrib.auth import get_user_model
 from ..forms import PostForm, CommentForm
+from ..images import MAX_IMAGE_SIZE, release
 from ..models import Group, Post, Comment
+from core import tasks
+from core.models import Task
+from core.storage import REUSE_KEY, content_name
 from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 from django.conf import settings
+from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
 
 
@@ -82,9 +91,13 @@ class PostCreateFormTests(TestCase):
                 text='Тестовый пост про самолёты!',
                 group=self.group.id,
                 author=self.user.id,
-                image='posts/small.gif',
+                image=content_name(
+                    'posts', hashlib.sha256(small_gif).hexdigest(), '.gif'),
             ).exists()
         )
+        self.assertTrue(
+            Task.objects.filter(name='posts.tasks.process_image').exists()
+        )
 
     def test_edit_post(self):
         """Валидная форма редактирует запись в Post."""
@@ -173,3 +186,96 @@ class CommentCreateFormTests(TestCase):
                 post=random_post_id,
             ).exists()
         )
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class PostImageProcessingTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='system')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def make_jpeg(self, name):
+        exif = Image.Exif()
+        exif[0x010F] = 'Камера'
+        output = BytesIO()
+        Image.new('RGB', (4000, 1000), 'red').save(
+            output, 'JPEG', exif=exif.tobytes())
+        return SimpleUploadedFile(name, output.getvalue(),
+                                  content_type='image/jpeg')
+
+    def test_image_downscaled_without_exif(self):
+        """Большая картинка уменьшается, EXIF удаляется — в фоне."""
+        self.authorized_client.post(reverse('posts:post_create'), {
+            'text': 'Пост с большой картинкой',
+            'image': self.make_jpeg('big.jpg'),
+        })
+        post = Post.objects.get(text='Пост с большой картинкой')
+        self.assertEqual(Image.open(post.image).size[0], 4000)
+        raw_name = post.image.name
+        tasks.run_pending()
+        post.refresh_from_db()
+        self.assertNotEqual(post.image.name, raw_name)
+        image = Image.open(post.image)
+        self.assertEqual(image.size[0], MAX_IMAGE_SIZE[0])
+        self.assertFalse(image.getexif())
+        self.assertEqual(len(post.image_hash), 64)
+
+    def test_identical_images_share_file(self):
+        """Одинаковые картинки разных постов хранятся одним файлом."""
+        for number in range(2):
+            self.authorized_client.post(reverse('posts:post_create'), {
+                'text': f'Пост {number}',
+                'image': self.make_jpeg(f'same_{number}.jpg'),
+            })
+        tasks.run_pending()
+        first, second = Post.objects.order_by('pk')
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertEqual(first.image_hash, second.image_hash)
+
+    def test_file_released_with_last_reference(self):
+        """Файл удаляется, только когда на него не ссылается ни один пост."""
+        for number in range(2):
+            self.authorized_client.post(reverse('posts:post_create'), {
+                'text': f'Пост {number}',
+                'image': self.make_jpeg(f'same_{number}.jpg'),
+            })
+        tasks.run_pending()
+        first, second = Post.objects.order_by('pk')
+        storage = first.image.storage
+        name = first.image.name
+        first.delete()
+        self.assertFalse(release(name))
+        self.assertTrue(storage.exists(name))
+        second.delete()
+        # Второй пост взял готовый файл, и пока метка повторного
+        # использования жива, файл не удаляется.
+        self.assertFalse(release(name))
+        cache.delete(REUSE_KEY.format(name))
+        self.assertTrue(release(name))
+        self.assertFalse(storage.exists(name))
+
+    def test_repeated_processing_is_noop(self):
+        """Повтор задачи после обработки не трогает картинку поста."""
+        self.authorized_client.post(reverse('posts:post_create'), {
+            'text': 'Пост с картинкой',
+            'image': self.make_jpeg('big.jpg'),
+        })
+        task_obj = Task.objects.get(name='posts.tasks.process_image')
+        tasks.run_pending()
+        post = Post.objects.get(text='Пост с картинкой')
+        processed_name = post.image.name
+        Task.objects.filter(pk=task_obj.pk).update(status=Task.PENDING)
+        tasks.run_pending()
+        post.refresh_from_db()
+        self.assertEqual(post.image.name, processed_name)
@@ -0,0 +1,86 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.test import Client, TestCase, TransactionTestCase
+from django.urls import reverse
+
+from .. import fragments
+from ..models import Comment, Follow, Post
+
+User = get_user_model()
+
+
+class FragmentCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author')
+        self.reader = User.objects.create_user(username='reader')
+        self.post = Post.objects.create(author=self.author, text='Первый')
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+        self.profile_url = reverse(
+            'posts:profile', kwargs={'username': 'author'})
+        self.detail_url = reverse(
+            'posts:post_detail', kwargs={'post_id': self.post.id})
+
+    def test_shared_body_cached_until_post_changes(self):
+        """Тело страницы берётся из кэша, пока пост не сохранён снова."""
+        for url in (self.profile_url, self.detail_url):
+            self.assertContains(self.reader_client.get(url), 'Первый')
+        Post.objects.filter(pk=self.post.pk).update(text='Без сигнала')
+        for url in (self.profile_url, self.detail_url):
+            self.assertContains(self.reader_client.get(url), 'Первый')
+        self.post.text = 'Второй'
+        self.post.save()
+        for url in (self.profile_url, self.detail_url):
+            self.assertContains(self.reader_client.get(url), 'Второй')
+
+    def test_expired_version_starts_over(self):
+        """После истечения ключа версии старые фрагменты не читаются."""
+        self.assertContains(
+            self.reader_client.get(self.profile_url), 'Первый')
+        Post.objects.filter(pk=self.post.pk).update(text='Без сигнала')
+        cache.delete(fragments.VERSION_KEY.format(
+            fragments.AUTHOR, self.author.id))
+        self.assertContains(
+            self.reader_client.get(self.profile_url), 'Без сигнала')
+
+    def test_follow_button_rendered_per_user(self):
+        """Кнопка подписки своя у каждого, хотя список постов общий."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.assertContains(
+            self.reader_client.get(self.profile_url), 'Отписаться')
+        other = Client()
+        other.force_login(User.objects.create_user(username='other'))
+        response = other.get(self.profile_url)
+        self.assertContains(response, 'Подписаться')
+        self.assertNotContains(response, 'Отписаться')
+
+    def test_comments_and_personal_parts_of_post_page(self):
+        """Новый комментарий виден сразу, форма и правка — по правам."""
+        self.reader_client.get(self.detail_url)
+        Comment.objects.create(
+            post=self.post, author=self.reader, text='Комментарий')
+        response = self.reader_client.get(self.detail_url)
+        self.assertContains(response, 'Комментарий')
+        self.assertContains(response, 'Добавить комментарий')
+        self.assertNotContains(response, 'Редактировать запись')
+        self.assertContains(
+            self.author_client.get(self.detail_url), 'Редактировать запись')
+        self.assertNotContains(
+            Client().get(self.detail_url), 'Добавить комментарий')
+
+
+class CommitInvalidationTests(TransactionTestCase):
+    def test_versions_bumped_again_after_commit(self):
+        """Версия, прочитанная до фиксации, после неё уже устарела."""
+        author = User.objects.create_user(username='author')
+        key = (fragments.AUTHOR, author.id)
+        with transaction.atomic():
+            Post.objects.create(author=author, text='Пост')
+            # Так читатель из другого процесса заводит новую версию,
+            # ещё не видя поста.
+            before_commit = fragments.versions(key)
+        self.assertNotEqual(fragments.versions(key), before_commit)
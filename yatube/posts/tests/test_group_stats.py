@@ -0,0 +1,70 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Group, Post
+
+User = get_user_model()
+
+
+class GroupDirectoryTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='system')
+        cls.group = Group.objects.create(
+            title='Тестовая группа про самолёты',
+            slug='airplane',
+            description='Описание новой группы про самолёты!',
+        )
+        cls.other_group = Group.objects.create(
+            title='Тестовая группа про поезда',
+            slug='train',
+            description='Описание новой группы про поезда!',
+        )
+        cls.post = Post.objects.create(
+            author=cls.user,
+            group=cls.group,
+            text='Тестовый текст поста про самолёты!',
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_group_index_shows_stats(self):
+        """Страница групп показывает количество постов группы."""
+        response = self.guest_client.get(reverse('posts:group_index'))
+        self.assertTemplateUsed(response, 'posts/group_index.html')
+        groups = {group.slug: group for group in response.context['groups']}
+        self.assertEqual(groups['airplane'].posts_count, 1)
+        self.assertEqual(groups['airplane'].last_post, self.post)
+        self.assertEqual(groups['train'].posts_count, 0)
+
+    def test_group_index_is_cached(self):
+        """Повторная страница групп не обращается к таблицам постов."""
+        self.guest_client.get(reverse('posts:group_index'))
+        with CaptureQueriesContext(connection) as queries:
+            self.guest_client.get(reverse('posts:group_index'))
+        self.assertFalse(
+            any('posts_' in query['sql'] for query in queries))
+
+    def test_moving_post_updates_both_groups(self):
+        """Перенос поста в другую группу обновляет обе группы и кэш."""
+        self.guest_client.get(reverse('posts:group_index'))
+        post = Post.objects.get(pk=self.post.pk)
+        post.group = self.other_group
+        post.save()
+        response = self.guest_client.get(reverse('posts:group_index'))
+        groups = {group.slug: group for group in response.context['groups']}
+        self.assertEqual(groups['airplane'].posts_count, 0)
+        self.assertIsNone(groups['airplane'].last_post)
+        self.assertEqual(groups['train'].posts_count, 1)
+
+    def test_deleting_post_updates_group(self):
+        Post.objects.get(pk=self.post.pk).delete()
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.posts_count, 0)
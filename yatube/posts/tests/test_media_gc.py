@@ -0,0 +1,101 @@
+import os
+import shutil
+import tempfile
+import time
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from core.storage import post_image_storage
+from .. import media_gc, uploads
+from ..models import Post, UploadSession
+
+User = get_user_model()
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class MediaGarbageCollectorTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def save(self, content):
+        return post_image_storage.save('posts/image.gif',
+                                       ContentFile(content))
+
+    def test_walk_matches_string_order(self):
+        """Обход каталога идёт в порядке сравнения строк."""
+        for name in ('posts/a-b', 'posts/a/b', 'posts/a/a/c', 'posts/ab'):
+            path = os.path.join(TEMP_MEDIA_ROOT, 'walk', name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            open(path, 'w').close()
+        names = [name for name, _ in media_gc.walk(
+            os.path.join(TEMP_MEDIA_ROOT, 'walk'), 'posts/')]
+        self.assertEqual(names, sorted(names))
+        self.assertEqual(len(names), 4)
+
+    def test_only_orphans_removed(self):
+        """Удаляются только файлы без ссылок; dry-run ничего не трогает."""
+        kept = self.save(b'kept')
+        orphan = self.save(b'orphan')
+        Post.objects.create(author=self.user, text='Пост', image=kept)
+        call_command('gc_media', dry_run=True, min_age=0,
+                     stdout=open(os.devnull, 'w'))
+        self.assertTrue(post_image_storage.exists(orphan))
+        removed = list(media_gc.collect_images(min_age=0))
+        self.assertEqual(removed, [orphan])
+        self.assertFalse(post_image_storage.exists(orphan))
+        self.assertTrue(post_image_storage.exists(kept))
+
+    def test_recent_files_kept(self):
+        """Свежие файлы ждут, пока их пост не будет сохранён."""
+        orphan = self.save(b'fresh')
+        self.assertEqual(list(media_gc.collect_images()), [])
+        self.assertTrue(post_image_storage.exists(orphan))
+
+    def test_unknown_thumbnails_removed(self):
+        """Миниатюры, о которых не знает sorl-thumbnail, удаляются."""
+        post = Post.objects.create(
+            author=self.user, text='Пост', image=self.save(b'x' * 10))
+        stray = post_image_storage.save('cache/ab/cd/stray.jpg',
+                                        ContentFile(b'stray'))
+        removed = list(media_gc.collect_thumbnails(min_age=0))
+        self.assertEqual(removed, [stray])
+        self.assertTrue(post_image_storage.exists(post.image.name))
+
+    def test_abandoned_uploads_removed(self):
+        """Старые сессии загрузки и части без сессий удаляются."""
+        old, fresh = (
+            UploadSession.objects.create(
+                user=self.user, filename='a.gif', size=10, sha256='0' * 64)
+            for _ in range(2)
+        )
+        UploadSession.objects.filter(pk=old.pk).update(
+            created=timezone.now() - timedelta(days=2))
+        for session in (old, fresh):
+            with open(uploads.part_path(session), 'wb') as part:
+                part.write(b'part')
+        stray = uploads.part_path(UploadSession(id=uuid.uuid4()))
+        open(stray, 'wb').close()
+        stale = time.time() - 2 * media_gc.UPLOAD_MAX_AGE
+        os.utime(stray, (stale, stale))
+        removed = list(media_gc.collect_uploads())
+        self.assertCountEqual(removed, [
+            f'uploads/{old.id}.part', 'uploads/' + os.path.basename(stray)])
+        self.assertEqual(list(UploadSession.objects.all()), [fresh])
+        self.assertFalse(os.path.exists(uploads.part_path(old)))
+        self.assertFalse(os.path.exists(stray))
+        self.assertTrue(os.path.exists(uploads.part_path(fresh)))
@@ -0,0 +1,64 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from core import tasks
+from core.models import Task
+from .. import notifications
+from ..models import Follow, Notification
+
+User = get_user_model()
+
+
+class NotificationTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.follower = User.objects.create_user(username='follower')
+        cls.stranger = User.objects.create_user(username='stranger')
+        Follow.objects.create(user=cls.follower, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+        self.follower_client = Client()
+        self.follower_client.force_login(self.follower)
+
+    def test_new_post_notifies_followers(self):
+        """Новый пост создаёт уведомления только для подписчиков."""
+        self.author_client.post(
+            reverse('posts:post_create'), data={'text': 'Новый пост'})
+        self.assertEqual(Notification.objects.count(), 0)
+        tasks.run_pending()
+        self.assertEqual(
+            list(Notification.objects.values_list('user', flat=True)),
+            [self.follower.id],
+        )
+        response = self.follower_client.get(reverse('posts:index'))
+        self.assertContains(response, 'badge-danger')
+
+    def test_notifications_page_marks_read(self):
+        self.author_client.post(
+            reverse('posts:post_create'), data={'text': 'Новый пост'})
+        tasks.run_pending()
+        response = self.follower_client.get(reverse('posts:notifications'))
+        self.assertContains(response, 'Новый пост')
+        self.assertFalse(
+            Notification.objects.filter(is_read=False).exists())
+        response = self.follower_client.get(reverse('posts:index'))
+        self.assertNotContains(response, 'badge-danger')
+
+    def test_repeated_task_does_not_duplicate(self):
+        """Повтор рассылки не создаёт второго уведомления."""
+        self.follower_client.get(reverse('posts:index'))
+        self.author_client.post(
+            reverse('posts:post_create'), data={'text': 'Новый пост'})
+        tasks.run_pending()
+        Task.objects.filter(name='posts.tasks.notify_followers').update(
+            status=Task.PENDING)
+        tasks.run_pending()
+        self.assertEqual(Notification.objects.count(), 1)
+        self.assertEqual(notifications.unread_count(self.follower.id), 1)
@@ -0,0 +1,101 @@
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from core import tasks
+from core.models import Task
+from core.tasks import schedule
+from .. import recommendations
+from ..models import Follow, Group, Post, Recommendation
+from ..tasks import build_recommendations
+
+User = get_user_model()
+
+
+class RecommendationTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='reader')
+        cls.friend = User.objects.create_user(username='friend')
+        cls.friend_of_friend = User.objects.create_user(username='fof')
+        cls.group_author = User.objects.create_user(username='group_author')
+        cls.group = Group.objects.create(
+            title='Тестовая группа про самолёты',
+            slug='airplane',
+            description='Описание новой группы про самолёты!',
+        )
+        Follow.objects.create(user=cls.user, author=cls.friend)
+        Follow.objects.create(user=cls.friend, author=cls.friend_of_friend)
+        Post.objects.create(
+            author=cls.friend, group=cls.group, text='Пост друга')
+        Post.objects.create(
+            author=cls.group_author, group=cls.group, text='Пост группы')
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_build_recommendations(self):
+        """Рекомендуются подписки друзей и авторы общих групп,
+           но не сам пользователь и не те, на кого он уже подписан."""
+        call_command('build_recommendations', stdout=StringIO())
+        recommended = list(
+            Recommendation.objects.filter(user=self.user).values_list(
+                'author__username', flat=True)
+        )
+        self.assertEqual(recommended, ['fof', 'group_author'])
+
+    def test_recommendations_shown_on_follow_page(self):
+        call_command('build_recommendations', stdout=StringIO())
+        response = self.authorized_client.get(reverse('posts:follow_index'))
+        self.assertContains(response, 'На кого подписаться')
+        self.assertEqual(len(response.context['recommendations']), 2)
+
+    def test_followed_authors_are_hidden(self):
+        """Автор, на которого подписались после пересчёта, не выводится."""
+        call_command('build_recommendations', stdout=StringIO())
+        Follow.objects.create(user=self.user, author=self.friend_of_friend)
+        recommended = [recommendation.author for recommendation
+                       in recommendations.for_user(self.user)]
+        self.assertEqual(recommended, [self.group_author])
+
+    def test_list_stays_full_after_follow(self):
+        """После подписки на рекомендованного автора его место занимает
+           следующий кандидат, а не пустота до пересчёта."""
+        for number in range(recommendations.RECOMMENDATIONS_LIMIT + 1):
+            author = User.objects.create_user(username=f'extra{number}')
+            Post.objects.create(author=author, group=self.group, text='Пост')
+        call_command('build_recommendations', stdout=StringIO())
+        shown = recommendations.for_user(self.user)
+        self.assertEqual(len(shown), recommendations.RECOMMENDATIONS_LIMIT)
+        Follow.objects.create(user=self.user, author=shown[0].author)
+        shown_after = recommendations.for_user(self.user)
+        self.assertEqual(len(shown_after),
+                         recommendations.RECOMMENDATIONS_LIMIT)
+        self.assertNotIn(shown[0].author,
+                         [item.author for item in shown_after])
+
+    def test_task_reschedules_itself(self):
+        schedule(build_recommendations, 0)
+        tasks.run_pending()
+        self.assertEqual(Recommendation.objects.filter(user=self.user).count(),
+                         2)
+        self.assertTrue(Task.objects.filter(
+            name=build_recommendations.task_name,
+            status=Task.PENDING).exists())
+
+    def test_task_reports_progress(self):
+        """Пересчёт отмечает прогресс, чтобы его не сочли брошенным."""
+        schedule(build_recommendations, 0)
+        with mock.patch.object(recommendations, 'SAVE_BATCH_SIZE', 1):
+            tasks.run_pending()
+        task_obj = Task.objects.get(status=Task.DONE)
+        self.assertEqual(task_obj.total, User.objects.count())
+        self.assertEqual(task_obj.progress, task_obj.total)
@@ -0,0 +1,78 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from core import tasks
+from core.models import Task
+from core.tasks import schedule
+from .. import trending
+from ..models import Follow, Post
+from ..tasks import decay_trending
+
+User = get_user_model()
+
+
+class TrendingTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.old_post = Post.objects.create(
+            author=cls.author, text='Обсуждаемый пост')
+        cls.new_post = Post.objects.create(
+            author=cls.author, text='Свежий пост')
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.reader)
+
+    def test_comment_raises_post_in_trending(self):
+        """Комментарий поднимает пост на странице популярного."""
+        self.authorized_client.post(
+            reverse('posts:add_comment',
+                    kwargs={'post_id': self.old_post.id}),
+            data={'text': 'Комментарий'},
+        )
+        self.old_post.refresh_from_db()
+        self.assertEqual(self.old_post.score, trending.COMMENT_WEIGHT)
+        response = self.authorized_client.get(reverse('posts:trending'))
+        self.assertEqual(response.context['page_obj'][0], self.old_post)
+
+    def test_follower_comment_weighs_more(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        Post.objects.update(score=0)
+        self.authorized_client.post(
+            reverse('posts:add_comment',
+                    kwargs={'post_id': self.old_post.id}),
+            data={'text': 'Комментарий подписчика'},
+        )
+        self.old_post.refresh_from_db()
+        self.assertEqual(
+            self.old_post.score, trending.FOLLOWER_COMMENT_WEIGHT)
+
+    def test_decay_command(self):
+        Post.objects.filter(pk=self.old_post.pk).update(score=4)
+        call_command('decay_trending', '--factor', '0.5', stdout=StringIO())
+        self.old_post.refresh_from_db()
+        self.assertEqual(self.old_post.score, 2)
+
+    def test_decay_task_reschedules_itself(self):
+        Post.objects.filter(pk=self.old_post.pk).update(score=4)
+        schedule(decay_trending, 0)
+        tasks.run_pending()
+        self.old_post.refresh_from_db()
+        self.assertEqual(self.old_post.score, 4 * trending.DECAY_FACTOR)
+        self.assertTrue(Task.objects.filter(
+            name=decay_trending.task_name, status=Task.PENDING).exists())
+
+    def test_post_without_group_has_read_link(self):
+        """Карточка поста без группы тоже ведёт на страницу поста."""
+        response = self.authorized_client.get(reverse('posts:trending'))
+        self.assertContains(response, reverse(
+            'posts:post_detail', kwargs={'post_id': self.old_post.id}))
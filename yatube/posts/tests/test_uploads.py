@@ -0,0 +1,107 @@
+import hashlib
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core.storage import content_name
+from .. import uploads
+from ..models import Post, UploadSession
+
+User = get_user_model()
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ChunkedUploadTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='system')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def start_upload(self, content, sha256=None):
+        url = reverse('posts:upload_create')
+        response = self.authorized_client.post(url, {
+            'filename': 'chunked.gif',
+            'size': len(content),
+            'sha256': sha256 or hashlib.sha256(content).hexdigest(),
+        })
+        self.assertEqual(response.status_code, 201)
+        return reverse('posts:upload_chunk',
+                       kwargs={'upload_id': response.json()['id']})
+
+    def send_chunk(self, url, offset, chunk):
+        return self.authorized_client.post(
+            url, chunk, content_type='application/octet-stream',
+            HTTP_UPLOAD_OFFSET=str(offset),
+        )
+
+    def test_chunked_upload_attached_to_post(self):
+        """Файл, загруженный частями, прикрепляется к новому посту."""
+        url = self.start_upload(SMALL_GIF)
+        self.assertEqual(self.send_chunk(url, 0, SMALL_GIF[:20]).json(),
+                         {'offset': 20, 'complete': False})
+        # Повтор части с неверным смещением сообщает, откуда продолжить.
+        response = self.send_chunk(url, 0, SMALL_GIF[:20])
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['offset'], 20)
+        self.assertTrue(
+            self.send_chunk(url, 20, SMALL_GIF[20:]).json()['complete'])
+
+        upload_id = url.rstrip('/').rsplit('/', 1)[-1]
+        self.authorized_client.post(reverse('posts:post_create'), {
+            'text': 'Пост с загруженной картинкой',
+            'upload': upload_id,
+        })
+        post = Post.objects.get(text='Пост с загруженной картинкой')
+        self.assertEqual(post.image.name, content_name(
+            'posts', hashlib.sha256(SMALL_GIF).hexdigest(), '.gif'))
+        self.assertEqual(post.image.read(), SMALL_GIF)
+        self.assertFalse(UploadSession.objects.exists())
+
+    def test_checksum_mismatch_rejected(self):
+        url = self.start_upload(SMALL_GIF, sha256='0' * 64)
+        response = self.send_chunk(url, 0, SMALL_GIF)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['offset'], 0)
+
+    def test_foreign_upload_not_found(self):
+        url = self.start_upload(SMALL_GIF)
+        other_client = Client()
+        other_client.force_login(User.objects.create_user(username='other'))
+        self.assertEqual(other_client.get(url).status_code, 404)
+
+    def test_non_image_upload_can_restart(self):
+        """Не-картинка отклоняется, а загрузку можно начать заново."""
+        content = b'not an image at all'
+        url = self.start_upload(content)
+        response = self.send_chunk(url, 0, content)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['offset'], 0)
+        session = UploadSession.objects.get()
+        self.assertEqual(session.received, 0)
+        self.assertFalse(os.path.exists(uploads.part_path(session)))
+        self.assertEqual(self.send_chunk(url, 0, content).status_code, 409)
@@ -4,9 +4,11 @@ from django.urls import reverse
 from django import forms
 from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
+import hashlib
 import tempfile
 import shutil
 from django.conf import settings
+from core.storage import content_name
 from ..models import Group, Post, Follow
 
 User = get_user_model()
@@ -37,6 +39,8 @@ class PostViewsTests(TestCase):
             content=small_gif,
             content_type='image/gif'
         )
+        cls.image_name = content_name(
+            'posts', hashlib.sha256(small_gif).hexdigest(), '.gif')
         cls.post = Post.objects.create(
             author=cls.user,
             group=cls.group,
@@ -92,7 +96,7 @@ class PostViewsTests(TestCase):
         self.assertEqual(first_object.group.title,
                          'Тестовая группа про самолёты')
         self.assertEqual(first_object.image,
-                         'posts/small.gif')
+                         self.image_name)
 
     def test_group_list_correct_context(self):
         """Шаблон group_list.html сформирован с правильным контекстом."""
@@ -105,7 +109,7 @@ class PostViewsTests(TestCase):
         self.assertEqual(first_object.group.title,
                          'Тестовая группа про самолёты')
         self.assertEqual(first_object.image,
-                         'posts/small.gif')
+                         self.image_name)
 
     def test_profile_list_page_show_correct_context(self):
         """Шаблон profile.html сформирован с правильным контекстом."""
@@ -117,7 +121,7 @@ class PostViewsTests(TestCase):
         self.assertEqual(first_object.group.title,
                          'Тестовая группа про самолёты')
         self.assertEqual(first_object.image,
-                         'posts/small.gif')
+                         self.image_name)
 
     def test_post_detail_list_page_show_correct_context(self):
         """Шаблон post_detail.html сформирован с правильным контекстом."""
@@ -127,7 +131,7 @@ class PostViewsTests(TestCase):
         self.assertEqual(response.context.get('post_list').text,
                          self.post.text)
         self.assertEqual(response.context.get('post_list').image,
-                         'posts/small.gif')
+                         self.image_name)
 
     def test_post_edit_list_page_show_correct_context(self):
         """Шаблон create_post.html редактирование поста
@@ -294,6 +298,7 @@ class FollowTests(TestCase):
                                                author=cls.followed,)
 
     def setUp(self):
+        cache.clear()
         self.guest_client = Client()
         self.authorized_client = Client()
         self.authorized_client.force_login(self.follower)
@@ -340,3 +345,43 @@ class FollowTests(TestCase):
 
         response = self.authorized_client.get(reverse('posts:follow_index'))
         self.assertNotContains(response, 'Пост тест!',)
+
+
+class PageQueriesTests(TestCase):
+    # Запросов на страницу при прогретом кэше у вошедшего читателя; в
+    # версии без кэшей их было 5, 6, 9, 7 и 4.
+    PAGE_QUERIES = {
+        'posts:index': 4,
+        'posts:group_list': 6,
+        'posts:profile': 5,
+        'posts:post_detail': 4,
+        'posts:follow_index': 4,
+    }
+
+    def setUp(self):
+        cache.clear()
+        author = User.objects.create_user(username='author')
+        reader = User.objects.create_user(username='reader')
+        group = Group.objects.create(
+            title='Группа', slug='group', description='Описание')
+        post = Post.objects.create(author=author, group=group, text='Пост')
+        Follow.objects.create(user=reader, author=author)
+        self.client.force_login(reader)
+        self.urls = {
+            'posts:index': reverse('posts:index'),
+            'posts:group_list': reverse(
+                'posts:group_list', kwargs={'slug': 'group'}),
+            'posts:profile': reverse(
+                'posts:profile', kwargs={'username': 'author'}),
+            'posts:post_detail': reverse(
+                'posts:post_detail', kwargs={'post_id': post.id}),
+            'posts:follow_index': reverse('posts:follow_index'),
+        }
+
+    def test_cached_pages_do_not_add_queries(self):
+        """Кэш не добавляет страницам запросов к базе."""
+        for name, url in self.urls.items():
+            with self.subTest(page=name):
+                self.client.get(url)
+                with self.assertNumQueries(self.PAGE_QUERIES[name]):
+                    self.assertEqual(self.client.get(url).status_code, 200)
@@ -0,0 +1,42 @@
+"""Популярные посты.
+
+У каждого поста есть индексированное поле score. Оно увеличивается
+атомарным UPDATE при новом комментарии или подписке на автора и
+периодически уменьшается задачей posts.tasks.decay_trending, поэтому свежая
+активность весит больше старой. Страница популярного читает готовый
+отсортированный индекс, без агрегации по Comment.
+"""
+from django.db.models import F
+
+from .models import Post
+
+COMMENT_WEIGHT = 1.0
+# Комментарий подписчика автора — более сильный сигнал вовлечённости.
+FOLLOWER_COMMENT_WEIGHT = 2.0
+FOLLOW_WEIGHT = 0.5
+DECAY_FACTOR = 0.5
+MIN_SCORE = 0.01
+
+
+def bump(post_id, weight):
+    Post.objects.filter(pk=post_id).update(score=F('score') + weight)
+
+
+def bump_latest_post(author_id, weight):
+    latest = Post.objects.filter(author_id=author_id).values_list(
+        'pk', flat=True).first()
+    if latest is not None:
+        bump(latest, weight)
+
+
+def decay(factor=DECAY_FACTOR):
+    """Уменьшает все ненулевые оценки, возвращает число постов."""
+    updated = Post.objects.filter(score__gt=0).update(
+        score=F('score') * factor)
+    Post.objects.filter(score__gt=0, score__lt=MIN_SCORE).update(score=0)
+    return updated
+
+
+def trending_posts():
+    return Post.objects.select_related('author', 'group').order_by(
+        '-score', '-pub_date')
@@ -0,0 +1,139 @@
+"""Докачиваемая загрузка картинок частями.
+
+Клиент создаёт сессию загрузки с именем, размером и SHA-256 файла,
+затем отправляет части с заголовком Upload-Offset. Каждая часть
+читается из запроса блоками CHUNK_SIZE и дописывается в файл
+MEDIA_ROOT/uploads/<id>.part, так что в памяти воркера не бывает
+больше одного блока. После последней части контрольная сумма
+проверяется, а файл переносится в posts/ без копирования и
+прикрепляется к Post.image по имени. Обрабатывает картинку, как и
+картинки из формы, фоновая задача (см. posts.images).
+"""
+import hashlib
+import os
+import uuid
+
+from django.conf import settings
+from django.core.files import File
+
+from core.storage import post_image_storage
+
+from . import images
+from .models import UploadSession
+
+CHUNK_SIZE = 64 * 1024
+UPLOAD_DIR = 'uploads'
+UPLOAD_TO = 'posts/'
+
+
+class UploadError(Exception):
+    pass
+
+
+class PartFile(File):
+    """Готовый файл; FileSystemStorage перемещает его, а не копирует."""
+
+    def temporary_file_path(self):
+        return self.file.name
+
+
+def max_upload_size():
+    return getattr(settings, 'MAX_UPLOAD_SIZE', 20 * 1024 * 1024)
+
+
+def part_path(session):
+    directory = os.path.join(settings.MEDIA_ROOT, UPLOAD_DIR)
+    os.makedirs(directory, exist_ok=True)
+    return os.path.join(directory, f'{session.id}.part')
+
+
+def create_session(user, filename, size, sha256):
+    if not 0 < size <= max_upload_size():
+        raise UploadError('Недопустимый размер файла.')
+    if len(sha256) != 64:
+        raise UploadError('Нужна контрольная сумма SHA-256.')
+    return UploadSession.objects.create(
+        user=user,
+        filename=os.path.basename(filename)[:255],
+        size=size,
+        sha256=sha256.lower(),
+    )
+
+
+def append_chunk(session, offset, stream, length):
+    """Дописывает часть из stream, возвращает новое смещение."""
+    if session.stored_name:
+        raise UploadError('Загрузка уже завершена.')
+    if offset != session.received:
+        raise UploadError('Неверное смещение.')
+    if offset + length > session.size:
+        raise UploadError('Часть выходит за размер файла.')
+    written = 0
+    with open(part_path(session), 'ab') as part:
+        part.truncate(offset)
+        while written < length:
+            block = stream.read(min(CHUNK_SIZE, length - written))
+            if not block:
+                break
+            part.write(block)
+            written += len(block)
+    session.received = offset + written
+    UploadSession.objects.filter(pk=session.pk).update(
+        received=session.received)
+    if session.received == session.size:
+        complete(session)
+    return session.received
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as source:
+        for block in iter(lambda: source.read(CHUNK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def reset(session):
+    """Удаляет принятые части, чтобы загрузку можно было начать заново."""
+    path = part_path(session)
+    if os.path.exists(path):
+        os.remove(path)
+    UploadSession.objects.filter(pk=session.pk).update(received=0)
+    session.received = 0
+
+
+def complete(session):
+    path = part_path(session)
+    if file_sha256(path) != session.sha256:
+        reset(session)
+        raise UploadError('Контрольная сумма не совпала.')
+    with open(path, 'rb') as part:
+        content = PartFile(part, name=session.filename)
+        try:
+            images.verify(content)
+        except ValueError as error:
+            part.close()
+            reset(session)
+            raise UploadError(str(error))
+        session.stored_name = post_image_storage.save(
+            UPLOAD_TO + session.filename, content)
+    if os.path.exists(path):
+        os.remove(path)
+    UploadSession.objects.filter(pk=session.pk).update(
+        stored_name=session.stored_name)
+
+
+def attach(post, user, upload_id):
+    """Прикрепляет к посту файл завершённой загрузки пользователя."""
+    try:
+        upload_id = uuid.UUID(str(upload_id))
+    except ValueError:
+        return False
+    session = UploadSession.objects.filter(
+        pk=upload_id, user=user).exclude(stored_name='').first()
+    if session is None:
+        return False
+    post.image = session.stored_name
+    post.image_hash = session.sha256
+    session.delete()
+    return True
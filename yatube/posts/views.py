@@ -1,11 +1,19 @@
 from django.core.paginator import Paginator
+from django.http import JsonResponse
 from django.shortcuts import render, get_object_or_404, redirect
+from django.views.decorators.http import require_POST
 from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
 # from django.views.decorators.cache import cache_page
 
+from core.decorators import conditional_page
+from core.ratelimit import ratelimit
+from core.tasks import enqueue
 
-from .models import Post, Group, Follow
+from . import (conditional, follow_graph, fragments, group_stats,
+               notifications, recommendations, trending, uploads)
+from .tasks import notify_followers, process_image
+from .models import Post, Group, Follow, UploadSession
 from .forms import PostForm, CommentForm
 
 LIMIT_POSTS = 10
@@ -13,8 +21,9 @@ User = get_user_model()
 
 
 # @cache_page(60 * 20)
+@conditional_page(conditional.feed_etag, conditional.feed_last_modified)
 def index(request):
-    post_list = Post.objects.select_related().all()
+    post_list = Post.objects.select_related('author', 'group')
     page_obj = paginator(request, post_list, LIMIT_POSTS)
     template = 'posts/index.html'
 
@@ -24,9 +33,31 @@ def index(request):
     return render(request, template, context)
 
 
+def trending_index(request):
+    page_obj = paginator(request, trending.trending_posts(), LIMIT_POSTS)
+    template = 'posts/trending.html'
+
+    context = {
+        'page_obj': page_obj,
+        'trending': True,
+    }
+    return render(request, template, context)
+
+
+@conditional_page(conditional.group_index_etag)
+def group_index(request):
+    template = 'posts/group_index.html'
+
+    context = {
+        'groups': group_stats.group_directory(),
+    }
+    return render(request, template, context)
+
+
+@conditional_page(conditional.group_etag, conditional.group_last_modified)
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    post_list = group.posts.all()
+    post_list = group.posts.select_related('author')
     page_obj = paginator(request, post_list, LIMIT_POSTS)
     template = 'posts/group_list.html'
 
@@ -37,31 +68,34 @@ def group_posts(request, slug):
     return render(request, template, context)
 
 
+@conditional_page(conditional.profile_etag)
 def profile(request, username):
     user = get_object_or_404(User, username=username)
-    post_list = user.posts.all()
+    post_list = user.posts.select_related('group')
     template = 'posts/profile.html'
     page_obj = paginator(request, post_list, LIMIT_POSTS)
 
-    follower = request.user
-    followed = User.objects.get(username=username)
     following = False
-    if follower.is_active:
-        following = Follow.objects.filter(
-            user=follower, author=followed).exists()
+    if request.user.is_authenticated:
+        following = follow_graph.is_following(request.user.id, user.id)
 
     context = {
         'author': user,
         'page_obj': page_obj,
         'post_list': post_list,
         'following': following,
+        'recommendations': recommendations.for_user(request.user),
+        **fragments.context(
+            (fragments.AUTHOR, user.id), (fragments.GROUPS, 0)),
     }
     return render(request, template, context)
 
 
+@conditional_page(conditional.post_detail_etag)
 def post_detail(request, post_id):
-    post_list = get_object_or_404(Post, id=post_id)
-    comments_list = post_list.comments.all()
+    post_list = get_object_or_404(
+        Post.objects.select_related('author', 'group'), id=post_id)
+    comments_list = post_list.comments.select_related('author')
     comment_form = CommentForm(request.POST or None)
     template = 'posts/post_detail.html'
 
@@ -69,11 +103,17 @@ def post_detail(request, post_id):
         'post_list': post_list,
         'comment_form': comment_form,
         'comments': comments_list,
+        **fragments.context(
+            (fragments.POST, post_list.id),
+            (fragments.AUTHOR, post_list.author_id),
+            (fragments.GROUPS, 0),
+        ),
     }
     return render(request, template, context)
 
 
 @login_required
+@ratelimit('post_create')
 def post_create(request):
     if request.method == 'POST':
         form = PostForm(request.POST or None,
@@ -81,7 +121,12 @@ def post_create(request):
         if form.is_valid():
             new_post = form.save(commit=False)
             new_post.author = request.user
+            uploads.attach(new_post, request.user, request.POST.get('upload'))
             new_post.save()
+            enqueue(notify_followers, post_id=new_post.id)
+            if new_post.image:
+                enqueue(process_image, post_id=new_post.id,
+                        name=new_post.image.name)
             return redirect('posts:profile', request.user.username)
 
     template = 'posts/create_post.html'
@@ -105,7 +150,12 @@ def post_edit(request, post_id):
                         files=request.FILES or None,
                         instance=post)
         if form.is_valid():
-            form.save()
+            post = form.save(commit=False)
+            attached = uploads.attach(
+                post, request.user, request.POST.get('upload'))
+            post.save()
+            if (attached or 'image' in form.changed_data) and post.image:
+                enqueue(process_image, post_id=post.id, name=post.image.name)
             return redirect('posts:post_detail', post_id)
 
     template = 'posts/create_post.html'
@@ -117,6 +167,44 @@ def post_edit(request, post_id):
     return render(request, template, context)
 
 
+@login_required
+@require_POST
+def upload_create(request):
+    try:
+        session = uploads.create_session(
+            request.user,
+            request.POST.get('filename', ''),
+            int(request.POST.get('size', 0)),
+            request.POST.get('sha256', ''),
+        )
+    except (ValueError, uploads.UploadError) as error:
+        return JsonResponse({'error': str(error)}, status=400)
+    return JsonResponse({'id': str(session.id), 'offset': 0}, status=201)
+
+
+@login_required
+def upload_chunk(request, upload_id):
+    session = get_object_or_404(UploadSession, pk=upload_id,
+                                user=request.user)
+    if request.method == 'POST':
+        try:
+            uploads.append_chunk(
+                session,
+                int(request.META.get('HTTP_UPLOAD_OFFSET', -1)),
+                request,
+                int(request.META.get('CONTENT_LENGTH') or 0),
+            )
+        except (ValueError, uploads.UploadError) as error:
+            return JsonResponse(
+                {'error': str(error), 'offset': session.received},
+                status=409,
+            )
+    return JsonResponse({
+        'offset': session.received,
+        'complete': bool(session.stored_name),
+    })
+
+
 def paginator(request, post_list, LIMIT_POSTS):
     paginator = Paginator(post_list, LIMIT_POSTS)
     page_number = request.GET.get('page')
@@ -125,6 +213,7 @@ def paginator(request, post_list, LIMIT_POSTS):
 
 
 @login_required
+@ratelimit('add_comment')
 def add_comment(request, post_id):
     post_instance = get_object_or_404(Post, id=post_id)
     form = CommentForm(request.POST or None)
@@ -137,20 +226,38 @@ def add_comment(request, post_id):
 
 
 @login_required
+@conditional_page(conditional.follow_etag)
 def follow_index(request):
     post_list = Post.objects.filter(
-        author__following__user=request.user
+        author_id__in=follow_graph.following_ids(request.user.id)
     ).select_related('author', 'group')
     template = 'posts/follow.html'
     page_obj = paginator(request, post_list, LIMIT_POSTS)
 
     context = {
         'page_obj': page_obj,
+        'recommendations': recommendations.for_user(request.user),
     }
     return render(request, template, context)
 
 
 @login_required
+def notification_list(request):
+    user_notifications = request.user.notifications.select_related(
+        'post__author')
+    page_obj = paginator(request, user_notifications, LIMIT_POSTS)
+    template = 'posts/notifications.html'
+
+    context = {
+        'page_obj': page_obj,
+    }
+    response = render(request, template, context)
+    notifications.mark_all_read(request.user.id)
+    return response
+
+
+@login_required
+@ratelimit('profile_follow', methods=('GET', 'POST'))
 def profile_follow(request, username):
     follower = request.user
     followed = get_object_or_404(User, username=username)
@@ -31,4 +31,73 @@ window.addEventListener('DOMContentLoaded', () => {
       });
     }
    }
-});   
\ No newline at end of file
+
+   // ---------------- Новые записи ---------------- //
+   const live = document.querySelector("[data-events]")
+
+   if(live != null && window.EventSource) {
+    const source = new EventSource(live.getAttribute('data-events'))
+    let total = 0
+    const showNew = (event) => {
+      total += JSON.parse(event.data).count
+      live.querySelector(".live-count").textContent = total
+      live.classList.remove('d-none')
+    }
+    source.addEventListener('new_posts', showNew)
+    source.addEventListener('new_comments', showNew)
+   }
+
+   // ---------------- Загрузка картинки частями ---------------- //
+   const uploadField = document.querySelector("[data-upload-url]")
+   const chunkSize = 1024 * 1024
+
+   if(uploadField != null && window.fetch && window.crypto && crypto.subtle) {
+    const form = uploadField.form
+    const fileInput = form.querySelector("input[type=file]")
+    const csrf = form.querySelector("[name=csrfmiddlewaretoken]").value
+
+    const toHex = (buffer) => Array.from(new Uint8Array(buffer))
+      .map(byte => byte.toString(16).padStart(2, '0')).join('')
+
+    const uploadFile = async (file) => {
+      const sha256 = toHex(await crypto.subtle.digest('SHA-256', await file.arrayBuffer()))
+      const data = new FormData()
+      data.append('filename', file.name)
+      data.append('size', file.size)
+      data.append('sha256', sha256)
+      const created = await fetch(uploadField.getAttribute('data-upload-url'), {
+        method: 'POST', body: data, headers: {'X-CSRFToken': csrf},
+      }).then(response => response.json())
+      const url = uploadField.getAttribute('data-upload-url') + created.id + '/'
+      let offset = 0
+      let failures = 0
+      while(offset < file.size) {
+        const result = await fetch(url, {
+          method: 'POST',
+          body: file.slice(offset, offset + chunkSize),
+          headers: {
+            'X-CSRFToken': csrf,
+            'Upload-Offset': offset,
+            'Content-Type': 'application/octet-stream',
+          },
+        }).then(response => response.json())
+        // При ошибке сервер сообщает смещение, с которого продолжить.
+        if(result.error && ++failures > 5) {
+          throw new Error(result.error)
+        }
+        offset = result.offset
+      }
+      return created.id
+    }
+
+    form.addEventListener('submit', async (event) => {
+      if(fileInput == null || !fileInput.files.length || uploadField.value) {
+        return
+      }
+      event.preventDefault()
+      uploadField.value = await uploadFile(fileInput.files[0])
+      fileInput.value = ''
+      form.submit()
+    })
+   }
+});
@@ -0,0 +1,111 @@
+"""Хешеры паролей с параметрами из настроек.
+
+Какой хешер основной, выбирает settings.PASSWORD_HASHER, а параметры
+стоимости лежат в settings.PASSWORD_HASHER_PARAMS. Django пересчитывает
+хеш при удачном входе, если он сделан другим хешером или с другими
+параметрами, поэтому смена политики не требует миграции паролей.
+"""
+import base64
+import hashlib
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import hashers
+from django.utils.crypto import constant_time_compare
+from django.utils.translation import gettext_noop as _
+
+
+class _Param:
+    """Параметр хешера из PASSWORD_HASHER_PARAMS со значением по умолчанию.
+
+    Читается при каждом обращении, поэтому override_settings в тестах и
+    бенчмарке меняет параметры без пересоздания хешеров.
+    """
+
+    def __init__(self, default):
+        self.default = default
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, instance, owner):
+        params = getattr(settings, 'PASSWORD_HASHER_PARAMS', {})
+        return params.get(owner.algorithm, {}).get(self.name, self.default)
+
+
+class ScryptPasswordHasher(hashers.BasePasswordHasher):
+    """scrypt из стандартной библиотеки (hashlib.scrypt).
+
+    Формат хеша совпадает с ScryptPasswordHasher из новых версий Django:
+    scrypt$<N>$<соль>$<r>$<p>$<хеш>.
+    """
+    algorithm = 'scrypt'
+    work_factor = _Param(2 ** 14)
+    block_size = _Param(8)
+    parallelism = _Param(1)
+
+    def encode(self, password, salt, n=None, r=None, p=None):
+        assert password is not None
+        assert salt and '$' not in salt
+        n = n or self.work_factor
+        r = r or self.block_size
+        p = p or self.parallelism
+        hash_ = hashlib.scrypt(
+            password.encode(), salt=salt.encode(), n=n, r=r, p=p,
+            # OpenSSL по умолчанию ограничивает память 32 МиБ, чего не
+            # хватает уже при N=2**15.
+            maxmem=256 * r * (n + p), dklen=64,
+        )
+        hash_ = base64.b64encode(hash_).decode('ascii').strip()
+        return f'{self.algorithm}${n}${salt}${r}${p}${hash_}'
+
+    def decode(self, encoded):
+        algorithm, n, salt, r, p, hash_ = encoded.split('$')
+        assert algorithm == self.algorithm
+        return {
+            'algorithm': algorithm,
+            'work_factor': int(n),
+            'salt': salt,
+            'block_size': int(r),
+            'parallelism': int(p),
+            'hash': hash_,
+        }
+
+    def verify(self, password, encoded):
+        decoded = self.decode(encoded)
+        encoded_2 = self.encode(
+            password, decoded['salt'], decoded['work_factor'],
+            decoded['block_size'], decoded['parallelism'],
+        )
+        return constant_time_compare(encoded, encoded_2)
+
+    def safe_summary(self, encoded):
+        decoded = self.decode(encoded)
+        return OrderedDict([
+            (_('algorithm'), decoded['algorithm']),
+            (_('work factor'), decoded['work_factor']),
+            (_('block size'), decoded['block_size']),
+            (_('parallelism'), decoded['parallelism']),
+            (_('salt'), hashers.mask_hash(decoded['salt'])),
+            (_('hash'), hashers.mask_hash(decoded['hash'])),
+        ])
+
+    def must_update(self, encoded):
+        decoded = self.decode(encoded)
+        return (
+            decoded['work_factor'] != self.work_factor
+            or decoded['block_size'] != self.block_size
+            or decoded['parallelism'] != self.parallelism
+        )
+
+    def harden_runtime(self, password, encoded):
+        # Стоимость scrypt задаётся всеми параметрами сразу, и добрать
+        # разницу повторными вызовами, как у PBKDF2, нельзя.
+        pass
+
+
+class Argon2PasswordHasher(hashers.Argon2PasswordHasher):
+    """Argon2 с параметрами из настроек; нужен пакет argon2-cffi."""
+    time_cost = _Param(2)
+    memory_cost = _Param(19 * 1024)
+    parallelism = _Param(1)
@@ -1,3 +1,45 @@
-# from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import (check_password, identify_hasher,
+                                         make_password)
+from django.test import TestCase, override_settings
+from django.urls import reverse
 
-# Create your tests here.
+from .hashers import ScryptPasswordHasher
+
+SCRYPT = 'users.hashers.ScryptPasswordHasher'
+PBKDF2 = 'django.contrib.auth.hashers.PBKDF2PasswordHasher'
+# Небольшие параметры, чтобы тесты не тратили время на хеширование.
+FAST_PARAMS = {'scrypt': {'work_factor': 2 ** 4}}
+
+
+@override_settings(PASSWORD_HASHERS=[SCRYPT, PBKDF2],
+                   PASSWORD_HASHER_PARAMS=FAST_PARAMS)
+class PasswordHasherTests(TestCase):
+    def test_scrypt_round_trip(self):
+        encoded = make_password('секрет')
+        self.assertTrue(encoded.startswith('scrypt$16$'))
+        self.assertTrue(check_password('секрет', encoded))
+        self.assertFalse(check_password('другой', encoded))
+        self.assertIn('work factor',
+                      ScryptPasswordHasher().safe_summary(encoded))
+
+    def test_changed_params_require_update(self):
+        encoded = make_password('секрет')
+        hasher = identify_hasher(encoded)
+        self.assertFalse(hasher.must_update(encoded))
+        with override_settings(
+                PASSWORD_HASHER_PARAMS={'scrypt': {'work_factor': 2 ** 5}}):
+            self.assertTrue(hasher.must_update(encoded))
+
+    def test_login_rehashes_old_password(self):
+        """Хеш PBKDF2 пересчитывается основным хешером при входе."""
+        user = get_user_model().objects.create(
+            username='old_hash', password=make_password('секрет', None,
+                                                        'pbkdf2_sha256'))
+        response = self.client.post(
+            reverse('users:login'),
+            {'username': 'old_hash', 'password': 'секрет'})
+        self.assertEqual(response.status_code, 302)
+        user.refresh_from_db()
+        self.assertEqual(identify_hasher(user.password).algorithm, 'scrypt')
+        self.assertTrue(user.check_password('секрет'))
@@ -0,0 +1,40 @@
+"""
+ASGI config for yatube project.
+
+It exposes the ASGI callable as a module-level variable named
+``application``. Requests to /events/ are served by the live update
+stream, everything else by Django through a thread pool. Run it with
+any ASGI server, for example::
+
+    uvicorn yatube.asgi:application
+
+ASGI_THREADS sets the size of the thread pool for Django views;
+SERVE_STATIC serves static and media files as in yatube/wsgi.py.
+"""
+
+import os
+
+from django.core.wsgi import get_wsgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+
+django_application = get_wsgi_application()
+
+from core import sse  # noqa: E402
+from core.asgi import WsgiToAsgi  # noqa: E402
+from core.static import StaticFiles  # noqa: E402
+
+if os.getenv('SERVE_STATIC'):
+    django_application = StaticFiles.from_settings(django_application)
+
+django_asgi = WsgiToAsgi(
+    django_application,
+    max_workers=int(os.getenv('ASGI_THREADS', 8)),
+)
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'lifespan' or scope['path'].startswith('/events/'):
+        await sse.application(scope, receive, send)
+    elif scope['type'] == 'http':
+        await django_asgi(scope, receive, send)
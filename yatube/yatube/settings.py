@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/2.2/ref/settings/
 """
 
+import importlib.util
 import os
 
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
@@ -69,18 +70,31 @@ MIDDLEWARE = [
 ROOT_URLCONF = 'yatube.urls'
 
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
+TEMPLATE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+# Скомпилированные шаблоны хранятся в памяти процесса; при WARMUP
+# wsgi.py компилирует их все до первого запроса (core.warmup).
+# TEMPLATE_CACHE=0 — перечитывать при каждом рендере, удобно при
+# правке шаблонов.
+if os.getenv('TEMPLATE_CACHE', '1') == '1':
+    TEMPLATE_LOADERS = [
+        ('django.template.loaders.cached.Loader', TEMPLATE_LOADERS),
+    ]
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
-        'APP_DIRS': True,
         'OPTIONS': {
+            'loaders': TEMPLATE_LOADERS,
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
                 'core.context_processors.year.year',
+                'core.context_processors.notifications.notifications',
             ],
         },
     },
@@ -96,6 +110,9 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        # Соединение переиспользуется между запросами одного потока,
+        # чтобы дешёвые страницы не платили за открытие соединения.
+        'CONN_MAX_AGE': int(os.getenv('CONN_MAX_AGE', 60)),
     }
 }
 
@@ -119,6 +136,38 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# Хешер паролей: argon2, scrypt или pbkdf2. По умолчанию argon2, если
+# установлен argon2-cffi, иначе scrypt: оба требуют памяти и потому
+# стойче PBKDF2 к перебору на GPU при меньшем времени CPU на один вход
+# (сравнить — manage.py bench_login). Остальные хешеры остаются в списке,
+# чтобы проверять старые хеши; при входе Django пересчитает их
+# основным хешером (users.hashers).
+PASSWORD_HASHER_POLICIES = {
+    'argon2': 'users.hashers.Argon2PasswordHasher',
+    'scrypt': 'users.hashers.ScryptPasswordHasher',
+    'pbkdf2': 'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+}
+PASSWORD_HASHER = os.getenv(
+    'PASSWORD_HASHER',
+    'argon2' if importlib.util.find_spec('argon2') else 'scrypt')
+PASSWORD_HASHERS = [PASSWORD_HASHER_POLICIES[PASSWORD_HASHER]] + [
+    path for name, path in PASSWORD_HASHER_POLICIES.items()
+    if name != PASSWORD_HASHER
+] + ['django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher']
+PASSWORD_HASHER_PARAMS = {
+    'scrypt': {
+        'work_factor': int(os.getenv('SCRYPT_WORK_FACTOR', 2 ** 14)),
+        'block_size': 8,
+        'parallelism': 1,
+    },
+    'argon2': {
+        'time_cost': int(os.getenv('ARGON2_TIME_COST', 2)),
+        'memory_cost': int(os.getenv('ARGON2_MEMORY_COST', 19 * 1024)),
+        'parallelism': 1,
+    },
+}
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/2.2/topics/i18n/
 
@@ -137,21 +186,110 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/2.2/howto/static-files/
 
 STATIC_URL = '/static/'
-# STATIC_ROOT = '/88_YandexPracticum/hw05_final/yatube/static/'
+STATIC_ROOT = os.getenv(
+    'STATIC_ROOT', os.path.join(BASE_DIR, 'collected_static'))
 
 STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
+# Имена с хешем и сжатые копии создаёт collectstatic (core.staticfiles).
+STATICFILES_STORAGE = os.getenv(
+    'STATICFILES_STORAGE',
+    'core.staticfiles.CompressedManifestStaticFilesStorage')
 LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:index'
-EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+EMAIL_BACKEND = 'core.mail.QueuedEmailBackend'
+EMAIL_DELIVERY_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+EMAIL_BATCH_SIZE = 50
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
-# CACHES = {
-#     'default': {
-#         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-#     }
-# }
+# Фоновые задачи: при TASKS_EAGER задачи выполняются сразу в запросе.
+TASKS_EAGER = False
+TASK_MAX_ATTEMPTS = 3
+TASK_RETRY_DELAY = 10
+# Через сколько секунд без отметок прогресса задача в статусе RUNNING
+# считается брошенной и возвращается в очередь.
+TASK_VISIBILITY_TIMEOUT = 60 * 30
+
+# Время жизни общих фрагментов страниц профиля и поста
+# (posts.fragments); 0 отключает кэширование.
+FRAGMENT_CACHE_TIMEOUT = int(os.getenv('FRAGMENT_CACHE_TIMEOUT', 600))
+# Время жизни ключей версий фрагментов и ETag; должно быть больше
+# FRAGMENT_CACHE_TIMEOUT, иначе версии будут меняться без изменений.
+FRAGMENT_VERSION_TIMEOUT = int(
+    os.getenv('FRAGMENT_VERSION_TIMEOUT', 60 * 60 * 24))
+
+# Лимиты частоты запросов (core.ratelimit): на пользователя и на IP.
+RATELIMIT_ENABLED = os.getenv('RATELIMIT_ENABLED', '1') == '1'
+RATE_LIMITS = {
+    'post_create': {'user': '10/m', 'ip': '60/m'},
+    'add_comment': {'user': '20/m', 'ip': '120/m'},
+    'profile_follow': {'user': '30/m', 'ip': '120/m'},
+    'signup': {'ip': '5/h'},
+}
+# Адреса и сети обратных прокси через запятую, например
+# '127.0.0.1,10.0.0.0/8'. Только от них принимается X-Forwarded-For;
+# без них лимит по IP считается по REMOTE_ADDR.
+RATELIMIT_TRUSTED_PROXIES = [
+    proxy for proxy in os.getenv('RATELIMIT_TRUSTED_PROXIES', '').split(',')
+    if proxy
+]
+
+# Сборка осиротевших картинок (posts.media_gc): раз в сутки,
+# не больше GC_MEDIA_RATE удалений в секунду.
+GC_MEDIA_INTERVAL = 60 * 60 * 24
+GC_MEDIA_RATE = 50
+
+# Затухание оценок популярных постов (posts.trending): каждый запуск
+# умножает оценки на trending.DECAY_FACTOR.
+TRENDING_DECAY_INTERVAL = 60 * 60 * 6
+
+# Пересчёт рекомендаций «На кого подписаться» (posts.recommendations).
+RECOMMENDATIONS_INTERVAL = 60 * 60 * 6
+
+
+# Кэш. По умолчанию locmem: версии фрагментов, граф подписок, счётчики
+# уведомлений и лимитов читаются без обращений к базе, но видны только
+# своему процессу. Если веб-воркеров несколько или run_worker и
+# ASGI-процесс событий запущены отдельно, нужен общий кэш, иначе
+# изменения из другого процесса дойдут до страниц только по таймауту:
+# memcached, где incr атомарен (CACHE_BACKEND=memcached,
+# CACHE_LOCATION=127.0.0.1:11211), или таблица в базе
+# (CACHE_BACKEND=db, таблицу создаёт createcachetable) — она не требует
+# отдельного сервиса, но каждое чтение кэша становится SQL-запросом.
+CACHE_BACKENDS = {
+    'db': 'django.core.cache.backends.db.DatabaseCache',
+    'memcached': 'django.core.cache.backends.memcached.MemcachedCache',
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+}
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'locmem')
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKENDS[CACHE_BACKEND],
+        'LOCATION': os.getenv('CACHE_LOCATION', 'yatube_cache'),
+    }
+}
+if CACHE_BACKEND != 'memcached':
+    CACHES['default']['OPTIONS'] = {'MAX_ENTRIES': 100000}
+
+# Брокер событий для потока /events/ (yatube/asgi.py). Поток работает
+# в отдельном ASGI-процессе, поэтому события идут через общий кэш; с
+# locmem они видны только в том процессе, где опубликованы.
+EVENTS_BROKER = (
+    'core.events.LocalBroker' if CACHE_BACKEND == 'locmem'
+    else 'core.events.CacheBroker'
+)
+
+# Хранилище сессий: db, cache, cached_db или signed_cookies. cached_db
+# читает сессию из кэша и ходит в базу только при промахе и записи,
+# поэтому выигрывает лишь с memcached: кэш в таблице базы — это тот же
+# запрос к базе, а locmem не общий для процессов. По умолчанию cached_db
+# включается только с CACHE_BACKEND=memcached, иначе остаётся db.
+# signed_cookies не обращается ни к кэшу, ни к базе. Сравнение —
+# команда bench_sessions, очистка просроченных — purge_sessions.
+SESSION_BACKEND = os.getenv(
+    'SESSION_BACKEND', 'cached_db' if CACHE_BACKEND == 'memcached' else 'db')
+SESSION_ENGINE = f'django.contrib.sessions.backends.{SESSION_BACKEND}'
 
 # INTERNAL_IPS = [
 #     '127.0.0.1',
@@ -0,0 +1,5 @@
+"""Настройки для тестов: стойкий хешер паролей здесь только замедляет
+create_user в фикстурах."""
+from .settings import *  # noqa: F401, F403
+
+PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
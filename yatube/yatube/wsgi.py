@@ -14,3 +14,21 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
 
 application = get_wsgi_application()
+
+if os.getenv('SERVE_STATIC'):
+    # Статика и медиа без nginx: см. core.static.
+    from core.static import StaticFiles
+
+    application = StaticFiles.from_settings(application)
+
+if os.getenv('WARMUP'):
+    # Прогрев до приёма запросов (core.warmup). WARMUP=preload — для
+    # gunicorn --preload: прогрев идёт один раз до fork, а соединения с
+    # базой закрываются, потому что делить их между процессами нельзя.
+    from django.db import connections
+
+    from core.warmup import warmup
+
+    warmup(application)
+    if os.getenv('WARMUP') == 'preload':
+        connections.close_all()